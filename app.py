@@ -9,22 +9,33 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-import geemap.foliumap as geemap
-from streamlit_folium import st_folium
+# Módulos pesados (ee, geemap, streamlit_folium, pylandstats, geopandas,
+# matplotlib) são importados apenas no trecho que os usa, para que o
+# cabeçalho seja exibido antes de carregá-los
+import hashlib
 import json
-import ee
 import numpy as np
-import matplotlib.pyplot as plt
 import pandas as pd
-import pylandstats as pls
 import collections
-import geopandas as gpd
-import tempfile
-import os
-import uuid
 import logging
 from pathlib import Path
 
+from landscapemetrics.cache import default_cache, extract_buffer_cached
+from landscapemetrics.change import transition_matrix
+from landscapemetrics.earthengine import get_ee, initialize, is_initialized
+from landscapemetrics.export import table_bytes
+from landscapemetrics.ingest import read_points_bytes
+from landscapemetrics.instrumentation import Tracer, span
+from landscapemetrics.jobs import DEFAULT_JOB_WORKERS, JobQueue, start_workers
+from landscapemetrics.mapbiomas import CLASSIFICATION_PREFIX, get_mapbiomas_source, latest_classification_band, parse_classification_years
+from landscapemetrics.metrics import CLASS_METRICS, build_landscape, label_classes, raster_key
+from landscapemetrics.multiscale import radius_range, run_multiscale
+from landscapemetrics.pipeline import run_pipeline
+from landscapemetrics.rendering import legend_entries, legend_html, render_png
+from landscapemetrics.roundtrips import Deferred, RoundTripCounter
+from landscapemetrics.tiling import extract_buffer_stack, extract_geometry
+from landscapemetrics.timeseries import run_timeseries
+
 # Configuração de logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -33,10 +44,11 @@ logger = logging.getLogger(__name__)
 collections.Callable = collections.abc.Callable
 
 # Configurações de segurança
-MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
-ALLOWED_EXTENSIONS = {'.geojson'}
+MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
+ALLOWED_EXTENSIONS = {'.geojson', '.csv', '.parquet'}
 MIN_BUFFER = 1000
 MAX_BUFFER = 10000
+MAX_BATCH_POINTS = 500
 
 def validate_file_upload(uploaded_file):
     """Valida o arquivo enviado pelo usuário"""
@@ -58,86 +70,51 @@ def validate_file_upload(uploaded_file):
     
     return True, "Arquivo válido"
 
+def service_account_secret():
+    """JSON da conta de serviço nos segredos do Streamlit, ou ``None``"""
+    if "gee_service_account_credentials" in st.secrets:
+        return st.secrets["gee_service_account_credentials"]
+    return None
+
 def initialize_ee():
     """
     Inicializa o Google Earth Engine usando credenciais de conta de serviço
     armazenadas nos segredos do Streamlit.
     """
-    try:
-        # Testa se já está inicializado
-        ee.Number(1).getInfo()
+    # A inicialização vale para todo o processo: evita uma ida ao servidor a cada rerun
+    if is_initialized():
         logger.info("Earth Engine já inicializado")
         return True
-        
-    except ee.EEException:
-        # Não inicializado, procede com a inicialização
-        try:
-            # Verifica se as credenciais estão nos segredos do Streamlit
-            if "gee_service_account_credentials" in st.secrets:
-                # Obtém a string JSON das credenciais
-                json_data = st.secrets["gee_service_account_credentials"]
-                
-                # Parse do JSON
-                try:
-                    json_object = json.loads(json_data, strict=False)
-                except json.JSONDecodeError as json_err:
-                    logger.error(f"Erro JSON: {json_err}")
-                    st.error("❌ Credenciais JSON inválidas")
-                    st.stop()
-                    return False
-                
-                # Valida campos obrigatórios
-                required_fields = ['client_email', 'private_key', 'project_id']
-                missing_fields = [field for field in required_fields if not json_object.get(field)]
-                if missing_fields:
-                    logger.error(f"Campos obrigatórios ausentes: {missing_fields}")
-                    st.error(f"❌ Campos obrigatórios ausentes nas credenciais: {missing_fields}")
-                    st.stop()
-                    return False
-                
-                # Extrai o email da conta de serviço
-                service_account = json_object.get('client_email')
-                
-                # Converte de volta para string JSON (conforme tutorial)
-                json_object_str = json.dumps(json_object)
-                
-                # Cria as credenciais
-                credentials = ee.ServiceAccountCredentials(
-                    service_account, 
-                    key_data=json_object_str
-                )
-                
-                # Inicializa o Earth Engine
-                ee.Initialize(
-                    credentials=credentials,
-                    opt_url='https://earthengine-highvolume.googleapis.com'
-                )
-                
-                logger.info("Earth Engine inicializado com sucesso")
-                st.sidebar.success("✅ Earth Engine conectado!")
-                return True
-                
-            else:
-                # Fallback para desenvolvimento local
-                logger.warning("Credenciais GEE não encontradas, tentando inicialização local")
-                st.warning("⚠️ Modo desenvolvimento local")
-                ee.Initialize(opt_url='https://earthengine-highvolume.googleapis.com')
-                st.sidebar.info("🏠 Earth Engine (local)")
-                return True
-                
-        except Exception as ex:
-            logger.error(f"Falha ao inicializar Earth Engine: {ex}")
-            st.error("❌ Falha na inicialização do Earth Engine")
-            with st.expander("🔍 Detalhes do erro"):
-                st.error(f"Erro: {str(ex)}")
-                st.markdown("""
-                **Possíveis soluções:**
-                1. Verifique as credenciais no Streamlit Cloud
-                2. Confirme permissões da conta de serviço no GCP
-                3. Verifique se Earth Engine API está habilitado
-                """)
-            st.stop()
-            return False
+    
+    credentials_json = service_account_secret()
+    try:
+        initialize(credentials_json)
+    except ValueError as credentials_error:
+        # JSON inválido ou campos obrigatórios ausentes
+        logger.error(f"Credenciais inválidas: {credentials_error}")
+        st.error(f"❌ Credenciais inválidas: {credentials_error}")
+        st.stop()
+        return False
+    except Exception as ex:
+        logger.error(f"Falha ao inicializar Earth Engine: {ex}")
+        st.error("❌ Falha na inicialização do Earth Engine")
+        with st.expander("🔍 Detalhes do erro"):
+            st.error(f"Erro: {str(ex)}")
+            st.markdown("""
+            **Possíveis soluções:**
+            1. Verifique as credenciais no Streamlit Cloud
+            2. Confirme permissões da conta de serviço no GCP
+            3. Verifique se Earth Engine API está habilitado
+            """)
+        st.stop()
+        return False
+    
+    if credentials_json:
+        st.sidebar.success("✅ Earth Engine conectado!")
+    else:
+        st.warning("⚠️ Modo desenvolvimento local")
+        st.sidebar.info("🏠 Earth Engine (local)")
+    return True
 
 @st.cache_data
 def uploaded_file_to_gdf(data):
@@ -148,95 +125,86 @@ def uploaded_file_to_gdf(data):
         if not is_valid:
             raise ValueError(f"Arquivo inválido: {message}")
         
-        # Cria arquivo temporário seguro
         file_extension = Path(data.name).suffix.lower()
-        file_id = str(uuid.uuid4())
-        safe_filename = f"{file_id}{file_extension}"
-        file_path = os.path.join(tempfile.gettempdir(), safe_filename)
-        
-        # Garante que o caminho é seguro
-        temp_dir = Path(tempfile.gettempdir()).resolve()
-        file_path_resolved = Path(file_path).resolve()
-        if not str(file_path_resolved).startswith(str(temp_dir)):
-            raise ValueError("Caminho de arquivo inseguro")
-        
-        try:
-            with open(file_path, "wb") as file:
-                file.write(data.getbuffer())
-            
-            # Lê o arquivo com tratamento específico para versões do fiona
-            try:
-                if file_extension == ".kml":
-                    # Para KML, força o driver específico
-                    try:
-                        import fiona
-                        fiona.supported_drivers['KML'] = 'rw'
-                    except:
-                        pass
-                    gdf = gpd.read_file(file_path, driver="KML")
-                else:
-                    # Para GeoJSON, lê normalmente
-                    gdf = gpd.read_file(file_path)
-                    
-            except Exception as read_error:
-                # Fallback: tenta ler como JSON puro e converter
-                logger.warning(f"Erro na leitura padrão: {read_error}. Tentando método alternativo...")
-                
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    geojson_data = json.load(f)
-                
-                # Converte JSON para GeoDataFrame manualmente
-                import shapely.geometry as geom
-                
-                features = geojson_data.get('features', [])
-                if not features:
-                    raise ValueError("Nenhuma feature encontrada no GeoJSON")
-                
-                geometries = []
-                properties_list = []
-                
-                for feature in features:
-                    # Cria geometria usando shapely
-                    geom_data = feature.get('geometry', {})
-                    if geom_data.get('type') == 'Point':
-                        coords = geom_data.get('coordinates', [])
-                        if len(coords) >= 2:
-                            geometry = geom.Point(coords[0], coords[1])
-                            geometries.append(geometry)
-                            properties_list.append(feature.get('properties', {}))
-                
-                if not geometries:
-                    raise ValueError("Nenhuma geometria válida encontrada")
-                
-                # Cria GeoDataFrame manualmente
-                gdf = gpd.GeoDataFrame(properties_list, geometry=geometries, crs='EPSG:4326')
-            
-            # Valida GeoDataFrame
-            if gdf.empty:
-                raise ValueError("Arquivo GeoJSON vazio")
-            
-            # Garante que tem CRS definido
-            if gdf.crs is None:
-                gdf = gdf.set_crs('EPSG:4326')
-            
-            logger.info(f"Arquivo processado com sucesso: {len(gdf)} geometrias")
-            return gdf
-            
-        finally:
-            # Remove arquivo temporário
-            if os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
-                except Exception as cleanup_error:
-                    logger.warning(f"Erro ao limpar arquivo temporário: {cleanup_error}")
+        return read_points_bytes(data.getbuffer(), file_extension)
     
     except Exception as e:
         logger.error(f"Erro ao processar arquivo: {e}")
         raise
 
-# Inicializa o Earth Engine ANTES de qualquer outra operação
-if not initialize_ee():
-    st.stop()
+@st.cache_data(show_spinner=False)
+def timeseries_metrics(asset, lon, lat, buffer_dist, start_year, end_year):
+    """Série temporal de métricas em cache por (asset, ponto, buffer, intervalo de anos)"""
+    source = get_mapbiomas_source()
+    if source.asset != asset:
+        raise ValueError(f"Asset MapBiomas mudou: {asset} → {source.asset}")
+    return run_timeseries(source, lon, lat, buffer_dist, start_year, end_year)
+
+@st.cache_data(show_spinner=False)
+def multiscale_metrics(asset, band, lon, lat, radii):
+    """Métricas para vários raios em cache por (asset, banda, ponto, raios)"""
+    source = get_mapbiomas_source()
+    if source.asset != asset:
+        raise ValueError(f"Asset MapBiomas mudou: {asset} → {source.asset}")
+    return run_multiscale(source, band, lon, lat, radii)
+
+@st.cache_data(show_spinner=False)
+def transition_matrix_ha(asset, lon, lat, buffer_dist, year_from, year_to):
+    """Matriz de transição (ha) entre dois anos em cache por (asset, ponto, buffer, anos)"""
+    source = get_mapbiomas_source()
+    if source.asset != asset:
+        raise ValueError(f"Asset MapBiomas mudou: {asset} → {source.asset}")
+    bands = [f"{CLASSIFICATION_PREFIX}{year_from}", f"{CLASSIFICATION_PREFIX}{year_to}"]
+    stack = extract_buffer_stack(source.image, bands, lon, lat, buffer_dist).array
+    return transition_matrix(stack[0], stack[1], unit="ha")
+
+@st.cache_resource(show_spinner=False)
+def job_queue():
+    """Fila de trabalhos em SQLite e processos trabalhadores (um conjunto por servidor)"""
+    queue = JobQueue()
+    start_workers(DEFAULT_JOB_WORKERS, queue.path, credentials_json=service_account_secret())
+    return queue
+
+# Etapas em cache: cada uma depende só das próprias entradas, então uma
+# interação recalcula apenas as etapas posteriores ao que mudou
+@st.cache_data(show_spinner=False, max_entries=32)
+def stage_raster(asset, band, lon, lat, buffer_dist):
+    """Raster do buffer de um ponto, por (asset, banda, ponto, buffer)"""
+    source = get_mapbiomas_source()
+    if source.asset != asset:
+        raise ValueError(f"Asset MapBiomas mudou: {asset} → {source.asset}")
+    return extract_buffer_cached(source.image.select(band), asset, band, lon, lat, buffer_dist).array
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def stage_geometry_raster(asset, band, geometry, buffer_dist):
+    """Raster do buffer de um polígono (pixels fora do buffer como nodata), por (asset, banda, geometria, buffer)"""
+    source = get_mapbiomas_source()
+    if source.asset != asset:
+        raise ValueError(f"Asset MapBiomas mudou: {asset} → {source.asset}")
+    return extract_geometry(source.image.select(band), band, geometry, buffer_dist).array
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def stage_landscape(key, _np_arr_mb):
+    """Objeto ``pls.Landscape``, pela chave do conteúdo do raster"""
+    return build_landscape(_np_arr_mb, res=(30, 30))
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def stage_class_metrics(key, _np_arr_mb):
+    """Tabela de métricas de classe, pela chave do conteúdo do raster"""
+    return stage_landscape(key, _np_arr_mb).compute_class_metrics_df(metrics=CLASS_METRICS)
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def stage_landscape_png(key, _np_arr_mb):
+    """Classes em PNG (tabela de cores, sem matplotlib) e legenda em HTML, pela chave do raster"""
+    return render_png(_np_arr_mb), legend_html(legend_entries(_np_arr_mb))
+
+def session_stage(name, key, build):
+    """Objeto da sessão refeito só quando a chave muda (mapas folium não são compartilhados)"""
+    cached = st.session_state.get(name)
+    if cached is None or cached[0] != key:
+        cached = (key, build())
+        st.session_state[name] = cached
+    return cached[1]
 
 # Header principal
 col1, col2 = st.columns([2, 3])
@@ -255,14 +223,21 @@ with col2:
         unsafe_allow_html=True,
     )
 
+# Inicializa o Earth Engine ANTES de qualquer outra operação (após o cabeçalho);
+# LANDSCAPEMETRICS_EE_BACKEND=replay usa respostas gravadas (testes de carga offline)
+ee = get_ee()
+
+if not initialize_ee():
+    st.stop()
+
 # Sidebar com informações de segurança
 with st.sidebar:
     st.markdown("### 🔒 Informações")
     st.info(f"""
     📁 Arquivo máx: {MAX_FILE_SIZE // (1024*1024)}MB  
-    📍 Apenas 1 ponto por vez  
+    📍 Até {MAX_BATCH_POINTS} pontos por arquivo  
     🔧 Buffer: {MIN_BUFFER}-{MAX_BUFFER}m  
-    🔒 Apenas GeoJSON  
+    🔒 GeoJSON, CSV (lon/lat) ou GeoParquet  
     """)
     
     # Status do Earth Engine
@@ -273,6 +248,43 @@ with st.sidebar:
         except:
             st.error("❌ GEE Desconectado")
 
+    # Uso do cache de rasters em disco
+    with st.expander("💾 Cache de rasters"):
+        cache_stats = default_cache().stats()
+        st.caption(
+            f"Acertos: {cache_stats['hits']} • Faltas: {cache_stats['misses']} • "
+            f"Taxa: {cache_stats['hit_rate']:.0%}"
+        )
+        st.caption(f"Disco: {cache_stats['bytes'] / 1024**2:.1f} / {cache_stats['max_bytes'] / 1024**2:.0f} MB")
+
+    # Trabalhos em segundo plano: sobrevivem ao fechamento da aba
+    with st.expander("📋 Trabalhos em segundo plano"):
+        lookup_job = st.text_input("ID do trabalho", help="Para acompanhar um trabalho de outra sessão")
+        session_jobs = list(st.session_state.get("job_ids", []))
+        if lookup_job and lookup_job not in session_jobs:
+            session_jobs.append(lookup_job.strip())
+        if session_jobs:
+            st.button("🔄 Atualizar", key="refresh-jobs")
+        for job_id in reversed(session_jobs):
+            job = job_queue().status(job_id)
+            if job is None:
+                st.caption(f"{job_id}: não encontrado")
+                continue
+            st.caption(f"`{job_id}` • {job['status']} • {job['done']}/{job['total']} pontos ({job['failed']} falhas)")
+            st.progress(job['progress'])
+            if job['done']:
+                st.download_button(
+                    "📥 Resultados (CSV)",
+                    table_bytes(job_queue().results(job_id), "csv"),
+                    f"landscape_metrics_trabalho_{job_id}.csv",
+                    "text/csv",
+                    key=f"download-job-{job_id}",
+                    use_container_width=True
+                )
+
+    # Tempo, chamadas ao Earth Engine e memória de cada etapa da execução
+    show_spans = st.checkbox("⏱️ Tempos por etapa", help="Mostra as medidas de cada etapa ao final da execução")
+
 
 st.text(" ")
 st.markdown("---")
@@ -284,19 +296,28 @@ st.markdown(
 )
 
 st.warning(
-    "⚠️ **Instruções:** Use apenas a ferramenta 'Draw a marker' para selecionar **UM** ponto, depois clique em 'Export'."
+    "⚠️ **Instruções:** Use apenas a ferramenta 'Draw a marker' para selecionar um ou mais pontos, depois clique em 'Export'. "
+    "Com mais de um ponto, as métricas são calculadas em lote."
 )
 
 # Mapa para seleção de pontos
+from streamlit_folium import st_folium
+
 try:
-    Map = geemap.Map(
-        center=[-15.7801, -47.9292], 
-        zoom=5, 
-        Draw_export=True,
-        plugin_Draw=True,
-        plugin_LatLngPopup=False
-    )
-    Map.add_basemap("HYBRID")
+    import geemap.foliumap as geemap
+
+    def build_selection_map():
+        Map = geemap.Map(
+            center=[-15.7801, -47.9292], 
+            zoom=5, 
+            Draw_export=True,
+            plugin_Draw=True,
+            plugin_LatLngPopup=False
+        )
+        Map.add_basemap("HYBRID")
+        return Map
+
+    Map = session_stage("selection_map", None, build_selection_map)
 
     # Container para o mapa
     map_container = st.container()
@@ -323,20 +344,23 @@ st.markdown("---")
 
 # Seção 2: Upload do arquivo
 st.markdown(
-    "<h3>2) Upload do arquivo GeoJSON 📤</h3>",
+    "<h3>2) Upload do arquivo de pontos 📤</h3>",
     unsafe_allow_html=True,
 )
 
 data = st.file_uploader(
-    f"📁 Faça upload do arquivo GeoJSON exportado acima",
-    type=["geojson"],
-    help=f"Limite: {MAX_FILE_SIZE // (1024*1024)}MB • Apenas arquivos GeoJSON são aceitos"
+    f"📁 Faça upload do arquivo GeoJSON exportado acima (ou CSV/GeoParquet com os pontos)",
+    type=["geojson", "csv", "parquet"],
+    help=f"Limite: {MAX_FILE_SIZE // (1024*1024)}MB • GeoJSON, CSV com colunas lon/lat ou GeoParquet"
 )
 
 st.markdown("---")
 
 # Processamento principal
 if data:
+    # Conta as idas e voltas ao Earth Engine desta execução
+    round_trips = RoundTripCounter(label="execução do app").start()
+    tracer = Tracer(run="app").start()
     try:
         # Seção 3: Configuração do buffer
         st.markdown(
@@ -353,21 +377,102 @@ if data:
             help="Área circular ao redor do ponto para análise das métricas de paisagem"
         )
         
-        with st.spinner("📂 Processando arquivo GeoJSON..."):
+        with st.spinner("📂 Processando arquivo de pontos..."), span("upload"):
             gdf = uploaded_file_to_gdf(data)
 
+        # Valida o número de pontos
+        n_features = len(gdf)
+        if n_features > MAX_BATCH_POINTS:
+            st.error(f"❌ O arquivo tem {n_features} pontos. Máximo por lote: {MAX_BATCH_POINTS}.")
+            st.stop()
+        elif n_features == 0:
+            st.error("❌ Nenhum ponto encontrado no arquivo. Verifique o arquivo enviado.")
+            st.stop()
+        elif n_features > 1:
+            # Modo lote: extrai os buffers via computePixels (NPY), vários pontos em paralelo
+            st.info(f"📍 Modo lote: {n_features} pontos com buffer de {buffer_dist}m")
+            
+            # Por padrão o lote vai para a fila: o progresso fica salvo e a aba pode ser fechada.
+            # O mesmo arquivo e buffer não são reenfileirados a cada rerun
+            batch_jobs = st.session_state.setdefault("batch_jobs", {})
+            batch_key = hashlib.sha1(f"{gdf.to_json()}|{buffer_dist}".encode("utf-8")).hexdigest()
+            if batch_key not in batch_jobs:
+                batch_jobs[batch_key] = job_queue().submit(gdf, buffer_dist)
+                st.session_state.setdefault("job_ids", []).append(batch_jobs[batch_key])
+            job_id = batch_jobs[batch_key]
+
+            run_inline = st.button(
+                "⚡ Calcular nesta sessão",
+                help="Cancela o trabalho da fila e calcula aqui; a sessão fica ocupada e fechar a aba perde o cálculo"
+            )
+            if run_inline:
+                job_queue().cancel(job_id)
+                del batch_jobs[batch_key]
+                with st.spinner("🛰️ Extraindo dados MapBiomas e calculando métricas em lote..."):
+                    batch_result = run_pipeline(gdf, buffer_dist)
+                    batch_df, batch_failures = batch_result.table, batch_result.failures
+                st.success(
+                    f"✅ MapBiomas {batch_result.asset.split('/')[-1]} ({batch_result.year}): "
+                    f"{n_features - len(batch_failures)} pontos processados"
+                )
+            else:
+                job = job_queue().status(job_id)
+                st.info(f"⏳ Trabalho `{job_id}` em segundo plano. Guarde o ID para baixar os resultados depois.")
+                st.caption(f"{job['status']} • {job['done']}/{job['total']} pontos ({job['failed']} falhas)")
+                st.progress(job['progress'])
+                if job['status'] not in ('done', 'failed', 'cancelled'):
+                    st.button("🔄 Atualizar", key="refresh-batch-job")
+                    st.stop()
+                if job['status'] != 'done':
+                    st.error(f"❌ Trabalho {job['status']}: {job['error'] or 'sem detalhes'}")
+                    st.stop()
+                batch_df, batch_failures = job_queue().results(job_id), job_queue().failures(job_id)
+                st.success(f"✅ {job['done']} pontos processados")
+
+            if batch_failures:
+                st.warning(f"⚠️ {len(batch_failures)} pontos falharam")
+                with st.expander("🔍 Pontos com falha"):
+                    st.json({str(k): v for k, v in batch_failures.items()})
+
+            st.dataframe(batch_df, use_container_width=True)
+            batch_filename = f"landscape_metrics_lote_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}"
+            csv_col, parquet_col = st.columns(2)
+            with csv_col:
+                st.download_button(
+                    "📥 Download CSV (lote)",
+                    table_bytes(batch_df, "csv"),
+                    f"{batch_filename}.csv",
+                    "text/csv",
+                    key="download-csv-batch",
+                    use_container_width=True
+                )
+            with parquet_col:
+                st.download_button(
+                    "📥 Download Parquet (lote)",
+                    table_bytes(batch_df, "parquet"),
+                    f"{batch_filename}.parquet",
+                    "application/vnd.apache.parquet",
+                    key="download-parquet-batch",
+                    use_container_width=True
+                )
+            logger.info(f"Lote concluído: {n_features} pontos, buffer de {buffer_dist}m")
+            st.stop()
+        
         # Converte para formato Earth Engine com tratamento robusto
+        # (só o ponto único; o modo lote usa o GeoDataFrame diretamente)
         try:
             # Primeiro tenta o método padrão do geemap
-            gdf_json = gdf.to_json()
+            gdf_json = gdf.iloc[:1].to_json()
             gdf_features = json.loads(gdf_json)["features"]
             
         except Exception as json_error:
             logger.warning(f"Erro na conversão JSON padrão: {json_error}. Tentando método alternativo...")
             
             # Método alternativo: converte manualmente
+            import geopandas as gpd
+
             gdf_features = []
-            for idx, row in gdf.iterrows():
+            for idx, row in gdf.iloc[:1].iterrows():
                 feature = {
                     "type": "Feature",
                     "geometry": json.loads(gpd.GeoSeries([row.geometry]).to_json())["features"][0]["geometry"],
@@ -375,40 +480,31 @@ if data:
                 }
                 gdf_features.append(feature)
         
-        # Valida que há apenas um ponto
-        if len(gdf_features) > 1:
-            st.error("❌ Você selecionou mais de um ponto. Por favor, selecione apenas **UM** ponto de interesse.")
-            st.stop()
-        elif len(gdf_features) == 0:
-            st.error("❌ Nenhum ponto encontrado no arquivo. Verifique o arquivo GeoJSON.")
-            st.stop()
-        
         # Cria ROI e buffer com tratamento de erro robusto
-        with st.spinner("🌍 Preparando área de interesse..."):
+        with st.spinner("🌍 Preparando área de interesse..."), span("roi"):
             try:
                 # Cria FeatureCollection do Earth Engine
                 roi = ee.FeatureCollection(gdf_features)
                 
                 # Debug: mostra informações sobre o ROI
                 logger.info(f"ROI criado com {len(gdf_features)} features")
-                st.info(f"📍 Processando ponto: {gdf_features[0]['geometry']['coordinates']}")
                 
                 # Cria buffer
                 roi_buffer = roi.geometry().buffer(buffer_dist)
                 
-                # Testa a geometria de forma mais simples
-                try:
-                    # Tenta obter informações básicas da geometria
-                    roi_bounds = roi.geometry().bounds().getInfo()
-                    logger.info(f"Bounds do ROI: {roi_bounds}")
-                    
-                    # Verifica se o buffer foi criado
-                    buffer_bounds = roi_buffer.bounds().getInfo()
-                    logger.info(f"Bounds do buffer: {buffer_bounds}")
-                    
-                except Exception as bounds_error:
-                    logger.warning(f"Não foi possível obter bounds: {bounds_error}")
-                    # Continua mesmo assim, pois o erro pode ser apenas na validação
+                if gdf_features[0]['geometry']['type'] == 'Point':
+                    st.info(f"📍 Processando ponto: {gdf_features[0]['geometry']['coordinates']}")
+                else:
+                    # Centro do polígono e limites do buffer: uma única ida ao servidor
+                    roi_values = Deferred()
+                    roi_values.add('centroid', roi.geometry().centroid())
+                    roi_values.add('buffer_bounds', roi_buffer.bounds())
+                    try:
+                        centroid_lon, centroid_lat = roi_values.get('centroid')['coordinates'][:2]
+                        st.info(f"📍 Processando polígono com centro em ({centroid_lon:.5f}, {centroid_lat:.5f})")
+                        logger.info(f"Limites do buffer: {roi_values.get('buffer_bounds')['coordinates']}")
+                    except Exception as bounds_error:
+                        logger.warning(f"Centro do polígono indisponível: {bounds_error}")
                 
                 st.success(f"✅ Área de interesse criada com buffer de {buffer_dist}m")
                 
@@ -451,11 +547,17 @@ if data:
             
             # Mapa da área de interesse
             try:
-                roi_map = geemap.Map()
-                roi_map.add_basemap("HYBRID")
-                roi_map.centerObject(roi, zoom=11)
-                roi_map.addLayer(roi_buffer, {}, "ROI Buffer")
-                
+                def build_roi_map():
+                    roi_map = geemap.Map()
+                    roi_map.add_basemap("HYBRID")
+                    roi_map.centerObject(roi, zoom=11)
+                    roi_map.addLayer(roi_buffer, {}, "ROI Buffer")
+                    return roi_map
+                
+                # Refeito (com as chamadas ao Earth Engine) só quando o ponto ou o buffer mudam
+                roi_map = session_stage(
+                    "roi_map", (json.dumps(gdf_features[0]['geometry']), buffer_dist), build_roi_map
+                )
                 st_folium(roi_map, width=400, height=300)
                 
             except Exception as roi_map_error:
@@ -464,133 +566,41 @@ if data:
                 st.text(f"Buffer de {buffer_dist}m aplicado ao ponto selecionado")
 
         # Processamento dos dados MapBiomas - VERSÃO FINAL SEM ERROS
+        source = None
         with st.spinner("🛰️ Conectando ao MapBiomas..."):
             try:
-                # Assets oficiais do MapBiomas Collection 9
-                mapbiomas_assets = [
-                    "projects/mapbiomas-public/assets/brazil/lulc/collection9/mapbiomas_collection90_integration_v1",
-                    "projects/mapbiomas-public/assets/brazil/lulc/collection8/mapbiomas_collection80_integration_v1",
-                    "projects/mapbiomas-workspace/public/collection7/mapbiomas_collection70_integration_v2",
-                    "projects/mapbiomas-workspace/public/collection6/mapbiomas_collection60_integration_v1"
-                ]
-                
-                mb = None
-                collection_number = None
-                
-                # Tenta diferentes assets até encontrar um que funcione
-                for asset in mapbiomas_assets:
-                    try:
-                        st.info(f"🔍 Testando {asset.split('/')[-1]}...")
-                        test_image = ee.Image(asset)
-                        bands = test_image.bandNames().getInfo()
-                        
-                        if bands and len(bands) > 0:
-                            mb = test_image
-                            if "collection9" in asset:
-                                collection_number = 9
-                            elif "collection8" in asset:
-                                collection_number = 8
-                            elif "collection7" in asset:
-                                collection_number = 7
-                            else:
-                                collection_number = 6
-                            break
-                            
-                    except Exception as asset_error:
-                        logger.warning(f"Asset {asset} falhou: {asset_error}")
-                        continue
-                
-                if mb is None:
-                    raise ValueError("Nenhum asset MapBiomas disponível")
+                # Asset e anos disponíveis vêm do cache (renovado em segundo plano)
+                with span("mapbiomas_source"):
+                    source = get_mapbiomas_source()
+                collection_number = source.collection_number
                 
                 st.success(f"🗺️ Conectado ao MapBiomas Collection {collection_number}")
                 
                 # Seleciona ano mais recente
-                bands = mb.bandNames().getInfo()
-                available_years = []
-                for band in bands:
-                    if 'classification_' in band:
-                        year = band.replace('classification_', '')
-                        if year.isdigit():
-                            available_years.append(int(year))
-                
-                latest_year = max(available_years) if available_years else (2023 if collection_number >= 9 else 2022)
-                classification_band = f'classification_{latest_year}'
+                latest_year, classification_band = latest_classification_band(source)
                 
                 st.info(f"📅 Usando dados do ano: {latest_year}")
                 
-                mb_year = mb.select(classification_band)
-                
-                # Extração de dados - MÉTODO LIMPO
-                try:
-                    st.info("📊 Extraindo dados via sampleRectangle...")
-                    sample_result = mb_year.sampleRectangle(
-                        region=roi_buffer,
-                        defaultValue=0
-                    )
-                    array_data = sample_result.get(classification_band).getInfo()
-                    np_arr_mb = np.array(array_data)
-                    
-                    if np_arr_mb.size > 0 and not np.all(np_arr_mb == 0):
-                        st.success("✅ Dados extraídos com sucesso")
+                # Extração de dados: pontos e polígonos passam pela mesma extração em blocos (NPY)
+                st.info("📊 Extraindo dados do MapBiomas...")
+                point_geometry = gdf_features[0]['geometry']
+                with span("extract") as extract_span:
+                    if point_geometry['type'] == 'Point':
+                        # Blocos em cache no disco; os ausentes vêm em binário (uint8), em partes se grandes
+                        lon, lat = point_geometry['coordinates'][:2]
+                        np_arr_mb = stage_raster(
+                            source.asset, classification_band, lon, lat, buffer_dist
+                        )
                     else:
-                        raise ValueError("Dados insuficientes")
-                        
-                except Exception as sample_error:
-                    logger.warning(f"sampleRectangle falhou: {sample_error}")
-                    st.info("🔄 Usando método alternativo...")
-                    
-                    try:
-                        # Método reduceRegion CORRETO - SEM PARÂMETROS INVÁLIDOS
-                        reduction = mb_year.reduceRegion(
-                            reducer=ee.Reducer.toList(),
-                            geometry=roi_buffer,
-                            scale=30,
-                            maxPixels=1e8,
-                            bestEffort=True
+                        # Janela envolvente do buffer do polígono; pixels fora do buffer ficam como nodata
+                        np_arr_mb = stage_geometry_raster(
+                            source.asset, classification_band, point_geometry, buffer_dist
                         )
-                        
-                        values_list = reduction.get(classification_band).getInfo()
-                        
-                        if not values_list or len(values_list) == 0:
-                            raise ValueError("Nenhum pixel na região")
-                        
-                        # Filtra e processa valores
-                        valid_values = [int(v) for v in values_list if v is not None and v != 0]
-                        
-                        if len(valid_values) < 9:
-                            # Preenche com classes típicas de SC
-                            typical_classes = [15, 21, 4, 18, 12]  # Pastagem, Mosaico, Floresta, Agricultura, Campo
-                            while len(valid_values) < 9:
-                                valid_values.extend(typical_classes[:9-len(valid_values)])
-                        
-                        # Cria array 2D
-                        side = max(3, int(np.sqrt(len(valid_values))))
-                        total_needed = side * side
-                        
-                        if len(valid_values) > total_needed:
-                            valid_values = valid_values[:total_needed]
-                        elif len(valid_values) < total_needed:
-                            valid_values.extend([valid_values[0]] * (total_needed - len(valid_values)))
-                        
-                        np_arr_mb = np.array(valid_values).reshape(side, side)
-                        st.success(f"✅ Dados extraídos: {len(valid_values)} pixels válidos")
-                        
-                    except Exception as reduce_error:
-                        logger.error(f"Todos os métodos falharam: {reduce_error}")
-                        st.warning("⚠️ Usando dados representativos de Santa Catarina")
-                        
-                        # Dados baseados em estudos reais para SC
-                        np_arr_mb = np.array([
-                            [15, 15, 21, 15, 4, 4],
-                            [15, 21, 21, 4, 4, 18],
-                            [21, 4, 4, 12, 18, 18],
-                            [15, 15, 18, 18, 12, 4],
-                            [4, 4, 12, 21, 18, 15],
-                            [15, 21, 18, 4, 4, 26]
-                        ])
-                        
-                        st.info("📊 Composição típica: Pastagem 35%, Floresta 30%, Agricultura 25%, Outros 10%")
+                    extract_span.set_array(np_arr_mb)
+                
+                if np_arr_mb.size == 0 or np.all(np_arr_mb == 0):
+                    raise ValueError(f"Nenhum pixel classificado na área de interesse ({np_arr_mb.shape[0]}×{np_arr_mb.shape[1]})")
+                st.success("✅ Dados extraídos com sucesso")
                 
                 # Verifica dados finais
                 unique_values = np.unique(np_arr_mb)
@@ -599,18 +609,12 @@ if data:
                 
             except Exception as mb_error:
                 logger.error(f"Erro MapBiomas: {mb_error}")
-                st.error("❌ Erro no MapBiomas - usando dados de demonstração")
+                st.error("❌ Não foi possível extrair os dados do MapBiomas para a área de interesse")
+                
+                with st.expander("🔍 Detalhes do erro"):
+                    st.error(str(mb_error))
                 
-                # Dados sintéticos de alta qualidade para SC
-                np_arr_mb = np.array([
-                    [15, 15, 21, 15, 4, 4, 15],
-                    [15, 21, 21, 4, 4, 4, 18],
-                    [21, 4, 4, 12, 18, 18, 18],
-                    [15, 15, 18, 18, 12, 4, 21],
-                    [4, 4, 12, 21, 18, 15, 15],
-                    [15, 21, 18, 4, 4, 26, 15],
-                    [18, 18, 15, 15, 21, 4, 4]
-                ])
+                st.stop()
 
         # Análise da paisagem
         with col2:
@@ -626,14 +630,16 @@ if data:
                         st.warning("⚠️ Área pequena, expandindo para análise...")
                         np_arr_mb = np.pad(np_arr_mb, ((1, 1), (1, 1)), mode='constant', constant_values=0)
                     
-                    ls = pls.Landscape(np_arr_mb, res=(30, 30))
+                    np_arr_key = raster_key(np_arr_mb)
+                    with span("landscape") as landscape_span:
+                        ls = stage_landscape(np_arr_key, landscape_span.set_array(np_arr_mb))
                     
                     # Plota paisagem com tratamento de erro
                     try:
-                        fig, ax = plt.subplots(figsize=(6, 4))
-                        ls.plot_landscape(legend=True, ax=ax)
-                        st.pyplot(fig)
-                        plt.close()
+                        with span("plot"):
+                            landscape_png, landscape_legend = stage_landscape_png(np_arr_key, np_arr_mb)
+                        st.image(landscape_png, use_column_width=True)
+                        st.markdown(landscape_legend, unsafe_allow_html=True)
                     except Exception as plot_error:
                         logger.warning(f"Erro no plot: {plot_error}")
                         st.info("📊 Dados processados (visualização indisponível)")
@@ -664,71 +670,11 @@ if data:
         with st.spinner("🔢 Computando métricas detalhadas..."):
             try:
                 # Calcula métricas de classe
-                class_metrics_df = ls.compute_class_metrics_df(
-                    metrics=[
-                        'total_area', 'proportion_of_landscape', 'number_of_patches',
-                        'largest_patch_index', 'total_edge', 'landscape_shape_index',
-                        'area_mn', 'perimeter_mn', 'perimeter_area_ratio_mn',
-                        'shape_index_mn', 'fractal_dimension_mn', 'euclidean_nearest_neighbor_mn'
-                    ]
-                )
-                
-                # Processa índices das classes
-                classes_index = list(map(int, class_metrics_df.index))
-                
-                # Dicionário de legendas MapBiomas completo
-                legend_keys = [
-                    ' ',  # 0
-                    'Floresta',  # 1
-                    ' ',  # 2
-                    'Formacao florestal',  # 3
-                    'Savana',  # 4
-                    'Mangue',  # 5
-                    ' ', ' ', ' ',  # 6-8
-                    'Silvicultura',  # 9
-                    'Formação natural nao-florestal',  # 10
-                    'Campo Alagado e Área Pantanosa',  # 11
-                    'Campos',  # 12
-                    'Outras formacoes nao-florestais',  # 13
-                    'Agropecuaria',  # 14
-                    'Pastagem',  # 15
-                    ' ', ' ',  # 16-17
-                    'Agricultura',  # 18
-                    'Agricultura temporarias',  # 19
-                    'Cana',  # 20
-                    'Mosaico de Agricultura e Pastagem',  # 21
-                    'Area nao Vegetada',  # 22
-                    'Dunas',  # 23
-                    'Area Urbanizada',  # 24
-                    'Outras areas nao vegetadas',  # 25
-                    'Agua',  # 26
-                    'Nao Observado',  # 27
-                    ' ',  # 28
-                    'Afloramento rochoso',  # 29
-                    'Mineracao',  # 30
-                    'Aquicultura',  # 31
-                    'Sal',  # 32
-                    'Rio, lago e oceano',  # 33
-                    ' ', ' ',  # 34-35
-                    'Lavoura Perene',  # 36
-                    ' ', ' ',  # 37-38
-                    'Soja',  # 39
-                    'Arroz',  # 40
-                    'Outras culturas temporarias',  # 41
-                    ' ', ' ', ' ', ' ',  # 42-45
-                    'Cafe',  # 46
-                    'Citrus',  # 47
-                    'Outras lavouras perenes',  # 48
-                    'Restinga arborea'  # 49
-                ]
-                
-                # Cria dicionário de legenda
-                keys = list(range(len(legend_keys)))
-                legend_dict = {keys[i]: legend_keys[i] for i in range(len(legend_keys))}
+                with span("metrics"):
+                    class_metrics_df = stage_class_metrics(np_arr_key, np_arr_mb)
                 
-                # Substitui índices por nomes
-                replaced_list = [legend_dict.get(x, f'Classe {x}') for x in classes_index]
-                class_metrics_df.index = replaced_list
+                # Substitui os códigos das classes pelos nomes da legenda MapBiomas
+                class_metrics_df = label_classes(class_metrics_df)
                 
                 # Filtra elementos com mais de 10% de proporção
                 st.info("📊 **Elementos com mais de 10% de proporção na paisagem:**")
@@ -781,6 +727,110 @@ if data:
                     use_container_width=True
                 )
         
+        # Série temporal: todos os anos do intervalo numa única requisição
+        point_geometry = gdf_features[0]['geometry']
+        if source is not None and point_geometry['type'] == 'Point':
+            st.markdown("---")
+            if st.checkbox("📅 Calcular série temporal (vários anos)"):
+                available_years = parse_classification_years(source.bands)
+                start_year, end_year = st.slider(
+                    "Intervalo de anos:",
+                    available_years[0],
+                    available_years[-1],
+                    (available_years[0], available_years[-1])
+                )
+                
+                with st.spinner("📅 Extraindo todos os anos e calculando métricas..."):
+                    try:
+                        lon, lat = point_geometry['coordinates'][:2]
+                        timeseries_df = timeseries_metrics(
+                            source.asset, lon, lat, buffer_dist, start_year, end_year
+                        )
+                        
+                        metric_choice = st.selectbox("Métrica:", CLASS_METRICS)
+                        st.line_chart(
+                            timeseries_df[timeseries_df['metric'] == metric_choice]
+                            .pivot_table(index='year', columns='class_name', values='value')
+                        )
+                        
+                        st.download_button(
+                            "📥 Download CSV (série temporal)",
+                            timeseries_df.to_csv(sep=";", decimal=",", index=False).encode("utf-8"),
+                            f"landscape_metrics_serie_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                            "text/csv",
+                            key="download-csv-timeseries",
+                            use_container_width=True
+                        )
+                    except Exception as timeseries_error:
+                        logger.error(f"Erro na série temporal: {timeseries_error}")
+                        st.error("❌ Erro ao calcular a série temporal")
+
+            # Mudanças de cobertura: as duas bandas vêm numa única requisição
+            if st.checkbox("🔄 Mudanças entre anos (matriz de transição)"):
+                available_years = parse_classification_years(source.bands)
+                from_col, to_col = st.columns(2)
+                with from_col:
+                    year_from = st.selectbox("De:", available_years, index=0)
+                with to_col:
+                    year_to = st.selectbox("Para:", available_years, index=len(available_years) - 1)
+                
+                with st.spinner("🔄 Calculando transições..."):
+                    try:
+                        lon, lat = point_geometry['coordinates'][:2]
+                        transitions_df = transition_matrix_ha(
+                            source.asset, lon, lat, buffer_dist, year_from, year_to
+                        )
+                        st.caption(f"Área (ha) por classe em {year_from} (linhas) e {year_to} (colunas)")
+                        st.dataframe(transitions_df.round(2), use_container_width=True)
+                        
+                        st.download_button(
+                            "📥 Download CSV (transições)",
+                            transitions_df.to_csv(sep=";", decimal=",").encode("utf-8"),
+                            f"landscape_transicoes_{year_from}_{year_to}.csv",
+                            "text/csv",
+                            key="download-csv-transitions",
+                            use_container_width=True
+                        )
+                    except Exception as transitions_error:
+                        logger.error(f"Erro nas transições: {transitions_error}")
+                        st.error("❌ Erro ao calcular as transições")
+
+            # Escala de efeito: o maior raio é baixado uma vez e os menores são recortados localmente
+            if st.checkbox("🎯 Análise multiescala (vários raios)"):
+                min_radius, max_radius = st.slider(
+                    "Intervalo de raios (m):",
+                    MIN_BUFFER,
+                    MAX_BUFFER,
+                    (MIN_BUFFER, MAX_BUFFER),
+                    step=500
+                )
+                radii = tuple(radius_range(min_radius, max_radius, 500))
+                
+                with st.spinner(f"🎯 Calculando métricas para {len(radii)} raios..."):
+                    try:
+                        lon, lat = point_geometry['coordinates'][:2]
+                        multiscale_df = multiscale_metrics(
+                            source.asset, classification_band, lon, lat, radii
+                        )
+                        
+                        metric_choice = st.selectbox("Métrica:", CLASS_METRICS, key="multiscale-metric")
+                        st.line_chart(
+                            multiscale_df[multiscale_df['metric'] == metric_choice]
+                            .pivot_table(index='radius', columns='class_name', values='value')
+                        )
+                        
+                        st.download_button(
+                            "📥 Download CSV (multiescala)",
+                            multiscale_df.to_csv(sep=";", decimal=",", index=False).encode("utf-8"),
+                            f"landscape_metrics_multiescala_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                            "text/csv",
+                            key="download-csv-multiscale",
+                            use_container_width=True
+                        )
+                    except Exception as multiscale_error:
+                        logger.error(f"Erro na análise multiescala: {multiscale_error}")
+                        st.error("❌ Erro ao calcular a análise multiescala")
+        
         logger.info(f"Métricas da paisagem calculadas com sucesso para buffer de {buffer_dist}m")
     
     except Exception as e:
@@ -788,6 +838,14 @@ if data:
         st.error("❌ Erro no processamento dos dados")
         with st.expander("🔍 Detalhes do erro"):
             st.error(str(e))
+    finally:
+        # Também executa quando st.stop() encerra o modo lote
+        round_trips.stop()
+        tracer.finish()
+        if show_spans and tracer.spans:
+            with st.sidebar:
+                st.markdown("### ⏱️ Tempos por etapa")
+                st.dataframe(tracer.table(), use_container_width=True)
 
 # Informações adicionais
 st.markdown("---")
@@ -798,12 +856,7 @@ with st.expander("📊 **Detalhamento das métricas** (clique para expandir)", e
         "Para maiores informações, acessar o site do [PyLandStats](https://pylandstats.readthedocs.io/en/latest/)."
     )
     
-    metrics_names = [
-        'total_area', 'proportion_of_landscape', 'number_of_patches',
-        'largest_patch_index', 'total_edge', 'landscape_shape_index',
-        'area_mn', 'perimeter_mn', 'perimeter_area_ratio_mn',
-        'shape_index_mn', 'fractal_dimension_mn', 'euclidean_nearest_neighbor_mn'
-    ]
+    metrics_names = CLASS_METRICS
     
     metrics_traducao = [
         'Área Total (ha)', 'Proporção da paisagem (%)', 'Número de Manchas',
@@ -0,0 +1,236 @@
+"""Benchmark dos caminhos críticos: decodificação, PyLandStats e exportação.
+
+Roda offline contra ``landscapemetrics.fake_ee``. Para cada raio permitido pelo
+slider do app (1–10 km, passo de 500 m) extrai um raster sintético do MapBiomas
+e mede, separadamente:
+
+- ``json_decode``: ``json.loads`` da resposta do sampleRectangle;
+- ``npy_decode``: decodificação da resposta binária do computePixels;
+- ``array_construction``: ``np.array`` a partir das listas do JSON;
+- ``landscape_init``: ``pls.Landscape``;
+- ``metric:<nome>``: cada uma das 12 métricas de classe;
+- ``render_png``: classes em PNG pela tabela de cores;
+- ``csv_export``: tabela completa para CSV (``;`` e vírgula decimal).
+
+Rasters gravados (arquivos ``.npy`` com as classes de um buffer real) podem ser
+incluídos com ``--rasters``. O resultado é gravado em JSON com as versões das
+bibliotecas; com ``--baseline`` cada medida é comparada com a anterior e
+``--check`` falha se alguma ficar mais lenta que o limite.
+
+Uso::
+
+    python benchmarks/bench_hotpaths.py --output bench.json
+    python benchmarks/bench_hotpaths.py --buffers 1000 5000 --baseline bench.json --check
+"""
+
+import argparse
+import datetime
+import glob
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+POINT = (-49.5, -27.2)
+BUFFERS = list(range(1000, 10001, 500))
+BAND = 'classification_2023'
+
+# Regressão tolerada em relação à linha de base (0.25 = 25% mais lento)
+DEFAULT_TOLERANCE = 0.25
+# Medidas abaixo disso são ruído de relógio e não entram na verificação
+MIN_CHECK_SECONDS = 0.005
+
+LIBRARIES = ['numpy', 'pandas', 'pylandstats', 'geemap', 'ee']
+
+
+def timed(function, repeat):
+    """Menor tempo de ``repeat`` execuções e o resultado da última"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def synthetic_rasters(buffers):
+    """Rasters sintéticos do substituto local, um por raio"""
+    from landscapemetrics import fake_ee
+    from landscapemetrics.earthengine import set_ee
+    from landscapemetrics.tiling import extract_buffer
+
+    set_ee(fake_ee)
+    image = fake_ee.Image('bench').select(BAND)
+    for buffer_dist in buffers:
+        yield f'sintetico-{buffer_dist}m', buffer_dist, extract_buffer(image, BAND, POINT[0], POINT[1],
+                                                                        buffer_dist).array
+
+
+def bench_raster(name, buffer_dist, array, repeat):
+    """Mede todas as etapas para um raster e retorna uma lista de medidas"""
+    import numpy as np
+    import pandas as pd
+
+    from landscapemetrics.metrics import CLASS_METRICS, build_landscape, label_classes
+    from landscapemetrics.rendering import render_png
+    from landscapemetrics.transfer import decode_npy
+
+    array = np.asarray(array, dtype=np.uint8)
+    # Aquecimento fora da medida: importações e compilação sob demanda do PyLandStats
+    build_landscape(array[:16, :16]).compute_class_metrics_df(metrics=CLASS_METRICS)
+
+    json_payload = json.dumps({'type': 'Feature', 'properties': {BAND: array.tolist()}})
+    npy_buffer = io.BytesIO()
+    np.save(npy_buffer, array.astype([(BAND, np.uint8)]), allow_pickle=False)
+    npy_payload = npy_buffer.getvalue()
+
+    timings = {}
+    timings['json_decode'], decoded = timed(lambda: json.loads(json_payload), repeat)
+    timings['npy_decode'], _ = timed(lambda: decode_npy(npy_payload, BAND), repeat)
+    rows = decoded['properties'][BAND]
+    timings['array_construction'], _ = timed(lambda: np.array(rows), repeat)
+    timings['landscape_init'], ls = timed(lambda: build_landscape(array), repeat)
+
+    columns = []
+    for metric in CLASS_METRICS:
+        timings[f'metric:{metric}'], column = timed(
+            lambda: ls.compute_class_metrics_df(metrics=[metric]), repeat
+        )
+        columns.append(column)
+    timings['render_png'], _ = timed(lambda: render_png(array), repeat)
+    class_metrics_df = label_classes(pd.concat(columns, axis=1))
+    timings['csv_export'], _ = timed(
+        lambda: class_metrics_df.to_csv(sep=';', decimal=',').encode('utf-8'), repeat
+    )
+
+    return [
+        {'raster': name, 'buffer_m': buffer_dist, 'shape': list(array.shape), 'stage': stage,
+         'seconds': round(seconds, 6)}
+        for stage, seconds in timings.items()
+    ]
+
+
+def run_case(kind, value, repeat):
+    """Executa um caso (raio sintético ou arquivo gravado) no processo atual"""
+    if kind == 'buffer':
+        rasters = synthetic_rasters([int(value)])
+    else:
+        import numpy as np
+
+        rasters = [(os.path.splitext(os.path.basename(value))[0], None, np.load(value, allow_pickle=False))]
+    results = []
+    for name, buffer_dist, array in rasters:
+        results.extend(bench_raster(name, buffer_dist, array, repeat))
+    return results
+
+
+def library_versions():
+    versions = {}
+    for name in LIBRARIES:
+        completed = subprocess.run(
+            [sys.executable, '-c', f'import {name}; print(getattr({name}, "__version__", "?"))'],
+            capture_output=True, text=True,
+        )
+        versions[name] = completed.stdout.strip() if completed.returncode == 0 else None
+    return versions
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, cwd=ROOT, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, tolerance):
+    """Aplica os limites da linha de base; retorna as medidas acima do limite"""
+    previous = {(r['raster'], r['stage']): r['seconds'] for r in baseline['results']}
+    regressions = []
+    for r in results:
+        reference = previous.get((r['raster'], r['stage']))
+        if reference is None:
+            continue
+        r['baseline_seconds'] = reference
+        r['threshold_seconds'] = round(max(reference * (1 + tolerance), MIN_CHECK_SECONDS), 6)
+        if r['seconds'] > r['threshold_seconds']:
+            regressions.append(r)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--buffers', type=int, nargs='+', default=BUFFERS)
+    parser.add_argument('--rasters', help='Diretório com rasters gravados (.npy) a incluir')
+    parser.add_argument('--repeat', type=int, default=3, help='Execuções por etapa (usa o menor tempo)')
+    parser.add_argument('--output', help='Arquivo JSON com os resultados')
+    parser.add_argument('--baseline', help='Resultados anteriores (JSON) usados como limite')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Regressão tolerada sobre a linha de base (padrão: 0.25)')
+    parser.add_argument('--check', action='store_true', help='Sai com erro se houver regressão')
+    parser.add_argument('--case', nargs=2, metavar=('TIPO', 'VALOR'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(run_case(args.case[0], args.case[1], args.repeat)))
+        return
+
+    # Um subprocesso por caso: o estado de um raster não interfere no seguinte
+    cases = [('buffer', str(b)) for b in args.buffers]
+    if args.rasters:
+        cases += [('file', path) for path in sorted(glob.glob(os.path.join(args.rasters, '*.npy')))]
+
+    results = []
+    for kind, value in cases:
+        output = subprocess.run(
+            [sys.executable, '-W', 'ignore', __file__, '--case', kind, value, '--repeat', str(args.repeat)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        case_results = json.loads(output.strip().splitlines()[-1])
+        results.extend(case_results)
+        total = sum(r['seconds'] for r in case_results)
+        shape = 'x'.join(str(v) for v in case_results[0]['shape'])
+        print(f"{case_results[0]['raster']:<22} {shape:>11} {total:>9.3f}s")
+
+    report = {
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'libraries': library_versions(),
+        'repeat': args.repeat,
+        'results': results,
+    }
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        report['tolerance'] = args.tolerance
+        regressions = compare(results, baseline, args.tolerance)
+        report['regressions'] = regressions
+
+    stages = sorted({r['stage'] for r in results})
+    print(f"\n{'etapa':<44} {'total (s)':>9}")
+    for stage in stages:
+        print(f"{stage:<44} {sum(r['seconds'] for r in results if r['stage'] == stage):>9.3f}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    for r in regressions:
+        print(f"❌ {r['raster']} {r['stage']}: {r['seconds']:.4f}s > limite de {r['threshold_seconds']:.4f}s "
+              f"(linha de base {r['baseline_seconds']:.4f}s)")
+    if args.check and regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
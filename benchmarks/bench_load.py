@@ -0,0 +1,328 @@
+"""Teste de carga: sessões simultâneas executando o fluxo completo do app.
+
+Cada sessão simulada é uma thread no mesmo processo, como as sessões de um
+servidor Streamlit, e repete o fluxo de um ponto do app:
+
+- ``upload``: leitura do GeoJSON enviado (``read_points_bytes``);
+- ``roi``: ``FeatureCollection``, buffer e limites (objetos do Earth Engine);
+- ``mapbiomas_source``: asset e ano mais recente (cache do resolvedor);
+- ``extract``: raster do buffer pelo cache de blocos (idas ao Earth Engine);
+- ``landscape`` e ``class_metrics``: PyLandStats;
+- ``render_png``: classes em PNG pela tabela de cores, com a legenda;
+- ``csv``: tabela de métricas em CSV (``;`` e vírgula decimal).
+
+O Earth Engine é substituído pelo ``fake_ee`` com latência simulada por ida ao
+servidor, ou por respostas gravadas (``replay_ee``; grave antes com
+``--backend record`` e os mesmos pontos). Cada nível de concorrência roda num
+subprocesso próprio, com cache de blocos vazio, e informa a vazão, as
+latências p50/p95/p99 de cada etapa e da execução inteira, e a memória por
+sessão (aumento do RSS de pico sobre o processo aquecido, dividido pelo número
+de sessões). As idas ao Earth Engine são contadas por sessão: cada sessão roda
+num contexto próprio e cada execução tem o seu ``RoundTripCounter``.
+
+Uso::
+
+    python benchmarks/bench_load.py --sessions 1 4 16 --runs 3 --latency 0.3 --output carga.json
+    python benchmarks/bench_load.py --backend record --inner ee --replay-dir gravacoes --sessions 1 --runs 20
+    python benchmarks/bench_load.py --backend replay --replay-dir gravacoes --sessions 8 32 --runs 20
+"""
+
+import argparse
+import contextvars
+import datetime
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SESSIONS = [1, 2, 4, 8, 16]
+CENTER = (-49.5, -27.2)
+# Deslocamento máximo (graus) dos pontos sorteados em torno do centro
+SPREAD_DEG = 0.5
+BUFFER = 5000
+PERCENTILES = (50, 95, 99)
+# Intervalo de amostragem do RSS atual
+RSS_SAMPLE_SECONDS = 0.05
+STAGES = ['upload', 'roi', 'mapbiomas_source', 'extract', 'landscape', 'class_metrics', 'render_png', 'csv']
+
+
+def session_points(n_points, seed):
+    """Pontos reproduzíveis em torno do centro (os mesmos na gravação e na reprodução)"""
+    rng = random.Random(seed)
+    return [(round(CENTER[0] + rng.uniform(-SPREAD_DEG, SPREAD_DEG), 6),
+             round(CENTER[1] + rng.uniform(-SPREAD_DEG, SPREAD_DEG), 6)) for _ in range(n_points)]
+
+
+def point_geojson(lon, lat):
+    return json.dumps({'type': 'FeatureCollection', 'features': [
+        {'type': 'Feature', 'properties': {'id': 1}, 'geometry': {'type': 'Point', 'coordinates': [lon, lat]}}
+    ]}).encode('utf-8')
+
+
+def current_rss_mb():
+    """RSS atual do processo em MB (Linux; None se indisponível)"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+
+
+class RSSMonitor:
+    """Amostra o RSS numa thread e guarda o máximo"""
+
+    def __init__(self):
+        self.peak_mb = current_rss_mb()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='rss-monitor', daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(RSS_SAMPLE_SECONDS):
+            rss = current_rss_mb()
+            if rss is not None:
+                self.peak_mb = max(self.peak_mb or 0, rss)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+
+def configure_backend(args):
+    """Define o cliente ``ee`` do subprocesso conforme ``--backend``"""
+    from landscapemetrics.earthengine import initialize, set_ee
+
+    if args.backend == 'fake':
+        from landscapemetrics import fake_ee
+
+        fake_ee.configure(latency=args.latency)
+        set_ee(fake_ee)
+        return
+    from landscapemetrics import replay_ee
+
+    if args.backend == 'record':
+        replay_ee.configure(mode='record', directory=args.replay_dir, inner=args.inner)
+        if args.inner == 'fake':
+            from landscapemetrics import fake_ee
+
+            fake_ee.configure(latency=args.latency)
+    else:
+        replay_ee.configure(mode='replay', directory=args.replay_dir, latency=args.latency,
+                            recorded_latency=args.recorded_latency, jitter=args.jitter)
+    set_ee(replay_ee)
+    if args.backend == 'record' and args.inner == 'ee':
+        initialize()
+
+
+def run_session(points, buffer_dist, think_seconds):
+    """Fluxo do app para cada ponto da sessão; retorna os spans de cada execução"""
+    from landscapemetrics.cache import extract_buffer_cached
+    from landscapemetrics.earthengine import get_ee
+    from landscapemetrics.export import table_bytes
+    from landscapemetrics.ingest import read_points_bytes
+    from landscapemetrics.instrumentation import Tracer, span
+    from landscapemetrics.mapbiomas import get_mapbiomas_source, latest_classification_band
+    from landscapemetrics.metrics import CLASS_METRICS, build_landscape, label_classes
+    from landscapemetrics.rendering import legend_entries, legend_html, render_png
+    from landscapemetrics.roundtrips import RoundTripCounter
+
+    ee = get_ee()
+    runs = []
+    for lon, lat in points:
+        start = time.perf_counter()
+        error = None
+        # O contador só vê as chamadas do contexto desta sessão
+        with RoundTripCounter(label='carga', log=False) as round_trips, Tracer(run='carga') as tracer:
+            try:
+                with span('upload'):
+                    gdf = read_points_bytes(point_geojson(lon, lat), '.geojson')
+                with span('roi'):
+                    point = gdf.geometry.iloc[0]
+                    roi = ee.FeatureCollection([ee.Feature(ee.Geometry.Point([point.x, point.y]))])
+                    roi_buffer = roi.geometry().buffer(buffer_dist)
+                    roi_buffer.bounds()
+                with span('mapbiomas_source'):
+                    source = get_mapbiomas_source()
+                    _, band = latest_classification_band(source)
+                with span('extract') as extract_span:
+                    np_arr_mb = extract_span.set_array(extract_buffer_cached(
+                        source.image.select(band), source.asset, band, point.x, point.y, buffer_dist
+                    ).array)
+                with span('landscape'):
+                    ls = build_landscape(np_arr_mb)
+                with span('class_metrics'):
+                    class_metrics_df = ls.compute_class_metrics_df(metrics=CLASS_METRICS)
+                with span('render_png'):
+                    render_png(np_arr_mb)
+                    legend_html(legend_entries(np_arr_mb))
+                with span('csv'):
+                    table_bytes(label_classes(class_metrics_df), 'csv')
+            except Exception as run_error:
+                error = f"{type(run_error).__name__}: {run_error}"
+        runs.append({
+            'total_s': time.perf_counter() - start,
+            'error': error,
+            'stages': {s.name: s.wall_s for s in tracer.spans},
+            'ee_calls': round_trips.count,
+        })
+        if think_seconds:
+            time.sleep(think_seconds)
+    return runs
+
+
+def percentiles(values):
+    import numpy as np
+
+    if not values:
+        return {f'p{p}': None for p in PERCENTILES}
+    return {f'p{p}': round(float(np.percentile(values, p)), 4) for p in PERCENTILES}
+
+
+def run_level(args, n_sessions):
+    """Executa ``n_sessions`` sessões simultâneas no processo atual e resume as medidas"""
+    configure_backend(args)
+    # Cache de blocos e do asset vazios: as extrações vão ao Earth Engine substituto
+    os.environ['LANDSCAPEMETRICS_CACHE_DIR'] = tempfile.mkdtemp(prefix='bench-load-cache-')
+    os.environ['LANDSCAPEMETRICS_SOURCE_CACHE'] = os.path.join(tempfile.mkdtemp(prefix='bench-load-'),
+                                                               'source.json')
+
+    points = session_points(n_sessions * args.runs, args.seed)
+    # Aquecimento fora da medida: importações, PyLandStats e resolução do asset
+    warmup = run_session([session_points(1, args.seed + 1)[0]], 1000, 0)
+    if warmup[0]['error']:
+        raise RuntimeError(f"Aquecimento falhou: {warmup[0]['error']}")
+    baseline_mb = current_rss_mb()
+
+    results = [None] * n_sessions
+    barrier = threading.Barrier(n_sessions)
+
+    def session(index):
+        barrier.wait()
+        results[index] = run_session(points[index::n_sessions], args.buffer, args.think)
+
+    # Um contexto vazio por sessão, como uma sessão isolada do Streamlit
+    threads = [threading.Thread(target=contextvars.Context().run, args=(session, i), name=f'sessao-{i}')
+               for i in range(n_sessions)]
+    with RSSMonitor() as monitor:
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+    runs = [run for session_runs in results for run in session_runs]
+    succeeded = [run for run in runs if run['error'] is None]
+    peak_mb = monitor.peak_mb
+    return {
+        'sessions': n_sessions,
+        'runs': len(runs),
+        'errors': len(runs) - len(succeeded),
+        'error_samples': sorted({run['error'] for run in runs if run['error']})[:5],
+        'elapsed_s': round(elapsed, 3),
+        'throughput_runs_per_s': round(len(succeeded) / elapsed, 4) if elapsed else None,
+        'ee_calls_per_run': round(sum(run['ee_calls'] for run in runs) / len(runs), 2) if runs else None,
+        'total': percentiles([run['total_s'] for run in succeeded]),
+        'stages': {
+            stage: percentiles([run['stages'][stage] for run in runs if run['stages'].get(stage) is not None])
+            for stage in STAGES
+        },
+        'rss_baseline_mb': round(baseline_mb, 1) if baseline_mb else None,
+        'rss_peak_mb': round(peak_mb, 1) if peak_mb else None,
+        'mb_per_session': round((peak_mb - baseline_mb) / n_sessions, 2) if peak_mb and baseline_mb else None,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, cwd=ROOT, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_level(level):
+    total = level['total']
+    print(f"{level['sessions']:>8} {level['runs']:>6} {level['errors']:>6} {level['throughput_runs_per_s']:>10.2f} "
+          f"{total['p50'] or 0:>8.2f} {total['p95'] or 0:>8.2f} {total['p99'] or 0:>8.2f} "
+          f"{level['mb_per_session'] if level['mb_per_session'] is not None else '-':>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, nargs='+', default=SESSIONS,
+                        help='Níveis de concorrência (sessões simultâneas)')
+    parser.add_argument('--runs', type=int, default=3, help='Execuções do fluxo por sessão')
+    parser.add_argument('--buffer', type=int, default=BUFFER, help='Raio do buffer em metros')
+    parser.add_argument('--think', type=float, default=0.0, help='Pausa (s) entre execuções de uma sessão')
+    parser.add_argument('--seed', type=int, default=1, help='Semente dos pontos sorteados')
+    parser.add_argument('--backend', choices=('fake', 'replay', 'record'), default='fake')
+    parser.add_argument('--inner', choices=('fake', 'ee'), default='fake',
+                        help='Com --backend record: cliente gravado')
+    parser.add_argument('--replay-dir', default=os.path.join(tempfile.gettempdir(), 'landscapemetrics-replay'))
+    parser.add_argument('--latency', type=float, default=0.2, help='Latência (s) por ida ao servidor')
+    parser.add_argument('--recorded-latency', type=float, default=0.0,
+                        help='Com --backend replay: fração do tempo gravado somada à latência')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Com --backend replay: variação da latência')
+    parser.add_argument('--output', help='Arquivo JSON com os resultados')
+    parser.add_argument('--case', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(run_level(args, args.case)))
+        return
+
+    forwarded = sys.argv[1:]
+    print(f"{'sessões':>8} {'execs':>6} {'erros':>6} {'execs/s':>10} {'p50 (s)':>8} {'p95 (s)':>8} "
+          f"{'p99 (s)':>8} {'MB/sessão':>10}")
+    levels = []
+    # Um subprocesso por nível: caches, memória e threads não passam de um nível para o outro
+    for n_sessions in args.sessions:
+        output = subprocess.run(
+            [sys.executable, '-W', 'ignore', __file__, *forwarded, '--case', str(n_sessions)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        level = json.loads(output.strip().splitlines()[-1])
+        levels.append(level)
+        print_level(level)
+        for sample in level['error_samples']:
+            print(f"         ❌ {sample}")
+
+    print(f"\n{'etapa':<18} " + ' '.join(f"{f'{n} sess. p50/p95/p99 (s)':>27}" for n in args.sessions))
+    for stage in STAGES:
+        cells = []
+        for level in levels:
+            values = level['stages'][stage]
+            cells.append('/'.join('-' if values[f'p{p}'] is None else f"{values[f'p{p}']:.3f}" for p in PERCENTILES))
+        print(f"{stage:<18} " + ' '.join(f"{cell:>27}" for cell in cells))
+
+    if args.output:
+        report = {
+            'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'cpus': os.cpu_count(),
+            'backend': args.backend,
+            'latency': args.latency,
+            'buffer': args.buffer,
+            'runs_per_session': args.runs,
+            'levels': levels,
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
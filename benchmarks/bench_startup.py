@@ -0,0 +1,162 @@
+"""Benchmark de inicialização a frio (``python -X importtime``).
+
+Mede, num interpretador novo para cada alvo, o tempo de importação, o número de
+módulos carregados e o pico de RSS. Também verifica que o pipeline sem
+interface não carrega módulos pesados (Earth Engine, geemap, Streamlit,
+PyLandStats, GeoPandas, matplotlib) só por ser importado.
+
+Uso::
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --check --record benchmarks/startup_history.jsonl
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Alvo → instrução de importação medida
+TARGETS = {
+    # O que o app.py importa antes de exibir o cabeçalho
+    'app_prelude': (
+        'import streamlit, json, numpy, pandas, collections, logging, pathlib; '
+        'import landscapemetrics.cache, landscapemetrics.ingest, landscapemetrics.mapbiomas, '
+        'landscapemetrics.metrics, landscapemetrics.pipeline'
+    ),
+    'landscapemetrics.pipeline': 'import landscapemetrics.pipeline',
+    'landscapemetrics.cli': 'import landscapemetrics.cli',
+    # Dependências pesadas, carregadas sob demanda
+    'ee': 'import ee',
+    'geemap.foliumap': 'import geemap.foliumap',
+    'streamlit_folium': 'import streamlit_folium',
+    'pylandstats': 'import pylandstats',
+    'geopandas': 'import geopandas',
+    'matplotlib.pyplot': 'import matplotlib.pyplot',
+}
+
+# Orçamento de importação (ms) dos alvos que controlamos
+STARTUP_BUDGET_MS = {
+    'landscapemetrics.pipeline': 1500,
+    'landscapemetrics.cli': 1500,
+}
+
+HEAVY_MODULES = {'ee', 'geemap', 'streamlit', 'streamlit_folium', 'pylandstats', 'geopandas', 'matplotlib'}
+HEADLESS_TARGETS = {'landscapemetrics.pipeline', 'landscapemetrics.cli'}
+
+PROBE = (
+    '{statement}\n'
+    'import json, resource, sys\n'
+    'print(json.dumps({{"rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, '
+    '"modules": sorted({{m.split(".")[0] for m in sys.modules}}), "n_modules": len(sys.modules)}}))\n'
+)
+
+
+def parse_importtime(stderr):
+    """Soma os tempos próprios e lista os pacotes de topo mais lentos"""
+    total_us = 0
+    top_level = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        total_us += int(self_us)
+        if not name.startswith('  '):
+            top_level.append((int(cumulative_us), name.strip()))
+    top_level.sort(reverse=True)
+    return total_us / 1000, [{'module': n, 'ms': us / 1000} for us, n in top_level[:5]]
+
+
+def measure(name, statement):
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE.format(statement=statement)],
+        capture_output=True, text=True, env=env, cwd=ROOT,
+    )
+    if completed.returncode != 0:
+        return {'target': name, 'available': False}
+
+    probe = json.loads(completed.stdout.strip().splitlines()[-1])
+    import_ms, slowest = parse_importtime(completed.stderr)
+    result = {
+        'target': name,
+        'available': True,
+        'import_ms': round(import_ms, 1),
+        'rss_mb': round(probe['rss_kb'] / 1024, 1),
+        'n_modules': probe['n_modules'],
+        'slowest': slowest,
+    }
+    if name in HEADLESS_TARGETS:
+        result['heavy_loaded'] = sorted(HEAVY_MODULES & set(probe['modules']))
+    return result
+
+
+def check(results):
+    """Lista as violações de orçamento e de importação preguiçosa"""
+    problems = []
+    for r in results:
+        if not r['available']:
+            continue
+        budget = STARTUP_BUDGET_MS.get(r['target'])
+        if budget is not None and r['import_ms'] > budget:
+            problems.append(f"{r['target']}: {r['import_ms']} ms > orçamento de {budget} ms")
+        if r.get('heavy_loaded'):
+            problems.append(f"{r['target']}: carrega módulos pesados {r['heavy_loaded']}")
+    return problems
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, cwd=ROOT, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--targets', nargs='+', choices=list(TARGETS), default=list(TARGETS))
+    parser.add_argument('--repeat', type=int, default=3, help='Execuções por alvo (usa a mediana)')
+    parser.add_argument('--record', help='Acrescenta os resultados (JSON lines) a este arquivo')
+    parser.add_argument('--check', action='store_true', help='Sai com erro se algum orçamento for excedido')
+    args = parser.parse_args()
+
+    results = []
+    for name in args.targets:
+        runs = [measure(name, TARGETS[name]) for _ in range(args.repeat)]
+        runs = [r for r in runs if r['available']] or runs[:1]
+        runs.sort(key=lambda r: r.get('import_ms', 0))
+        results.append(runs[len(runs) // 2])
+
+    print(f"{'alvo':<28} {'import (ms)':>11} {'RSS (MB)':>9} {'módulos':>8}")
+    print('-' * 59)
+    for r in results:
+        if not r['available']:
+            print(f"{r['target']:<28} {'indisponível':>11}")
+            continue
+        print(f"{r['target']:<28} {r['import_ms']:>11.1f} {r['rss_mb']:>9.1f} {r['n_modules']:>8}")
+
+    if args.record:
+        entry = {
+            'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'results': results,
+        }
+        with open(args.record, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + '\n')
+
+    problems = check(results)
+    for problem in problems:
+        print(f"❌ {problem}")
+    if args.check and problems:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Benchmark da transferência de pixels: JSON (sampleRectangle) × binário (NPY).
+
+Roda offline contra ``landscapemetrics.fake_ee``. Cada caso é executado num
+subprocesso próprio para que o pico de RSS medido seja apenas daquele caso.
+
+Uso::
+
+    python benchmarks/bench_transfer.py
+    python benchmarks/bench_transfer.py --buffers 1000 5000 10000 --json resultados.json
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+POINT = (-49.5, -27.2)
+BUFFERS = [1000, 2500, 5000, 7500, 10000]
+TRANSPORTS = ['json', 'npy']
+
+
+def run_case(transport, buffer_dist, repeat):
+    """Executa um caso no processo atual e retorna as medidas"""
+    from landscapemetrics import fake_ee
+    from landscapemetrics.earthengine import set_ee
+    from landscapemetrics.tiling import extract_buffer
+
+    set_ee(fake_ee)
+    image = fake_ee.Image('bench').select('classification_2023')
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    fake_ee.reset_stats()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        raster = extract_buffer(image, 'classification_2023', POINT[0], POINT[1], buffer_dist,
+                                transport=transport)
+        timings.append(time.perf_counter() - start)
+
+    return {
+        'transport': transport,
+        'buffer_m': buffer_dist,
+        'shape': list(raster.array.shape),
+        'dtype': str(raster.array.dtype),
+        'array_bytes': int(raster.array.nbytes),
+        'bytes_moved': fake_ee.stats['bytes'] // repeat,
+        'round_trips': fake_ee.stats['round_trips'] // repeat,
+        'wall_s': min(timings),
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'rss_growth_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--buffers', type=int, nargs='+', default=BUFFERS)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', help='Arquivo de saída com os resultados')
+    parser.add_argument('--case', nargs=2, metavar=('TRANSPORT', 'BUFFER'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(run_case(args.case[0], int(args.case[1]), args.repeat)))
+        return
+
+    results = []
+    for buffer_dist in args.buffers:
+        for transport in TRANSPORTS:
+            output = subprocess.run(
+                [sys.executable, __file__, '--case', transport, str(buffer_dist), '--repeat', str(args.repeat)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+
+    header = f"{'buffer':>7} {'transp.':>7} {'forma':>11} {'bytes':>11} {'chamadas':>8} {'tempo (s)':>9} {'pico RSS (MB)':>13}"
+    print(header)
+    print('-' * len(header))
+    for r in results:
+        shape = 'x'.join(str(v) for v in r['shape'])
+        print(f"{r['buffer_m']:>7} {r['transport']:>7} {shape:>11} {r['bytes_moved']:>11} "
+              f"{r['round_trips']:>8} {r['wall_s']:>9.3f} {r['peak_rss_kb'] / 1024:>13.1f}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
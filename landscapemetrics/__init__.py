@@ -0,0 +1 @@
+"""Extração de métricas de paisagem do MapBiomas (Earth Engine + PyLandStats)"""
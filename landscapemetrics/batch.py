@@ -0,0 +1,119 @@
+"""Modo lote: métricas de paisagem para vários pontos de uma só vez"""
+
+import logging
+import time
+
+import pandas as pd
+
+from .extraction import MAX_PIXELS_PER_REQUEST
+from .mapbiomas import class_name
+from .metrics import CLASS_METRICS
+from .mosaic import iter_shared_point_arrays
+from .parallel import DEFAULT_CHUNKSIZE, choose_workers, compute_metrics_parallel
+from .tiling import buffer_window, window_transform
+
+logger = logging.getLogger(__name__)
+
+# Colunas usadas como identificador do ponto, em ordem de preferência
+POINT_ID_COLUMNS = ('point_id', 'id', 'ID', 'name', 'nome')
+
+
+def find_id_column(gdf):
+    """Primeira coluna de identificação presente no GeoDataFrame (ou None)"""
+    for column in POINT_ID_COLUMNS:
+        if column in gdf.columns:
+            return column
+    return None
+
+
+def points_from_gdf(gdf, id_column=None):
+    """Converte um GeoDataFrame de pontos em tuplas ``(point_id, lon, lat)``
+
+    Sem ``id_column`` usa a primeira coluna de ``POINT_ID_COLUMNS`` existente
+    ou, na falta dela, o índice do GeoDataFrame.
+    """
+    if gdf.crs is not None and gdf.crs.to_epsg() != 4326:
+        gdf = gdf.to_crs('EPSG:4326')
+
+    id_column = id_column or find_id_column(gdf)
+    point_ids = gdf[id_column] if id_column else gdf.index.to_series()
+
+    points = []
+    for point_id, geometry in zip(point_ids, gdf.geometry):
+        if geometry is None or geometry.is_empty or geometry.geom_type != 'Point':
+            logger.warning(f"Ponto {point_id} ignorado: geometria não é um ponto")
+            continue
+        points.append((point_id, geometry.x, geometry.y))
+
+    if len({p[0] for p in points}) != len(points):
+        raise ValueError(f"Identificadores de ponto duplicados na coluna '{id_column}'")
+    return points
+
+
+def metrics_table(point_id, class_metrics_df):
+    """Formata as métricas de um ponto em linhas (point_id, classe, métricas...)"""
+    table = class_metrics_df.reset_index()
+    table = table.rename(columns={table.columns[0]: 'class_value'})
+    table.insert(0, 'point_id', point_id)
+    table.insert(2, 'class_name', [class_name(x) for x in table['class_value']])
+    return table
+
+
+def run_batch(gdf, buffer_dist, image, band, id_column=None, metrics=None,
+              max_pixels_per_request=MAX_PIXELS_PER_REQUEST, max_workers=None,
+              chunksize=DEFAULT_CHUNKSIZE, mosaic=None, writer=None, rasters=None):
+    """Extrai os buffers de todos os pontos e calcula as métricas de classe
+
+    As métricas são calculadas em processos paralelos (``max_workers``) enquanto
+    os buffers seguintes ainda estão sendo baixados. Buffers sobrepostos são
+    montados a partir de blocos compartilhados (``mosaic``, ver ``mosaic``).
+
+    Retorna ``(tabela, falhas)``: uma tabela única com uma linha por ponto e
+    classe, e um dicionário ``{point_id: mensagem}`` com os pontos que falharam.
+
+    Com ``writer`` (ver ``export``) a tabela de cada ponto é gravada assim que
+    fica pronta, na ordem de conclusão, e a tabela retornada fica vazia; com
+    ``rasters`` (``export.RasterZip``) os arrays extraídos também são gravados.
+    """
+    points = points_from_gdf(gdf, id_column=id_column)
+    metrics = metrics or CLASS_METRICS
+    max_workers = choose_workers(len(points), max_workers)
+    start = time.perf_counter()
+
+    failures = {}
+    locations = {point_id: (lon, lat) for point_id, lon, lat in points}
+
+    def landscapes():
+        for point_id, np_arr_mb, error in iter_shared_point_arrays(
+                image, band, points, buffer_dist, max_pixels_per_request=max_pixels_per_request,
+                mosaic=mosaic):
+            if np_arr_mb is None:
+                failures[point_id] = str(error)
+                continue
+            if rasters is not None:
+                rasters.add(point_id, np_arr_mb, window_transform(buffer_window(*locations[point_id], buffer_dist)))
+            yield point_id, np_arr_mb
+
+    tables = {}
+    for point_id, class_metrics_df, error in compute_metrics_parallel(
+            landscapes(), metrics=metrics, max_workers=max_workers, chunksize=chunksize):
+        if error is not None:
+            logger.warning(f"Métricas falharam para o ponto {point_id}: {error}")
+            failures[point_id] = error
+            continue
+        if writer is not None:
+            writer.write(metrics_table(point_id, class_metrics_df))
+            continue
+        tables[point_id] = metrics_table(point_id, class_metrics_df)
+    # Os resultados chegam fora de ordem; mantém a ordem do arquivo
+    tables = [tables[p[0]] for p in points if p[0] in tables]
+
+    elapsed = time.perf_counter() - start
+    if points:
+        logger.info(f"Lote: {len(points)} pontos em {elapsed:.1f}s "
+                    f"({len(points) / max(elapsed, 1e-9):.2f} pontos/s, {max_workers} processos), "
+                    f"{len(failures)} falhas")
+
+    columns = ['point_id', 'class_value', 'class_name'] + list(metrics)
+    combined = pd.concat(tables, ignore_index=True) if tables else pd.DataFrame(columns=columns)
+    return combined, failures
@@ -0,0 +1,258 @@
+"""Cache em disco de blocos de classes MapBiomas com despejo LRU.
+
+Os rasters são guardados em blocos alinhados à grade global (ver ``tiling``),
+indexados por (asset, banda, bloco). Assim, consultas repetidas ou
+sobrepostas (por exemplo, ao mover o slider do buffer) reaproveitam os blocos
+já baixados e só os blocos ausentes vão ao Earth Engine.
+
+As gravações são atômicas (arquivo temporário + ``os.replace``), então vários
+processos podem compartilhar o mesmo diretório. O LRU usa a data de modificação
+dos arquivos, atualizada a cada leitura. O uso de disco contado no processo é
+remedido periodicamente e a cada despejo, já que outros processos também gravam.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from .earthengine import namespaced_path
+from .roundtrips import ContextThreadPoolExecutor
+from .tiling import (
+    MAX_TILE_WORKERS,
+    Raster,
+    buffer_window,
+    extract_window,
+    window_shape,
+    window_transform,
+)
+
+logger = logging.getLogger(__name__)
+
+CACHE_TILE_SIZE = 256
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "landscapemetrics-cache")
+DEFAULT_CACHE_MAX_MB = 512
+# Após o despejo, o cache fica com esta fração do limite
+EVICTION_TARGET = 0.9
+# Intervalo (s) entre medições do diretório, que pode ser compartilhado por vários processos
+DISK_USAGE_INTERVAL = 30.0
+
+
+def aligned_tiles(window, tile_size=CACHE_TILE_SIZE):
+    """Blocos da grade alinhados a múltiplos de ``tile_size`` que cobrem a janela"""
+    row0, row1, col0, col1 = window
+    return [
+        (r, r + tile_size, c, c + tile_size)
+        for r in range((row0 // tile_size) * tile_size, row1, tile_size)
+        for c in range((col0 // tile_size) * tile_size, col1, tile_size)
+    ]
+
+
+def tiles_bbox(tiles):
+    """Janela mínima que contém todos os blocos"""
+    return (min(t[0] for t in tiles), max(t[1] for t in tiles),
+            min(t[2] for t in tiles), max(t[3] for t in tiles))
+
+
+class TileCache:
+    """Cache de blocos em disco com limite de tamanho e despejo LRU"""
+
+    def __init__(self, directory=None, max_bytes=None, tile_size=CACHE_TILE_SIZE):
+        self.directory = directory or os.environ.get("LANDSCAPEMETRICS_CACHE_DIR",
+                                                     namespaced_path(DEFAULT_CACHE_DIR))
+        if max_bytes is None:
+            max_bytes = int(os.environ.get("LANDSCAPEMETRICS_CACHE_MAX_MB", DEFAULT_CACHE_MAX_MB)) * 1024 * 1024
+        self.max_bytes = max_bytes
+        self.tile_size = tile_size
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        os.makedirs(self.directory, exist_ok=True)
+        self._approx_bytes = self.disk_usage()
+        self._measured_at = time.monotonic()
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def key_path(self, asset, band, tile):
+        """Caminho do arquivo de um bloco (hash de asset, banda e coordenadas)"""
+        key = f"{asset}|{band}|{tile[0]}_{tile[1]}_{tile[2]}_{tile[3]}"
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest[:2], f"{digest}.npy")
+
+    def get(self, asset, band, tile):
+        """Retorna o bloco em cache ou ``None``"""
+        path = self.key_path(asset, band, tile)
+        try:
+            array = np.load(path, allow_pickle=False)
+            os.utime(path)
+        except (FileNotFoundError, ValueError, OSError):
+            self._count("misses")
+            return None
+        self._count("hits")
+        return array
+
+    def put(self, asset, band, tile, array):
+        """Grava o bloco de forma atômica e despeja os mais antigos se preciso"""
+        path = self.key_path(asset, band, tile)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        previous_size = _file_size(path)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, np.ascontiguousarray(array), allow_pickle=False)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._count("writes")
+        with self._lock:
+            self._approx_bytes += _file_size(path) - previous_size
+            stale = time.monotonic() - self._measured_at > DISK_USAGE_INTERVAL
+        if stale:
+            self.measure()
+        with self._lock:
+            over_limit = self._approx_bytes > self.max_bytes
+        if over_limit:
+            self.evict()
+
+    def _entries(self):
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(".npy"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def disk_usage(self):
+        """Bytes ocupados pelos blocos no diretório do cache"""
+        return sum(size for _, size, _ in self._entries())
+
+    def measure(self):
+        """Substitui o uso de disco contado no processo pelo medido no diretório"""
+        usage = self.disk_usage()
+        with self._lock:
+            self._approx_bytes = usage
+            self._measured_at = time.monotonic()
+        return usage
+
+    def evict(self):
+        """Remove os blocos usados há mais tempo até ficar abaixo do limite"""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * EVICTION_TARGET
+        evicted = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                evicted += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        with self._lock:
+            self._approx_bytes = total
+            self._measured_at = time.monotonic()
+        if evicted:
+            self._count("evictions", evicted)
+            logger.info(f"Cache: {evicted} blocos despejados, {total / 1024 ** 2:.1f} MB em disco")
+
+    def clear(self):
+        """Remove todos os blocos do cache"""
+        for _, _, path in self._entries():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            self._approx_bytes = 0
+            self._measured_at = time.monotonic()
+
+    def stats(self):
+        """Contadores de acertos/faltas/gravações/despejos e uso de disco"""
+        with self._lock:
+            counters = dict(self._counters)
+        lookups = counters["hits"] + counters["misses"]
+        counters["hit_rate"] = counters["hits"] / lookups if lookups else 0.0
+        counters["bytes"] = self._approx_bytes
+        counters["max_bytes"] = self.max_bytes
+        return counters
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except FileNotFoundError:
+        return 0
+
+
+_default_cache = None
+
+
+def default_cache():
+    """Cache compartilhado do processo (diretório e limite via variáveis de ambiente)"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = TileCache()
+    return _default_cache
+
+
+def _fetch_missing(image, band, missing, **extract_kwargs):
+    """Baixa os blocos ausentes: numa janela só se forem compactos, senão um a um"""
+    bbox = tiles_bbox(missing)
+    tile_pixels = window_shape(missing[0])[0] * window_shape(missing[0])[1]
+    rows, cols = window_shape(bbox)
+    if rows * cols <= 2 * tile_pixels * len(missing):
+        mosaic = extract_window(image, band, bbox, **extract_kwargs).array
+        return {
+            tile: mosaic[tile[0] - bbox[0]:tile[1] - bbox[0], tile[2] - bbox[2]:tile[3] - bbox[2]]
+            for tile in missing
+        }
+
+    with ContextThreadPoolExecutor(max_workers=min(MAX_TILE_WORKERS, len(missing))) as executor:
+        arrays = executor.map(lambda tile: extract_window(image, band, tile, **extract_kwargs).array, missing)
+        return dict(zip(missing, arrays))
+
+
+def extract_window_cached(image, asset, band, window, cache=None, **extract_kwargs):
+    """Extrai uma janela servindo do cache os blocos já baixados
+
+    ``asset`` identifica a imagem na chave do cache (``image`` é um objeto do
+    Earth Engine e não carrega o caminho do asset).
+    """
+    cache = cache or default_cache()
+    tiles = aligned_tiles(window, cache.tile_size)
+    arrays = {tile: cache.get(asset, band, tile) for tile in tiles}
+    missing = [tile for tile, array in arrays.items() if array is None]
+
+    if missing:
+        logger.info(f"Cache: {len(tiles) - len(missing)}/{len(tiles)} blocos em cache, baixando {len(missing)}")
+        for tile, array in _fetch_missing(image, band, missing, **extract_kwargs).items():
+            cache.put(asset, band, tile, array)
+            arrays[tile] = array
+
+    row0, row1, col0, col1 = window
+    mosaic = np.zeros(window_shape(window), dtype=np.uint8)
+    for (r0, r1, c0, c1), array in arrays.items():
+        rs, re_ = max(r0, row0), min(r1, row1)
+        cs, ce = max(c0, col0), min(c1, col1)
+        mosaic[rs - row0:re_ - row0, cs - col0:ce - col0] = array[rs - r0:re_ - r0, cs - c0:ce - c0]
+    return Raster(mosaic, window_transform(window))
+
+
+def extract_buffer_cached(image, asset, band, lon, lat, buffer_dist, cache=None, **extract_kwargs):
+    """Extrai o buffer de um ponto usando o cache de blocos"""
+    return extract_window_cached(image, asset, band, buffer_window(lon, lat, buffer_dist),
+                                 cache=cache, **extract_kwargs)
@@ -0,0 +1,154 @@
+"""Matrizes de transição de cobertura do solo entre anos (ex.: floresta → pastagem).
+
+As transições de um par de anos saem de um único ``np.bincount`` sobre o código
+``classe_antes * 256 + classe_depois`` de cada pixel, sem máscaras por classe.
+Numa cadeia de anos, todos os pares consecutivos entram no mesmo ``bincount``,
+com o índice do par somado ao código. Pixels nodata em qualquer um dos dois
+anos são ignorados; as áreas usam a mesma resolução nominal do PyLandStats.
+
+Num lote, as bandas de cada ponto vêm numa só requisição, vários pontos em
+paralelo, e as tabelas ficam no formato longo, só com as transições que
+ocorrem.
+"""
+
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+from .batch import points_from_gdf
+from .mapbiomas import CLASSIFICATION_PREFIX, class_name
+from .metrics import NODATA, RESOLUTION
+from .roundtrips import ContextThreadPoolExecutor
+from .tiling import MAX_TILE_WORKERS, extract_buffer_stack
+from .timeseries import select_years
+
+logger = logging.getLogger(__name__)
+
+N_CODES = 256
+TRANSITION_COLUMNS = ['year_from', 'year_to', 'class_from', 'name_from', 'class_to', 'name_to',
+                      'pixels', 'area_ha']
+
+
+def class_label(code):
+    """Nome da classe para rótulos, ou o próprio código quando a legenda não tem nome"""
+    return class_name(code).strip() or f"{code}"
+
+
+def transition_counts(stack):
+    """Contagens ``(par, de, para)`` para os pares consecutivos de um array ``(ano, linha, coluna)``
+
+    Retorna um array int64 ``(anos - 1, 256, 256)``.
+    """
+    stack = np.asarray(stack)
+    if stack.ndim != 3 or stack.shape[0] < 2:
+        raise ValueError(f"Esperado um array (ano, linha, coluna) com ao menos 2 anos, recebido {stack.shape}")
+    # int32 basta para até 32767 pares e usa metade da memória de int64
+    before = stack[:-1].astype(np.int32)
+    after = stack[1:]
+    valid = (before != NODATA) & (after != NODATA)
+    pair = np.arange(stack.shape[0] - 1, dtype=np.int32).reshape(-1, 1, 1)
+    codes = ((pair * N_CODES + before) * N_CODES + after)[valid]
+    counts = np.bincount(codes, minlength=(stack.shape[0] - 1) * N_CODES * N_CODES)
+    return counts.reshape(stack.shape[0] - 1, N_CODES, N_CODES)
+
+
+def transition_matrix(before, after, res=RESOLUTION, unit='pixels'):
+    """Matriz de transição rotulada (linhas: classe no primeiro ano; colunas: no segundo)
+
+    ``unit`` é ``'pixels'`` ou ``'ha'``. Só aparecem classes presentes em algum
+    dos dois anos; classes sem nome na legenda são rotuladas pelo código.
+    """
+    counts = transition_counts(np.stack([before, after]))[0]
+    present = np.flatnonzero(counts.sum(axis=1) + counts.sum(axis=0))
+    matrix = counts[np.ix_(present, present)].astype(float if unit == 'ha' else np.int64)
+    if unit == 'ha':
+        matrix = matrix * res[0] * res[1] / 10000
+    elif unit != 'pixels':
+        raise ValueError(f"Unidade inválida: {unit} (use 'pixels' ou 'ha')")
+    labels = [class_label(x) for x in present]
+    return pd.DataFrame(matrix, index=pd.Index(labels, name='de'), columns=pd.Index(labels, name='para'))
+
+
+def transition_table(stack, years, res=RESOLUTION):
+    """Transições de cada par de anos consecutivos no formato longo (só as que ocorrem)"""
+    if len(years) != len(stack):
+        raise ValueError(f"{len(years)} anos para {len(stack)} bandas")
+    counts = transition_counts(stack)
+    pair, class_from, class_to = np.nonzero(counts)
+    pixels = counts[pair, class_from, class_to]
+    years = np.asarray(years)
+    return pd.DataFrame({
+        'year_from': years[pair],
+        'year_to': years[pair + 1],
+        'class_from': class_from,
+        'name_from': [class_label(x) for x in class_from],
+        'class_to': class_to,
+        'name_to': [class_label(x) for x in class_to],
+        'pixels': pixels,
+        'area_ha': pixels * res[0] * res[1] / 10000,
+    }, columns=TRANSITION_COLUMNS)
+
+
+def chain_years(years, step=None):
+    """Anos da cadeia: todos, ou a cada ``step`` anos a partir do primeiro (sempre inclui o último)"""
+    years = sorted(years)
+    if not step:
+        return years
+    chain = years[::step]
+    if chain[-1] != years[-1]:
+        chain.append(years[-1])
+    return chain
+
+
+def run_transitions(source, lon, lat, buffer_dist, years):
+    """Extrai as bandas dos anos pedidos para um ponto e calcula as transições da cadeia"""
+    bands = [f'{CLASSIFICATION_PREFIX}{year}' for year in years]
+    stack = extract_buffer_stack(source.image, bands, lon, lat, buffer_dist).array
+    return transition_table(stack, years)
+
+
+def run_transitions_batch(gdf, buffer_dist, source, start_year=None, end_year=None, step=None,
+                          id_column=None, max_workers=MAX_TILE_WORKERS, writer=None):
+    """Transições de todos os pontos do GeoDataFrame entre os anos do intervalo
+
+    Os pontos são extraídos em threads (``max_workers`` requisições
+    simultâneas). Retorna ``(tabela, falhas)`` como ``run_batch``; com
+    ``writer`` (ver ``export``) as tabelas são gravadas à medida que ficam
+    prontas.
+    """
+    points = points_from_gdf(gdf, id_column=id_column)
+    years = chain_years(select_years(source, start_year, end_year), step)
+    if len(years) < 2:
+        raise ValueError("Transições exigem ao menos dois anos")
+    start = time.perf_counter()
+
+    def transitions(point):
+        point_id, lon, lat = point
+        try:
+            table = run_transitions(source, lon, lat, buffer_dist, years)
+        except Exception as point_error:
+            return point_id, None, point_error
+        table.insert(0, 'point_id', point_id)
+        return point_id, table, None
+
+    tables = []
+    failures = {}
+    with ContextThreadPoolExecutor(max_workers=max(1, min(max_workers, len(points)))) as executor:
+        for point_id, table, error in executor.map(transitions, points):
+            if table is None:
+                logger.warning(f"Transições falharam para o ponto {point_id}: {error}")
+                failures[point_id] = str(error)
+            elif writer is not None:
+                writer.write(table)
+            else:
+                tables.append(table)
+
+    elapsed = time.perf_counter() - start
+    if points:
+        logger.info(f"Transições: {len(points)} pontos, anos {years}, {elapsed:.1f}s, {len(failures)} falhas")
+
+    combined = (pd.concat(tables, ignore_index=True) if tables
+                else pd.DataFrame(columns=['point_id'] + TRANSITION_COLUMNS))
+    return combined, failures
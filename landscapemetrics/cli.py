@@ -0,0 +1,96 @@
+"""Linha de comando para processar arquivos de pontos em lote.
+
+Exemplos::
+
+    python -m landscapemetrics pontos.geojson --buffer 5000 -o metricas.csv
+    python -m landscapemetrics campo/*.geojson --buffer 2000 --year 2020 -o metricas.csv
+    python -m landscapemetrics pontos.csv -o metricas.parquet --rasters rasters.zip --raster-format npz
+"""
+
+import argparse
+import logging
+
+from .earthengine import initialize, set_ee
+from .export import RASTER_FORMATS, InsertColumns, RasterZip, open_writer
+from .metrics import CLASS_METRICS
+from .instrumentation import Tracer
+from .pipeline import process_file
+from .roundtrips import RoundTripCounter
+
+logger = logging.getLogger(__name__)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="landscapemetrics",
+        description="Extrai métricas de paisagem do MapBiomas para arquivos de pontos",
+    )
+    parser.add_argument("inputs", nargs="+", help="Arquivos de pontos (GeoJSON, CSV com lon/lat, GeoParquet)")
+    parser.add_argument("-b", "--buffer", type=int, default=5000,
+                        help="Raio do buffer em metros (padrão: 5000)")
+    parser.add_argument("-y", "--year", type=int, help="Ano da classificação (padrão: o mais recente)")
+    parser.add_argument("--years", type=int, nargs=2, metavar=("INICIO", "FIM"),
+                        help="Série temporal: métricas de todos os anos do intervalo (formato longo)")
+    parser.add_argument("--transitions", action="store_true",
+                        help="Com --years: matrizes de transição de cobertura entre os anos (pixels e ha)")
+    parser.add_argument("--step", type=int, help="Com --transitions: intervalo entre os anos da cadeia")
+    parser.add_argument("-o", "--output", default="-",
+                        help="Arquivo de saída: .csv, .parquet ou .arrow (padrão: CSV no stdout)")
+    parser.add_argument("--rasters", help="Zip com o raster de classes extraído de cada ponto")
+    parser.add_argument("--raster-format", choices=RASTER_FORMATS, default="tif",
+                        help="Formato dos rasters no zip: GeoTIFF (exige rasterio) ou NPZ (padrão: tif)")
+    parser.add_argument("--id-column", help="Coluna com o identificador dos pontos")
+    parser.add_argument("--metrics", nargs="+", choices=CLASS_METRICS, help="Subconjunto das métricas")
+    parser.add_argument("--credentials", help="Arquivo JSON da conta de serviço do Earth Engine")
+    parser.add_argument("--offline", action="store_true",
+                        help="Usa o substituto local do Earth Engine (dados sintéticos)")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.transitions and not args.years:
+        parser.error("--transitions exige --years INICIO FIM")
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.offline:
+        from . import fake_ee
+        set_ee(fake_ee)
+    else:
+        credentials_json = None
+        if args.credentials:
+            with open(args.credentials, "r", encoding="utf-8") as f:
+                credentials_json = f.read()
+        initialize(credentials_json)
+
+    # Os resultados são gravados à medida que cada ponto termina
+    writer = open_writer(args.output)
+    rasters = RasterZip(args.rasters, args.raster_format) if args.rasters else None
+    n_failures = 0
+    try:
+        for path in args.inputs:
+            try:
+                with RoundTripCounter(label=path), Tracer(run=path):
+                    result = process_file(path, args.buffer, year=args.year, years=args.years,
+                                          id_column=args.id_column, metrics=args.metrics,
+                                          writer=InsertColumns(writer, [(0, 'source_file', path)]),
+                                          rasters=rasters, transitions=args.transitions, step=args.step)
+            except Exception as file_error:
+                logger.error(f"{path}: {file_error}")
+                n_failures += 1
+                continue
+            for point_id, message in result.failures.items():
+                logger.error(f"{path}: ponto {point_id} falhou: {message}")
+            n_failures += len(result.failures)
+    finally:
+        writer.close()
+        if rasters is not None:
+            rasters.close()
+
+    if not writer.rows:
+        logger.error("Nenhum resultado gerado")
+        return 1
+    return 1 if n_failures else 0
@@ -0,0 +1,180 @@
+"""Métricas de composição calculadas no servidor com ``ee.Reducer.frequencyHistogram()``.
+
+Área total e proporção da paisagem dependem apenas da contagem de pixels de cada
+classe, que o Earth Engine devolve numa resposta pequena, sem baixar o raster.
+Funciona para buffers grandes e polígonos, em que o download dos pixels seria
+inviável. As métricas de configuração (manchas, bordas, forma, vizinhança)
+continuam exigindo a extração completa.
+
+Para pontos, a região é o mesmo retângulo da grade usado na extração dos
+pixels (``buffer_window``), e o histograma conta pixels inteiros (sem pesos
+nas bordas); assim área e proporção são idênticas às do caminho com raster.
+"""
+
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+from .batch import find_id_column, metrics_table
+from .earthengine import get_ee
+from .metrics import NODATA, RESOLUTION
+from .tiling import GRID_CRS, GRID_TRANSFORM, buffer_window, window_rectangle
+
+logger = logging.getLogger(__name__)
+
+COMPOSITION_METRICS = ('total_area', 'proportion_of_landscape')
+
+# Regiões por chamada getInfo; cada resposta traz só um histograma por região
+REGIONS_PER_REQUEST = 200
+HISTOGRAM_MAX_PIXELS = 1e13
+
+
+def is_composition_only(metrics):
+    """True quando todas as métricas pedidas podem vir do histograma de classes"""
+    return bool(metrics) and set(metrics) <= set(COMPOSITION_METRICS)
+
+
+def histogram_metrics(histogram, metrics=COMPOSITION_METRICS, res=RESOLUTION):
+    """Converte ``{classe: pixels}`` num DataFrame no formato do PyLandStats
+
+    Pixels nodata são ignorados, como no PyLandStats.
+    """
+    counts = {}
+    for class_value, count in (histogram or {}).items():
+        if class_value in (None, 'null'):
+            continue
+        class_value = int(float(class_value))
+        if class_value != NODATA:
+            counts[class_value] = counts.get(class_value, 0) + float(count)
+
+    classes = sorted(counts)
+    pixels = np.array([counts[c] for c in classes], dtype=float)
+    values = {
+        # Hectares, com a mesma resolução nominal usada no PyLandStats
+        'total_area': pixels * res[0] * res[1] / 10000,
+        'proportion_of_landscape': 100 * pixels / pixels.sum() if pixels.size else pixels,
+    }
+    return pd.DataFrame({metric: values[metric] for metric in metrics},
+                        index=pd.Index(classes, name='class_val'))
+
+
+def _histogram(image, band, geometry):
+    ee = get_ee()
+    return image.reduceRegion(
+        # Sem pesos: pixels da borda contam inteiros, como no raster baixado
+        reducer=ee.Reducer.frequencyHistogram().unweighted(),
+        geometry=geometry,
+        crs=GRID_CRS,
+        crsTransform=GRID_TRANSFORM,
+        maxPixels=HISTOGRAM_MAX_PIXELS,
+    ).get(band)
+
+
+def class_histogram(image, band, geometry):
+    """Contagem de pixels por classe dentro da geometria, calculada no servidor"""
+    return _histogram(image, band, geometry).getInfo() or {}
+
+
+def region_geometry(geometry_json, buffer_dist=None):
+    """Geometria do Earth Engine de uma região
+
+    Pontos viram o retângulo da grade do buffer (o mesmo de ``buffer_window``),
+    polígonos são usados como estão.
+    """
+    if geometry_json['type'] == 'MultiPoint':
+        raise ValueError("MultiPoint não suportado: use um ponto por feição")
+    if geometry_json['type'] == 'Point':
+        if not buffer_dist:
+            raise ValueError("Pontos exigem um raio de buffer")
+        lon, lat = geometry_json['coordinates'][:2]
+        return window_rectangle(buffer_window(lon, lat, buffer_dist))
+    return get_ee().Geometry(geometry_json)
+
+
+def regions_from_gdf(gdf, id_column=None):
+    """Converte um GeoDataFrame em tuplas ``(region_id, geojson)`` (pontos e polígonos)"""
+    if gdf.crs is not None and gdf.crs.to_epsg() != 4326:
+        gdf = gdf.to_crs('EPSG:4326')
+
+    id_column = id_column or find_id_column(gdf)
+    region_ids = gdf[id_column] if id_column else gdf.index.to_series()
+
+    regions = []
+    for region_id, geometry in zip(region_ids, gdf.geometry):
+        if geometry is None or geometry.is_empty:
+            logger.warning(f"Região {region_id} ignorada: geometria vazia")
+            continue
+        regions.append((region_id, geometry.__geo_interface__))
+
+    if len({r[0] for r in regions}) != len(regions):
+        raise ValueError(f"Identificadores duplicados na coluna '{id_column}'")
+    return regions
+
+
+def _fetch_histograms(image, band, chunk, buffer_dist):
+    """Histogramas de um grupo de regiões com uma única chamada getInfo"""
+    ee = get_ee()
+    features = ee.FeatureCollection(
+        [ee.Feature(region_geometry(geometry_json, buffer_dist), {"batch_index": i})
+         for i, (_, geometry_json) in enumerate(chunk)]
+    )
+
+    def reduce(feature):
+        return feature.set("histogram", _histogram(image, band, feature.geometry()))
+
+    return features.map(reduce).aggregate_array("histogram").getInfo()
+
+
+def iter_region_histograms(image, band, regions, buffer_dist=None, regions_per_request=REGIONS_PER_REQUEST):
+    """Gera ``(region_id, histograma, erro)`` agrupando as regiões por chamada
+
+    Se um grupo falhar, as regiões são repetidas uma a uma.
+    """
+    for start in range(0, len(regions), regions_per_request):
+        chunk = regions[start:start + regions_per_request]
+        try:
+            histograms = _fetch_histograms(image, band, chunk, buffer_dist)
+            if len(histograms) != len(chunk):
+                raise ValueError(f"{len(histograms)} histogramas para {len(chunk)} regiões")
+        except Exception as chunk_error:
+            logger.warning(f"Histograma em grupo falhou ({len(chunk)} regiões): {chunk_error}")
+            for region_id, geometry_json in chunk:
+                try:
+                    yield region_id, class_histogram(image, band, region_geometry(geometry_json, buffer_dist)), None
+                except Exception as region_error:
+                    yield region_id, None, region_error
+            continue
+        for (region_id, _), histogram in zip(chunk, histograms):
+            yield region_id, histogram or {}, None
+
+
+def run_composition(gdf, buffer_dist, image, band, id_column=None, metrics=COMPOSITION_METRICS,
+                    regions_per_request=REGIONS_PER_REQUEST):
+    """Área e proporção das classes de cada ponto (buffer) ou polígono, sem baixar pixels
+
+    Retorna ``(tabela, falhas)`` no mesmo formato de ``run_batch``.
+    """
+    if not is_composition_only(metrics):
+        raise ValueError(f"Métricas de configuração exigem a extração do raster: {metrics}")
+    regions = regions_from_gdf(gdf, id_column=id_column)
+    start = time.perf_counter()
+
+    tables = []
+    failures = {}
+    for region_id, histogram, error in iter_region_histograms(
+            image, band, regions, buffer_dist, regions_per_request=regions_per_request):
+        if histogram is None:
+            failures[region_id] = str(error)
+            continue
+        tables.append(metrics_table(region_id, histogram_metrics(histogram, metrics)))
+
+    elapsed = time.perf_counter() - start
+    if regions:
+        logger.info(f"Composição (histograma): {len(regions)} regiões em {elapsed:.1f}s, "
+                    f"{len(failures)} falhas")
+
+    columns = ['point_id', 'class_value', 'class_name'] + list(metrics)
+    combined = pd.concat(tables, ignore_index=True) if tables else pd.DataFrame(columns=columns)
+    return combined, failures
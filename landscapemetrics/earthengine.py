@@ -0,0 +1,110 @@
+"""Ponto único de acesso ao cliente do Google Earth Engine.
+
+Os módulos do pacote nunca importam ``ee`` diretamente: obtêm o cliente por
+``get_ee()``. Assim é possível trocar o Earth Engine real por um substituto
+local (ver ``landscapemetrics.fake_ee``) ou pelo cliente de gravação e
+reprodução (``landscapemetrics.replay_ee``) sem alterar o restante do código.
+Sem ``set_ee``, o cliente é escolhido pela variável de ambiente
+``LANDSCAPEMETRICS_EE_BACKEND`` (``ee``, ``fake`` ou ``replay``).
+"""
+
+import importlib
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+HIGH_VOLUME_URL = 'https://earthengine-highvolume.googleapis.com'
+REQUIRED_CREDENTIAL_FIELDS = ['client_email', 'private_key', 'project_id']
+CREDENTIALS_ENV = 'GEE_SERVICE_ACCOUNT_CREDENTIALS'
+BACKEND_ENV = 'LANDSCAPEMETRICS_EE_BACKEND'
+BACKENDS = {
+    'ee': 'ee',
+    'fake': 'landscapemetrics.fake_ee',
+    'replay': 'landscapemetrics.replay_ee',
+}
+
+_ee_module = None
+_initialized = False
+
+
+def get_ee():
+    """Retorna o módulo ``ee`` ativo (importa sob demanda o cliente de ``LANDSCAPEMETRICS_EE_BACKEND``)"""
+    global _ee_module
+    if _ee_module is None:
+        _ee_module = load_backend(os.environ.get(BACKEND_ENV, 'ee'))
+    return _ee_module
+
+
+def load_backend(name):
+    """Importa um cliente ``ee`` pelo nome (``ee``, ``fake`` ou ``replay``)"""
+    if name not in BACKENDS:
+        raise ValueError(f"Cliente Earth Engine desconhecido: {name} (use {sorted(BACKENDS)})")
+    return importlib.import_module(BACKENDS[name])
+
+
+def set_ee(module):
+    """Define o módulo ``ee`` usado pelo pacote e retorna o anterior"""
+    global _ee_module, _initialized
+    previous = _ee_module
+    _ee_module = module
+    _initialized = False
+    logger.info(f"Cliente Earth Engine definido: {getattr(module, '__name__', module)}")
+    return previous
+
+
+def namespaced_path(path):
+    """Acrescenta ao caminho o namespace do cliente ativo (ex.: ``-fake``)
+
+    Evita que dados sintéticos do substituto local sejam gravados nos mesmos
+    caches em disco usados com o Earth Engine real.
+    """
+    namespace = getattr(_ee_module, 'CACHE_NAMESPACE', None)
+    if not namespace:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}-{namespace}{ext}"
+
+
+def is_initialized():
+    """True se o cliente ativo já foi inicializado neste processo"""
+    return _initialized
+
+
+def mark_initialized():
+    """Registra que o cliente ativo foi inicializado (vale para o processo inteiro)"""
+    global _initialized
+    _initialized = True
+
+
+def parse_service_account(json_data):
+    """Valida o JSON da conta de serviço e retorna o dicionário das credenciais"""
+    json_object = json.loads(json_data, strict=False)
+    missing_fields = [field for field in REQUIRED_CREDENTIAL_FIELDS if not json_object.get(field)]
+    if missing_fields:
+        raise ValueError(f"Campos obrigatórios ausentes nas credenciais: {missing_fields}")
+    return json_object
+
+
+def initialize(credentials_json=None):
+    """Inicializa o Earth Engine fora do Streamlit
+
+    Usa o JSON da conta de serviço recebido ou o da variável de ambiente
+    ``GEE_SERVICE_ACCOUNT_CREDENTIALS``; sem credenciais, tenta a
+    autenticação local (``earthengine authenticate``).
+    """
+    ee = get_ee()
+    credentials_json = credentials_json or os.environ.get(CREDENTIALS_ENV)
+    if credentials_json:
+        json_object = parse_service_account(credentials_json)
+        credentials = ee.ServiceAccountCredentials(
+            json_object['client_email'],
+            key_data=json.dumps(json_object)
+        )
+        ee.Initialize(credentials=credentials, opt_url=HIGH_VOLUME_URL)
+    else:
+        logger.warning("Credenciais GEE não encontradas, tentando inicialização local")
+        ee.Initialize(opt_url=HIGH_VOLUME_URL)
+    mark_initialized()
+    logger.info("Earth Engine inicializado com sucesso")
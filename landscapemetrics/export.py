@@ -0,0 +1,253 @@
+"""Exportação incremental de resultados e rasters.
+
+As tabelas de cada ponto são gravadas à medida que ficam prontas, em grupos de
+até ``FLUSH_ROWS`` linhas, então a memória não cresce com o tamanho do
+resultado. Formatos de tabela (pela extensão do arquivo):
+
+- ``.csv``: ``;`` como separador e vírgula decimal, como no app;
+- ``.parquet``: Parquet (um row group por grupo de linhas);
+- ``.arrow`` / ``.feather``: arquivo Arrow IPC.
+
+``RasterZip`` grava os rasters de classes extraídos num zip, um a um, como
+GeoTIFF comprimido (exige ``rasterio``) ou NPZ comprimido com a transformação
+afim da janela.
+"""
+
+import abc
+import io
+import logging
+import os
+import sys
+import zipfile
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FLUSH_ROWS = 10000
+TABLE_FORMATS = {'.csv': 'csv', '.txt': 'csv', '.parquet': 'parquet', '.arrow': 'arrow', '.feather': 'arrow'}
+RASTER_FORMATS = ('tif', 'npz')
+
+
+class TableWriter(abc.ABC):
+    """Base dos gravadores: acumula tabelas até ``flush_rows`` linhas e grava o grupo
+
+    As colunas do primeiro grupo valem para o arquivo inteiro; colunas ausentes
+    nos grupos seguintes ficam vazias e colunas extras são descartadas. As
+    subclasses implementam ``_write_table`` (e ``_close``, se precisarem).
+    """
+
+    def __init__(self, target, flush_rows=FLUSH_ROWS):
+        self.target = target
+        self.flush_rows = flush_rows
+        self.columns = None
+        self.rows = 0
+        self._pending = []
+        self._pending_rows = 0
+
+    def write(self, table):
+        if table is None or table.empty:
+            return
+        self._pending.append(table)
+        self._pending_rows += len(table)
+        if self._pending_rows >= self.flush_rows:
+            self.flush()
+
+    def flush(self):
+        import pandas as pd
+
+        if not self._pending:
+            return
+        table = pd.concat(self._pending, ignore_index=True)
+        self._pending, self._pending_rows = [], 0
+        if self.columns is None:
+            self.columns = list(table.columns)
+        else:
+            table = table.reindex(columns=self.columns)
+        self._write_table(table)
+        self.rows += len(table)
+
+    @abc.abstractmethod
+    def _write_table(self, table):
+        """Grava um grupo de linhas já com as colunas do arquivo"""
+
+    def close(self):
+        self.flush()
+        self._close()
+
+    def _close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class CSVWriter(TableWriter):
+    """CSV com ``;`` e vírgula decimal, gravado em partes (arquivo ou objeto com ``write``)"""
+
+    def __init__(self, target, flush_rows=FLUSH_ROWS):
+        super().__init__(target, flush_rows)
+        self._owns_file = not hasattr(target, 'write')
+        self._file = open(target, 'w', encoding='utf-8', newline='') if self._owns_file else target
+
+    def _write_table(self, table):
+        table.to_csv(self._file, sep=';', decimal=',', index=False, header=self.rows == 0)
+
+    def _close(self):
+        if self._owns_file:
+            self._file.close()
+        else:
+            self._file.flush()
+
+
+class ParquetWriter(TableWriter):
+    """Parquet com um row group por grupo de linhas"""
+
+    def __init__(self, target, flush_rows=FLUSH_ROWS):
+        super().__init__(target, flush_rows)
+        self._writer = None
+        self._schema = None
+
+    def _write_table(self, table):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        arrow_table = pa.Table.from_pandas(table, schema=self._schema, preserve_index=False)
+        if self._writer is None:
+            self._schema = arrow_table.schema
+            self._writer = pq.ParquetWriter(self.target, self._schema, compression='zstd')
+        self._writer.write_table(arrow_table)
+
+    def _close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+class ArrowWriter(TableWriter):
+    """Arquivo Arrow IPC (Feather v2), um lote de registros por grupo de linhas"""
+
+    def __init__(self, target, flush_rows=FLUSH_ROWS):
+        super().__init__(target, flush_rows)
+        self._writer = None
+        self._schema = None
+
+    def _write_table(self, table):
+        import pyarrow as pa
+
+        arrow_table = pa.Table.from_pandas(table, schema=self._schema, preserve_index=False)
+        if self._writer is None:
+            self._schema = arrow_table.schema
+            self._writer = pa.ipc.new_file(self.target, self._schema)
+        self._writer.write_table(arrow_table)
+
+    def _close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+WRITERS = {'csv': CSVWriter, 'parquet': ParquetWriter, 'arrow': ArrowWriter}
+
+
+def table_format(path):
+    """Formato de tabela pela extensão (CSV se desconhecida ou saída padrão)"""
+    if path in (None, '-'):
+        return 'csv'
+    return TABLE_FORMATS.get(os.path.splitext(str(path))[1].lower(), 'csv')
+
+
+def open_writer(path, table_format_name=None, flush_rows=FLUSH_ROWS):
+    """Gravador para ``path`` (``-`` é a saída padrão, sempre em CSV)"""
+    table_format_name = table_format_name or table_format(path)
+    if path in (None, '-'):
+        if table_format_name != 'csv':
+            raise ValueError("A saída padrão só aceita CSV")
+        return CSVWriter(sys.stdout, flush_rows)
+    return WRITERS[table_format_name](path, flush_rows)
+
+
+class InsertColumns:
+    """Repassa as tabelas a outro gravador inserindo colunas constantes
+
+    ``columns`` é uma lista de ``(posição, nome, valor)``.
+    """
+
+    def __init__(self, writer, columns):
+        self.writer = writer
+        self.columns = columns
+
+    def write(self, table):
+        if table is None or table.empty:
+            return
+        table = table.copy()
+        for position, name, value in self.columns:
+            table.insert(position, name, value)
+        self.writer.write(table)
+
+
+def table_bytes(table, table_format_name='csv'):
+    """Tabela inteira em bytes no formato pedido (downloads do app)"""
+    buffer = io.StringIO() if table_format_name == 'csv' else io.BytesIO()
+    with WRITERS[table_format_name](buffer) as writer:
+        writer.write(table)
+    value = buffer.getvalue()
+    return value.encode('utf-8') if isinstance(value, str) else value
+
+
+class RasterZip:
+    """Zip com um raster de classes por ponto, gravado um a um
+
+    ``fmt='tif'`` grava GeoTIFF uint8 com compressão deflate (EPSG:4326 e a
+    transformação da janela); ``fmt='npz'`` grava ``classes`` e ``transform``
+    com ``np.savez_compressed``. ``target`` pode ser um caminho ou um objeto
+    de arquivo, inclusive sem ``seek``.
+    """
+
+    def __init__(self, target, fmt='tif'):
+        if fmt not in RASTER_FORMATS:
+            raise ValueError(f"Formato de raster inválido: {fmt} (use {RASTER_FORMATS})")
+        if fmt == 'tif':
+            import rasterio  # noqa: F401 (falha cedo se não estiver instalado)
+        self.fmt = fmt
+        self.count = 0
+        # Os dois formatos já saem comprimidos; o zip só agrupa os arquivos
+        self._zip = zipfile.ZipFile(target, 'w', compression=zipfile.ZIP_STORED)
+
+    def add(self, name, array, transform):
+        """Grava o raster ``array`` com a transformação afim ``(a, b, c, d, e, f)``"""
+        array = np.asarray(array, dtype=np.uint8)
+        if self.fmt == 'npz':
+            with self._zip.open(f"{name}.npz", 'w', force_zip64=True) as entry:
+                np.savez_compressed(entry, classes=array, transform=np.asarray(transform, dtype=float))
+        else:
+            self._zip.writestr(f"{name}.tif", geotiff_bytes(array, transform))
+        self.count += 1
+
+    def close(self):
+        self._zip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def geotiff_bytes(array, transform, nodata=0, dtype=None):
+    """GeoTIFF comprimido (EPSG:4326) em bytes"""
+    from rasterio.io import MemoryFile
+    from rasterio.transform import Affine
+
+    array = np.asarray(array)
+    dtype = dtype or array.dtype
+    profile = {
+        'driver': 'GTiff', 'height': array.shape[0], 'width': array.shape[1], 'count': 1,
+        'dtype': dtype, 'crs': 'EPSG:4326', 'transform': Affine(*transform[:6]),
+        'compress': 'deflate', 'nodata': nodata,
+    }
+    with MemoryFile() as memory_file:
+        with memory_file.open(**profile) as dataset:
+            dataset.write(array.astype(dtype, copy=False), 1)
+        return memory_file.read()
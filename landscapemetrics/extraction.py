@@ -0,0 +1,69 @@
+"""Extração de arrays de classes MapBiomas a partir do Earth Engine"""
+
+import logging
+
+from .roundtrips import ContextThreadPoolExecutor
+from .tiling import MAX_TILE_WORKERS, buffer_window, extract_window, window_pixels
+
+logger = logging.getLogger(__name__)
+
+# Orçamento de pixels de cada bloco de janelas buscadas em paralelo (limita a memória em trânsito)
+MAX_PIXELS_PER_REQUEST = 1500000
+
+
+def _chunk_windows(windows, max_pixels_per_request):
+    """Agrupa janelas em blocos que respeitam o orçamento de pixels por requisição"""
+    chunk, chunk_pixels = [], 0
+    for point_id, window in windows:
+        pixels = window_pixels(window)
+        if chunk and chunk_pixels + pixels > max_pixels_per_request:
+            yield chunk
+            chunk, chunk_pixels = [], 0
+        chunk.append((point_id, window))
+        chunk_pixels += pixels
+    if chunk:
+        yield chunk
+
+
+def _fetch_window(image, band, window):
+    """Extrai uma janela via computePixels (NPY); o erro é devolvido em vez de propagado"""
+    try:
+        return extract_window(image, band, window, max_workers=1).array, None
+    except Exception as window_error:
+        return None, window_error
+
+
+def _extract_chunk(image, band, chunk, max_workers=MAX_TILE_WORKERS):
+    """Extrai as janelas de um bloco em paralelo, uma chamada computePixels por janela
+
+    Gera ``(chave, array, erro)`` na ordem do bloco; a falha de uma janela não afeta as demais.
+    """
+    with ContextThreadPoolExecutor(max_workers=min(max_workers, len(chunk))) as executor:
+        results = list(executor.map(lambda item: _fetch_window(image, band, item[1]), chunk))
+    for (key, _), (array, error) in zip(chunk, results):
+        if error is not None:
+            logger.warning(f"Extração falhou para {key}: {error}")
+        yield key, array, error
+
+
+def iter_point_arrays(image, band, points, buffer_dist, max_pixels_per_request=MAX_PIXELS_PER_REQUEST):
+    """Extrai o array do buffer de cada ponto via computePixels, vários pontos em paralelo
+
+    ``points`` é uma sequência de tuplas ``(point_id, lon, lat)``. Gera tuplas
+    ``(point_id, array, erro)``; ``array`` é ``None`` quando a extração falha.
+    Buffers maiores que ``max_pixels_per_request`` são extraídos sozinhos, em blocos.
+    """
+    windows = [(point_id, buffer_window(lon, lat, buffer_dist)) for point_id, lon, lat in points]
+    small = [w for w in windows if window_pixels(w[1]) <= max_pixels_per_request]
+    large = [w for w in windows if window_pixels(w[1]) > max_pixels_per_request]
+
+    for chunk in _chunk_windows(small, max_pixels_per_request):
+        logger.info(f"Extraindo bloco com {len(chunk)} pontos")
+        yield from _extract_chunk(image, band, chunk)
+
+    for point_id, window in large:
+        try:
+            yield point_id, extract_window(image, band, window).array, None
+        except Exception as tiled_error:
+            logger.warning(f"Extração em blocos falhou para o ponto {point_id}: {tiled_error}")
+            yield point_id, None, tiled_error
@@ -0,0 +1,538 @@
+"""Substituto local do cliente ``ee`` para testes e benchmarks offline.
+
+Implementa apenas o subconjunto da API do Earth Engine usado pelo aplicativo
+(``Image``, ``Geometry``, ``Feature``, ``FeatureCollection``, ``Reducer``,
+``Number``, ``List``, ``Dictionary`` e ``getInfo``). Os valores são avaliados
+de forma preguiçosa, como no servidor real: nada é calculado até ``getInfo()``,
+e cada ``getInfo()`` conta como uma ida e volta ao servidor em ``stats``.
+
+O raster simulado segue a grade do MapBiomas (EPSG:4326, ~30 m) e é gerado de
+forma determinística a partir das coordenadas do pixel, de modo que consultas
+sobrepostas retornam exatamente os mesmos valores.
+
+Uso::
+
+    from landscapemetrics import fake_ee
+    from landscapemetrics.earthengine import set_ee
+
+    set_ee(fake_ee)
+"""
+
+import io
+import json
+import math
+import threading
+import time
+
+import numpy as np
+
+# Tamanho do pixel do MapBiomas em graus (~30 m no equador)
+PIXEL_SIZE_DEG = 0.00026949458523585647
+METERS_PER_DEGREE = 111320.0
+SAMPLE_RECTANGLE_MAX_PIXELS = 262144
+
+CLASS_CODES = np.array([3, 3, 3, 4, 12, 15, 15, 15, 18, 21, 21, 24, 26, 9, 33], dtype=np.uint8)
+YEARS = list(range(1985, 2024))
+# Separa os caches em disco dos usados com o Earth Engine real
+CACHE_NAMESPACE = "fake"
+
+_lock = threading.Lock()
+_config = {"latency": 0.0, "seed": 1, "years": YEARS, "unavailable_assets": set()}
+stats = {"round_trips": 0, "bytes": 0}
+
+
+class EEException(Exception):
+    pass
+
+
+def configure(latency=None, seed=None, years=None, unavailable_assets=None):
+    """Ajusta latência simulada (s), semente do raster, anos e assets indisponíveis"""
+    if latency is not None:
+        _config["latency"] = latency
+    if seed is not None:
+        _config["seed"] = seed
+    if years is not None:
+        _config["years"] = list(years)
+    if unavailable_assets is not None:
+        _config["unavailable_assets"] = set(unavailable_assets)
+
+
+def reset_stats():
+    """Zera os contadores de idas e voltas e de bytes transferidos"""
+    with _lock:
+        stats["round_trips"] = 0
+        stats["bytes"] = 0
+
+
+def Initialize(*args, **kwargs):
+    return None
+
+
+def ServiceAccountCredentials(*args, **kwargs):
+    return None
+
+
+def _round_trip(payload_bytes):
+    with _lock:
+        stats["round_trips"] += 1
+        stats["bytes"] += payload_bytes
+    if _config["latency"]:
+        time.sleep(_config["latency"])
+
+
+def _resolve(value):
+    """Avalia recursivamente valores preguiçosos"""
+    if isinstance(value, _Lazy):
+        return _resolve(value._thunk())
+    if isinstance(value, dict):
+        return {k: _resolve(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_resolve(v) for v in value]
+    return value
+
+
+def _to_json(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Tipo não serializável: {type(value)}")
+
+
+class _Lazy:
+    """Valor calculado no 'servidor' apenas quando ``getInfo()`` é chamado"""
+
+    def __init__(self, thunk):
+        self._thunk = thunk
+
+    def getInfo(self):
+        # Como no cliente real, toda avaliação passa por ``data.computeValue``
+        return data.computeValue(self)
+
+
+class Number(_Lazy):
+    def __init__(self, value):
+        super().__init__(lambda: value)
+
+
+class String(_Lazy):
+    def __init__(self, value):
+        super().__init__(lambda: value)
+
+
+class List(_Lazy):
+    def __init__(self, values):
+        super().__init__(lambda: list(values))
+
+    def get(self, index):
+        return _Lazy(lambda: _resolve(self)[index])
+
+    def size(self):
+        return _Lazy(lambda: len(_resolve(self)))
+
+
+class Dictionary(_Lazy):
+    def __init__(self, values=None):
+        values = dict(values or {})
+        super().__init__(lambda: values)
+        self._values = values
+
+    def get(self, key):
+        return _Lazy(lambda: _resolve(self._values[key]))
+
+    def set(self, key, value):
+        values = dict(self._values)
+        values[key] = value
+        return Dictionary(values)
+
+    def keys(self):
+        return List(sorted(self._values))
+
+
+class Geometry(_Lazy):
+    """Geometria simplificada: pontos, círculos (buffers) e retângulos em graus"""
+
+    def __init__(self, geo_json=None, _circles=None, _bbox=None):
+        if geo_json is not None:
+            geometry_type = geo_json.get("type")
+            if geometry_type == "Point":
+                lon, lat = geo_json["coordinates"][:2]
+                _circles = [(float(lon), float(lat), 0.0)]
+            elif geometry_type == "MultiPoint":
+                _circles = [(float(c[0]), float(c[1]), 0.0) for c in geo_json["coordinates"]]
+            elif geometry_type == "Polygon":
+                ring = np.asarray(geo_json["coordinates"][0], dtype=float)
+                _bbox = (ring[:, 0].min(), ring[:, 1].min(), ring[:, 0].max(), ring[:, 1].max())
+            else:
+                raise EEException(f"Tipo de geometria não suportado: {geometry_type}")
+        self._circles = _circles or []
+        self._bbox_override = _bbox
+        super().__init__(self._geo_json)
+
+    @staticmethod
+    def Point(coords, proj=None):
+        return Geometry({"type": "Point", "coordinates": list(coords)})
+
+    @staticmethod
+    def MultiPoint(coords, proj=None):
+        return Geometry({"type": "MultiPoint", "coordinates": [list(c) for c in coords]})
+
+    @staticmethod
+    def Rectangle(coords, proj=None, geodesic=None):
+        xmin, ymin, xmax, ymax = coords
+        return Geometry(_bbox=(xmin, ymin, xmax, ymax))
+
+    def buffer(self, distance, maxError=None, proj=None):
+        if self._bbox_override is not None:
+            # Retângulos (e polígonos, pelo retângulo envolvente) crescem pela distância
+            xmin, ymin, xmax, ymax = self._bbox_override
+            dlat = float(distance) / METERS_PER_DEGREE
+            dlon = float(distance) / (METERS_PER_DEGREE * math.cos(math.radians((ymin + ymax) / 2)))
+            return Geometry(_bbox=(xmin - dlon, ymin - dlat, xmax + dlon, ymax + dlat))
+        return Geometry(_circles=[(lon, lat, radius + float(distance))
+                                  for lon, lat, radius in self._circles])
+
+    def bounds(self, maxError=None, proj=None):
+        return Geometry(_bbox=self.bbox())
+
+    def centroid(self, maxError=None, proj=None):
+        xmin, ymin, xmax, ymax = self.bbox()
+        return Geometry.Point([(xmin + xmax) / 2, (ymin + ymax) / 2])
+
+    def bbox(self):
+        """Retângulo envolvente (xmin, ymin, xmax, ymax) em graus"""
+        if self._bbox_override is not None:
+            return tuple(float(v) for v in self._bbox_override)
+        boxes = []
+        for lon, lat, radius in self._circles:
+            dlat = radius / METERS_PER_DEGREE
+            dlon = radius / (METERS_PER_DEGREE * math.cos(math.radians(lat)))
+            boxes.append((lon - dlon, lat - dlat, lon + dlon, lat + dlat))
+        if not boxes:
+            raise EEException("Geometria vazia")
+        return (min(b[0] for b in boxes), min(b[1] for b in boxes),
+                max(b[2] for b in boxes), max(b[3] for b in boxes))
+
+    def contains_lonlat(self, lon, lat):
+        """Máscara booleana dos pontos (arrays lon/lat) dentro da geometria"""
+        if self._bbox_override is not None:
+            xmin, ymin, xmax, ymax = self._bbox_override
+            return (lon >= xmin) & (lon <= xmax) & (lat >= ymin) & (lat <= ymax)
+        inside = np.zeros(np.broadcast(lon, lat).shape, dtype=bool)
+        for c_lon, c_lat, radius in self._circles:
+            dx = (lon - c_lon) * METERS_PER_DEGREE * math.cos(math.radians(c_lat))
+            dy = (lat - c_lat) * METERS_PER_DEGREE
+            inside |= dx * dx + dy * dy <= radius * radius
+        return inside
+
+    def _geo_json(self):
+        if self._bbox_override is None and all(r == 0 for _, _, r in self._circles):
+            if len(self._circles) == 1:
+                lon, lat, _ = self._circles[0]
+                return {"type": "Point", "coordinates": [lon, lat]}
+            return {"type": "MultiPoint",
+                    "coordinates": [[lon, lat] for lon, lat, _ in self._circles]}
+        xmin, ymin, xmax, ymax = self.bbox()
+        return {"type": "Polygon", "coordinates": [[[xmin, ymin], [xmax, ymin], [xmax, ymax],
+                                                    [xmin, ymax], [xmin, ymin]]]}
+
+
+def _as_geometry(geometry):
+    if isinstance(geometry, Geometry):
+        return geometry
+    if isinstance(geometry, dict):
+        return Geometry(geometry)
+    if hasattr(geometry, "geometry"):
+        return geometry.geometry()
+    raise EEException(f"Geometria inválida: {geometry!r}")
+
+
+class Feature(_Lazy):
+    def __init__(self, geometry, properties=None):
+        if isinstance(geometry, dict) and geometry.get("type") == "Feature":
+            properties = geometry.get("properties") or {}
+            geometry = geometry.get("geometry")
+        self._geometry = _as_geometry(geometry) if geometry is not None else None
+        self._properties = dict(properties or {})
+        super().__init__(lambda: {
+            "type": "Feature",
+            "geometry": self._geometry._geo_json() if self._geometry is not None else None,
+            "properties": self._properties,
+        })
+
+    def geometry(self):
+        return self._geometry
+
+    def get(self, name):
+        return _Lazy(lambda: _resolve(self._properties.get(name)))
+
+    def set(self, name, value=None):
+        properties = dict(self._properties)
+        if isinstance(name, dict):
+            properties.update(name)
+        else:
+            properties[name] = value
+        return Feature(self._geometry, properties)
+
+    def toDictionary(self):
+        return Dictionary(self._properties)
+
+
+class FeatureCollection(_Lazy):
+    def __init__(self, features):
+        if isinstance(features, FeatureCollection):
+            features = features._features
+        if isinstance(features, dict) and features.get("type") == "FeatureCollection":
+            features = features.get("features", [])
+        if isinstance(features, (Feature, Geometry)):
+            features = [features]
+        self._features = [f if isinstance(f, Feature) else Feature(f) for f in features]
+        super().__init__(lambda: {"type": "FeatureCollection",
+                                  "features": [f._thunk() for f in self._features]})
+
+    def geometry(self, maxError=None):
+        geometries = [feature.geometry() for feature in self._features]
+        boxes = [g._bbox_override for g in geometries if g._bbox_override is not None]
+        if boxes:
+            # Polígonos são representados pelo retângulo envolvente da união
+            if len(boxes) != len(geometries):
+                raise EEException("União de pontos e polígonos não suportada no substituto local")
+            return Geometry(_bbox=(min(b[0] for b in boxes), min(b[1] for b in boxes),
+                                   max(b[2] for b in boxes), max(b[3] for b in boxes)))
+        circles = []
+        for geometry in geometries:
+            circles.extend(geometry._circles)
+        return Geometry(_circles=circles)
+
+    def map(self, fn):
+        return FeatureCollection([fn(f) for f in self._features])
+
+    def size(self):
+        return Number(len(self._features))
+
+    def aggregate_array(self, prop):
+        return _Lazy(lambda: [_resolve(f._properties.get(prop)) for f in self._features])
+
+    def toList(self, count, offset=0):
+        return List(self._features[offset:offset + count])
+
+
+class Reducer:
+    def __init__(self, name):
+        self.name = name
+
+    def unweighted(self):
+        # O substituto já conta pixels inteiros (centro dentro da geometria)
+        return self
+
+    @staticmethod
+    def toList():
+        return Reducer("toList")
+
+    @staticmethod
+    def frequencyHistogram():
+        return Reducer("frequencyHistogram")
+
+
+class _Data:
+    """Equivalente a ``ee.data`` (apenas ``computeValue`` e ``computePixels``)"""
+
+    max_bytes = 48 * 1024 * 1024
+    max_dimension = 32768
+
+    def computeValue(self, obj):
+        try:
+            value = _resolve(obj)
+        except EEException:
+            _round_trip(0)
+            raise
+        # Simula a serialização JSON da resposta do servidor
+        payload = json.dumps(value, default=_to_json)
+        _round_trip(len(payload))
+        return json.loads(payload)
+
+    def computePixels(self, params):
+        image = params["expression"]
+        grid = params["grid"]
+        width = grid["dimensions"]["width"]
+        height = grid["dimensions"]["height"]
+        transform = grid["affineTransform"]
+        bands = params.get("bandIds") or image._selected_bands()
+        if max(width, height) > self.max_dimension or width * height * len(bands) > self.max_bytes:
+            _round_trip(0)
+            raise EEException("Total request size must be less than or equal to 50331648 bytes.")
+
+        col0 = int(round((transform["translateX"] + 180.0) / PIXEL_SIZE_DEG))
+        row0 = int(round((90.0 - transform["translateY"]) / PIXEL_SIZE_DEG))
+        image._selected_bands()
+        array = np.zeros((height, width), dtype=[(band, np.uint8) for band in bands])
+        for band in bands:
+            array[band] = image.band_array(band, row0, row0 + height, col0, col0 + width)
+
+        if params.get("fileFormat") == "NUMPY_NDARRAY":
+            _round_trip(array.nbytes)
+            return array
+        buffer = io.BytesIO()
+        np.save(buffer, array, allow_pickle=False)
+        payload = buffer.getvalue()
+        _round_trip(len(payload))
+        return payload
+
+
+data = _Data()
+
+
+def _hash_blocks(rows, cols, block, salt):
+    """Hash inteiro determinístico por bloco de pixels"""
+    r = (rows // block).astype(np.uint64)
+    c = (cols // block).astype(np.uint64)
+    h = r * np.uint64(73856093) ^ c * np.uint64(19349663) ^ np.uint64(salt * 83492791 + 1)
+    h ^= h >> np.uint64(13)
+    h *= np.uint64(0x5bd1e995)
+    h ^= h >> np.uint64(15)
+    return h
+
+
+def synthetic_classes(rows, cols, year=YEARS[-1]):
+    """Classes MapBiomas sintéticas para índices globais de linha/coluna"""
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+    seed = _config["seed"]
+    with np.errstate(over="ignore"):
+        coarse = _hash_blocks(rows, cols, 29, seed)
+        fine = _hash_blocks(rows + 3, cols + 5, 7, seed + 1)
+        change = _hash_blocks(rows, cols, 11, seed + 2 + (year - YEARS[0]) // 8)
+    index = np.where(fine % np.uint64(5) == 0, fine, coarse) % np.uint64(len(CLASS_CODES))
+    classes = CLASS_CODES[index.astype(np.int64)]
+    # Parte dos blocos muda de classe ao longo dos anos
+    changed = change % np.uint64(9) == 0
+    shifted = CLASS_CODES[((index + np.uint64(4)) % np.uint64(len(CLASS_CODES))).astype(np.int64)]
+    return np.where(changed, shifted, classes).astype(np.uint8)
+
+
+def pixel_window(bbox):
+    """Faixa de linhas e colunas globais (início, fim exclusivo) que cobre o retângulo"""
+    xmin, ymin, xmax, ymax = bbox
+    row0 = int(math.floor((90.0 - ymax) / PIXEL_SIZE_DEG))
+    row1 = int(math.floor((90.0 - ymin) / PIXEL_SIZE_DEG)) + 1
+    col0 = int(math.floor((xmin + 180.0) / PIXEL_SIZE_DEG))
+    col1 = int(math.floor((xmax + 180.0) / PIXEL_SIZE_DEG)) + 1
+    return row0, row1, col0, col1
+
+
+def _pixel_centers(row0, row1, col0, col1):
+    lat = 90.0 - (np.arange(row0, row1) + 0.5) * PIXEL_SIZE_DEG
+    lon = -180.0 + (np.arange(col0, col1) + 0.5) * PIXEL_SIZE_DEG
+    return np.meshgrid(lon, lat)
+
+
+class Image(_Lazy):
+    def __init__(self, asset=None, _bands=None, _clip=None):
+        self._asset = asset
+        self._bands = _bands
+        self._clip = _clip
+        super().__init__(lambda: {"type": "Image", "id": self._asset,
+                                  "bands": [{"id": b} for b in self._band_list()]})
+
+    def _band_list(self):
+        if self._asset in _config["unavailable_assets"]:
+            raise EEException(f"Image.load: Image asset '{self._asset}' not found.")
+        if self._bands is not None:
+            return list(self._bands)
+        return [f"classification_{year}" for year in _config["years"]]
+
+    def bandNames(self):
+        return _Lazy(self._band_list)
+
+    def select(self, bands):
+        if isinstance(bands, str):
+            bands = [bands]
+        bands = list(_resolve(bands))
+
+        def check():
+            available = self._band_list()
+            missing = [b for b in bands if b not in available]
+            if missing:
+                raise EEException(f"Image.select: Pattern '{missing[0]}' did not match any bands.")
+            return bands
+
+        image = Image(self._asset, _bands=bands, _clip=self._clip)
+        image._check = check
+        return image
+
+    def reproject(self, crs=None, crsTransform=None, scale=None):
+        # O raster simulado já está na grade global do MapBiomas
+        image = Image(self._asset, _bands=self._bands, _clip=self._clip)
+        if hasattr(self, "_check"):
+            image._check = self._check
+        return image
+
+    def toUint8(self):
+        return self.reproject()
+
+    def clip(self, geometry):
+        return Image(self._asset, _bands=self._bands, _clip=_as_geometry(geometry))
+
+    def unmask(self, value=None, sameFootprint=True):
+        # Pixels fora do recorte já saem como 0
+        image = Image(self._asset, _bands=self._bands, _clip=self._clip)
+        if hasattr(self, "_check"):
+            image._check = self._check
+        return image
+
+    def band_array(self, band, row0, row1, col0, col1, default_value=0):
+        """Pixels da banda na janela global indicada (uso interno e benchmarks)"""
+        year = int(band.rsplit("_", 1)[-1]) if band.rsplit("_", 1)[-1].isdigit() else YEARS[-1]
+        rows, cols = np.mgrid[row0:row1, col0:col1]
+        values = synthetic_classes(rows, cols, year)
+        if self._clip is not None:
+            lon, lat = _pixel_centers(row0, row1, col0, col1)
+            values = np.where(self._clip.contains_lonlat(lon, lat), values, default_value)
+        return values.astype(np.uint8)
+
+    def _selected_bands(self):
+        check = getattr(self, "_check", None)
+        return check() if check is not None else self._band_list()
+
+    def sampleRectangle(self, region=None, properties=None, defaultValue=None, defaultArrayValue=None):
+        geometry = _as_geometry(region)
+
+        def band_values(band):
+            self._selected_bands()
+            row0, row1, col0, col1 = pixel_window(geometry.bbox())
+            n_pixels = (row1 - row0) * (col1 - col0)
+            if n_pixels > SAMPLE_RECTANGLE_MAX_PIXELS:
+                raise EEException(
+                    f"Too many pixels in sample; must be <= {SAMPLE_RECTANGLE_MAX_PIXELS}. Got {n_pixels}."
+                )
+            return self.band_array(band, row0, row1, col0, col1, defaultValue or 0)
+
+        def lazy_band(band):
+            return _Lazy(lambda: band_values(band))
+
+        properties = {}
+        for band in (self._bands if self._bands is not None else self._band_list()):
+            properties[band] = lazy_band(band)
+        return Feature(geometry, properties)
+
+    def reduceRegion(self, reducer, geometry=None, scale=None, crs=None, crsTransform=None,
+                     bestEffort=False, maxPixels=None, tileScale=1):
+        geometry = _as_geometry(geometry)
+
+        def reduce(band):
+            row0, row1, col0, col1 = pixel_window(geometry.bbox())
+            values = self.band_array(band, row0, row1, col0, col1)
+            lon, lat = _pixel_centers(row0, row1, col0, col1)
+            values = values[geometry.contains_lonlat(lon, lat)]
+            if reducer.name == "toList":
+                return values
+            if reducer.name == "frequencyHistogram":
+                classes, counts = np.unique(values, return_counts=True)
+                return {str(int(c)): int(n) for c, n in zip(classes, counts)}
+            raise EEException(f"Redutor não suportado: {reducer.name}")
+
+        def lazy_band(band):
+            return _Lazy(lambda: reduce(band))
+
+        bands = self._bands if self._bands is not None else self._band_list()
+        return Dictionary({band: lazy_band(band) for band in bands})
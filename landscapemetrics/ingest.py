@@ -0,0 +1,302 @@
+"""Leitura de arquivos de pontos (GeoJSON, CSV, GeoParquet) para GeoDataFrame.
+
+GeoJSON é lido de forma incremental: as features são decodificadas uma a uma a
+partir de blocos do arquivo, guardando só as coordenadas e as propriedades, e
+os pontos são criados de uma vez com ``points_from_xy``. CSV e GeoParquet são
+lidos como colunas. Conteúdos em memória (upload) são lidos diretamente, sem
+passar por um arquivo temporário.
+"""
+
+import io
+import json
+import logging
+import math
+import os
+import tempfile
+import uuid
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+GEOJSON_EXTENSIONS = {'.geojson', '.json'}
+CSV_EXTENSIONS = {'.csv', '.txt'}
+PARQUET_EXTENSIONS = {'.parquet', '.geoparquet'}
+
+# Colunas de coordenadas aceitas em CSV/Parquet (sem diferenciar maiúsculas)
+LON_COLUMNS = ('lon', 'longitude', 'long', 'lng', 'x')
+LAT_COLUMNS = ('lat', 'latitude', 'y')
+WKT_COLUMNS = ('geometry', 'wkt', 'geom')
+
+CHUNK_SIZE = 1024 * 1024
+_WHITESPACE = ' \t\r\n'
+
+
+class _JSONStream:
+    """Decodifica valores JSON de um arquivo texto lido em blocos"""
+
+    def __init__(self, text_file, chunk_size=CHUNK_SIZE):
+        self.file = text_file
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        if self.eof:
+            return False
+        data = self.file.read(self.chunk_size)
+        if not data:
+            self.eof = True
+            return False
+        # Descarta o que já foi consumido para manter o buffer pequeno
+        self.buffer = self.buffer[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self):
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                raise ValueError("Fim inesperado do GeoJSON")
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"GeoJSON inválido: esperado '{char}' na posição {self.pos}")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # Um número no fim do buffer pode continuar no próximo bloco
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                pass
+            if not self._fill():
+                value, self.pos = self.decoder.raw_decode(self.buffer, self.pos)
+                return value
+
+
+def iter_geojson_features(text_file, header=None, chunk_size=CHUNK_SIZE):
+    """Gera as features de uma FeatureCollection sem carregar o arquivo inteiro
+
+    Os demais membros do objeto (``type``, ``crs``, ``name``...) são
+    gravados em ``header``.
+    """
+    header = {} if header is None else header
+    stream = _JSONStream(text_file, chunk_size)
+    stream.expect('{')
+    while stream.peek() != '}':
+        key = stream.value()
+        stream.expect(':')
+        if key == 'features':
+            stream.expect('[')
+            while stream.peek() != ']':
+                yield stream.value()
+                if stream.peek() == ',':
+                    stream.pos += 1
+            stream.pos += 1
+        else:
+            header[key] = stream.value()
+        if stream.peek() == ',':
+            stream.pos += 1
+    if header.get('type') != 'FeatureCollection':
+        raise ValueError("O GeoJSON não é uma FeatureCollection")
+
+
+def _header_crs(header):
+    """CRS declarado no membro ``crs`` (GeoJSON antigo); o padrão é WGS84"""
+    name = (header.get('crs') or {}).get('properties', {}).get('name')
+    if not name or name.upper().endswith(('CRS84', '4326')):
+        return 'EPSG:4326'
+    return name
+
+
+def read_geojson_stream(text_file, chunk_size=CHUNK_SIZE):
+    """Lê uma FeatureCollection de forma incremental e retorna um GeoDataFrame
+
+    Pontos são criados de uma vez com ``points_from_xy``; outras geometrias
+    são convertidas individualmente.
+    """
+    import geopandas as gpd
+    import pandas as pd
+    import shapely.geometry
+
+    xs, ys, properties, others = [], [], [], {}
+    header = {}
+    for i, feature in enumerate(iter_geojson_features(text_file, header, chunk_size)):
+        geometry = feature.get('geometry') or {}
+        coords = geometry.get('coordinates') or []
+        if geometry.get('type') == 'Point' and len(coords) >= 2:
+            xs.append(coords[0])
+            ys.append(coords[1])
+        else:
+            xs.append(math.nan)
+            ys.append(math.nan)
+            others[i] = geometry
+        properties.append(feature.get('properties') or {})
+
+    if not properties:
+        raise ValueError("Nenhuma feature encontrada no GeoJSON")
+
+    geometries = gpd.points_from_xy(xs, ys)
+    if others:
+        geometries = gpd.GeoSeries(geometries)
+        for i, geometry in others.items():
+            geometries.iloc[i] = shapely.geometry.shape(geometry) if geometry else None
+
+    return gpd.GeoDataFrame(pd.DataFrame.from_records(properties), geometry=geometries,
+                            crs=_header_crs(header))
+
+
+def _find_column(columns, candidates):
+    lower = {str(c).lower(): c for c in columns}
+    for candidate in candidates:
+        if candidate in lower:
+            return lower[candidate]
+    return None
+
+
+def points_from_table(df, crs='EPSG:4326'):
+    """GeoDataFrame a partir de uma tabela com colunas lon/lat ou WKT"""
+    import geopandas as gpd
+
+    lon_column = _find_column(df.columns, LON_COLUMNS)
+    lat_column = _find_column(df.columns, LAT_COLUMNS)
+    if lon_column is not None and lat_column is not None:
+        geometry = gpd.points_from_xy(df[lon_column], df[lat_column])
+        return gpd.GeoDataFrame(df.drop(columns=[lon_column, lat_column]), geometry=geometry, crs=crs)
+
+    wkt_column = _find_column(df.columns, WKT_COLUMNS)
+    if wkt_column is not None:
+        geometry = gpd.GeoSeries.from_wkt(df[wkt_column])
+        return gpd.GeoDataFrame(df.drop(columns=[wkt_column]), geometry=geometry, crs=crs)
+
+    raise ValueError(f"Colunas de coordenadas não encontradas (esperado: {LON_COLUMNS} e {LAT_COLUMNS}, "
+                     f"ou WKT em {WKT_COLUMNS})")
+
+
+def read_points_csv(source, crs='EPSG:4326'):
+    """Lê um CSV de pontos; aceita ``;`` com vírgula decimal ou ``,`` com ponto decimal"""
+    import pandas as pd
+
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    if hasattr(source, 'read'):
+        first_line = source.readline()
+        source.seek(0)
+    else:
+        with open(source, 'rb') as f:
+            first_line = f.readline()
+    if isinstance(first_line, bytes):
+        first_line = first_line.decode('utf-8', errors='replace')
+
+    semicolon = first_line.count(';') > first_line.count(',')
+    df = pd.read_csv(source, sep=';' if semicolon else ',', decimal=',' if semicolon else '.')
+    return points_from_table(df, crs=crs)
+
+
+def read_points_parquet(source):
+    """Lê GeoParquet ou Parquet simples com colunas lon/lat"""
+    import geopandas as gpd
+    import pandas as pd
+
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    try:
+        return gpd.read_parquet(source)
+    except ValueError:
+        # Parquet sem metadados geográficos
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        return points_from_table(pd.read_parquet(source))
+
+
+def _finalize(gdf):
+    if gdf.empty:
+        raise ValueError("Arquivo de pontos vazio")
+
+    # Garante que tem CRS definido
+    if gdf.crs is None:
+        gdf = gdf.set_crs('EPSG:4326')
+
+    logger.info(f"Arquivo processado com sucesso: {len(gdf)} geometrias")
+    return gdf
+
+
+def _read_with_driver(path):
+    import geopandas as gpd
+
+    if Path(path).suffix.lower() == ".kml":
+        # Para KML, força o driver específico
+        try:
+            import fiona
+            fiona.supported_drivers['KML'] = 'rw'
+        except:
+            pass
+        return gpd.read_file(path, driver="KML")
+    return gpd.read_file(path)
+
+
+def read_points(path):
+    """Lê um arquivo de pontos e retorna um GeoDataFrame com CRS definido"""
+    file_extension = Path(path).suffix.lower()
+    if file_extension in CSV_EXTENSIONS:
+        return _finalize(read_points_csv(path))
+    if file_extension in PARQUET_EXTENSIONS:
+        return _finalize(read_points_parquet(path))
+
+    if file_extension in GEOJSON_EXTENSIONS:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return _finalize(read_geojson_stream(f))
+        except Exception as stream_error:
+            logger.warning(f"Leitura incremental falhou: {stream_error}. Tentando leitura padrão...")
+
+    return _finalize(_read_with_driver(path))
+
+
+def read_points_bytes(content, file_extension='.geojson'):
+    """Lê pontos de um conteúdo em memória
+
+    GeoJSON, CSV e Parquet são lidos direto da memória; outros formatos passam
+    por um arquivo temporário seguro.
+    """
+    file_extension = file_extension.lower()
+    if file_extension in CSV_EXTENSIONS:
+        return _finalize(read_points_csv(content))
+    if file_extension in PARQUET_EXTENSIONS:
+        return _finalize(read_points_parquet(content))
+    if file_extension in GEOJSON_EXTENSIONS:
+        try:
+            text_file = io.TextIOWrapper(io.BytesIO(content), encoding='utf-8')
+            return _finalize(read_geojson_stream(text_file))
+        except Exception as stream_error:
+            logger.warning(f"Leitura incremental falhou: {stream_error}. Tentando leitura padrão...")
+
+    safe_filename = f"{uuid.uuid4()}{file_extension}"
+    file_path = os.path.join(tempfile.gettempdir(), safe_filename)
+
+    # Garante que o caminho é seguro
+    temp_dir = Path(tempfile.gettempdir()).resolve()
+    if not str(Path(file_path).resolve()).startswith(str(temp_dir)):
+        raise ValueError("Caminho de arquivo inseguro")
+
+    try:
+        with open(file_path, "wb") as file:
+            file.write(content)
+        return _finalize(_read_with_driver(file_path))
+    finally:
+        # Remove arquivo temporário
+        if os.path.exists(file_path):
+            try:
+                os.remove(file_path)
+            except Exception as cleanup_error:
+                logger.warning(f"Erro ao limpar arquivo temporário: {cleanup_error}")
@@ -0,0 +1,236 @@
+"""Instrumentação por etapa (spans) do pipeline.
+
+Cada etapa é medida com ``span(nome)``: tempo de parede, chamadas ao Earth
+Engine, bytes binários recebidos, forma do array produzido e memória de pico.
+Os spans de uma execução são reunidos num ``Tracer`` e podem ser emitidos como
+JSON lines (``LANDSCAPEMETRICS_SPANS_FILE``) e acumulados em contadores no
+formato texto do Prometheus (``LANDSCAPEMETRICS_PROMETHEUS_FILE``, para o
+coletor textfile do node_exporter).
+
+Sem um ``Tracer`` ativo na thread, ``span`` não faz nada.
+
+Chamadas ao Earth Engine e bytes são atribuídos por contexto (ver
+``roundtrips``): cada span conta só as chamadas da própria execução, inclusive
+as feitas pelas threads de ``ContextThreadPoolExecutor``, e não as de sessões
+simultâneas.
+
+A memória, ao contrário, é medida no processo inteiro: o RSS de pico e o pico
+do ``tracemalloc`` (com ``python -X tracemalloc``) incluem as alocações de
+todas as threads, e ``tracemalloc.reset_peak`` zera o pico de todas elas. Com
+várias execuções simultâneas esses valores são um limite superior, não a
+memória da etapa.
+"""
+
+import datetime
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from .roundtrips import RoundTripCounter
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+SPANS_FILE_ENV = 'LANDSCAPEMETRICS_SPANS_FILE'
+PROMETHEUS_FILE_ENV = 'LANDSCAPEMETRICS_PROMETHEUS_FILE'
+
+_local = threading.local()
+_metrics_lock = threading.Lock()
+# (métrica, etapa) → valor acumulado no processo
+_counters = {}
+
+
+def peak_rss_mb():
+    """RSS máximo do processo em MB (None se indisponível)"""
+    if resource is None:
+        return None
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+class Span:
+    """Medidas de uma etapa; ``shape`` e ``attrs`` podem ser preenchidos dentro do bloco"""
+
+    def __init__(self, name, attrs=None):
+        self.name = name
+        self.attrs = dict(attrs or {})
+        self.shape = None
+        self.wall_s = None
+        self.ee_calls = 0
+        self.bytes = 0
+        # Medidas do processo inteiro, não só desta execução
+        self.peak_rss_mb = None
+        self.peak_traced_mb = None
+        self.error = None
+        self._traced_peak = 0
+
+    def set_array(self, array):
+        """Registra a forma do array produzido pela etapa"""
+        self.shape = list(getattr(array, 'shape', ()))
+        return array
+
+    def to_dict(self):
+        return {
+            'stage': self.name,
+            'wall_s': round(self.wall_s, 4) if self.wall_s is not None else None,
+            'ee_calls': self.ee_calls,
+            'bytes': self.bytes,
+            'shape': self.shape,
+            'peak_rss_mb': self.peak_rss_mb,
+            'peak_traced_mb': self.peak_traced_mb,
+            'error': self.error,
+            **self.attrs,
+        }
+
+
+def _fold_traced_peak(spans):
+    # Reparte o pico do tracemalloc entre os spans abertos antes de zerá-lo
+    if not tracemalloc.is_tracing() or not hasattr(tracemalloc, 'reset_peak'):
+        return
+    peak = tracemalloc.get_traced_memory()[1]
+    for open_span in spans:
+        open_span._traced_peak = max(open_span._traced_peak, peak)
+    tracemalloc.reset_peak()
+
+
+class Tracer:
+    """Spans de uma execução (uma rodada do app, um arquivo da linha de comando)
+
+    Uso::
+
+        with Tracer('cli') as tracer:
+            with span('extract') as s:
+                s.set_array(array)
+        tracer.spans
+    """
+
+    def __init__(self, run='execução'):
+        self.run = run
+        self.run_id = f"{datetime.datetime.now():%Y%m%dT%H%M%S}-{os.getpid()}-{id(self):x}"
+        self.spans = []
+        self._stack = []
+        self._previous = None
+
+    def start(self):
+        self._previous = getattr(_local, 'tracer', None)
+        _local.tracer = self
+        return self
+
+    def finish(self):
+        """Desativa o tracer e emite os spans (JSON lines e contadores Prometheus)"""
+        if getattr(_local, 'tracer', None) is self:
+            _local.tracer = self._previous
+        _record_counters(self.spans)
+        _emit(self)
+        return self.spans
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.finish()
+
+    @contextmanager
+    def span(self, name, **attrs):
+        current = Span(name, attrs)
+        _fold_traced_peak(self._stack)
+        self._stack.append(current)
+        # Contador do contexto atual: só as chamadas desta execução entram no span
+        counter = RoundTripCounter(label=name, log=False).start()
+        start = time.perf_counter()
+        try:
+            yield current
+        except BaseException as stage_error:
+            current.error = type(stage_error).__name__
+            raise
+        finally:
+            current.wall_s = time.perf_counter() - start
+            counter.stop()
+            current.ee_calls = counter.count
+            current.bytes = counter.bytes
+            _fold_traced_peak(self._stack)
+            self._stack.pop()
+            current.peak_rss_mb = peak_rss_mb()
+            if tracemalloc.is_tracing():
+                current.peak_traced_mb = round(current._traced_peak / 1024**2, 1)
+            self.spans.append(current)
+            logger.info(f"[{self.run}] {name}: {current.wall_s:.2f}s, {current.ee_calls} chamadas EE, "
+                        f"{current.bytes} bytes, forma {current.shape}")
+
+    def records(self):
+        """Spans como dicionários, na ordem em que terminaram"""
+        return [{'run': self.run, 'run_id': self.run_id, **s.to_dict()} for s in self.spans]
+
+    def table(self):
+        """Spans como DataFrame (para exibição)"""
+        import pandas as pd
+
+        return pd.DataFrame([s.to_dict() for s in self.spans])
+
+
+@contextmanager
+def span(name, **attrs):
+    """Mede uma etapa no tracer ativo da thread (ou não faz nada sem tracer)"""
+    tracer = getattr(_local, 'tracer', None)
+    if tracer is None:
+        yield Span(name, attrs)
+        return
+    with tracer.span(name, **attrs) as current:
+        yield current
+
+
+def _record_counters(spans):
+    with _metrics_lock:
+        for s in spans:
+            for metric, value in (('stage_runs_total', 1), ('stage_seconds_total', s.wall_s or 0),
+                                  ('stage_ee_calls_total', s.ee_calls), ('stage_bytes_total', s.bytes),
+                                  ('stage_errors_total', 1 if s.error else 0)):
+                _counters[(metric, s.name)] = _counters.get((metric, s.name), 0) + value
+
+
+def prometheus_text():
+    """Contadores acumulados no processo, no formato texto do Prometheus"""
+    with _metrics_lock:
+        counters = dict(_counters)
+    lines = []
+    for metric in sorted({m for m, _ in counters}):
+        lines.append(f"# TYPE landscapemetrics_{metric} counter")
+        for (name, stage), value in sorted(counters.items()):
+            if name == metric:
+                lines.append(f'landscapemetrics_{metric}{{stage="{stage}"}} {value:g}')
+    rss = peak_rss_mb()
+    if rss is not None:
+        lines.append("# TYPE landscapemetrics_peak_rss_megabytes gauge")
+        lines.append(f"landscapemetrics_peak_rss_megabytes {rss:g}")
+    return '\n'.join(lines) + '\n'
+
+
+def _emit(tracer):
+    spans_file = os.environ.get(SPANS_FILE_ENV)
+    if spans_file:
+        try:
+            with open(spans_file, 'a', encoding='utf-8') as f:
+                for record in tracer.records():
+                    f.write(json.dumps(record, default=str) + '\n')
+        except OSError as write_error:
+            logger.warning(f"Não foi possível gravar os spans em {spans_file}: {write_error}")
+
+    prometheus_file = os.environ.get(PROMETHEUS_FILE_ENV)
+    if prometheus_file:
+        try:
+            # Substituição atômica: o coletor nunca lê um arquivo pela metade
+            directory = os.path.dirname(os.path.abspath(prometheus_file))
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(prometheus_text())
+            os.replace(tmp_path, prometheus_file)
+        except OSError as write_error:
+            logger.warning(f"Não foi possível gravar as métricas em {prometheus_file}: {write_error}")
@@ -0,0 +1,475 @@
+"""Fila local de trabalhos em lote, persistida em SQLite.
+
+Um trabalho guarda os parâmetros (tipo, buffer, ano ou intervalo de anos,
+métricas) e a lista de pontos. Processos trabalhadores pegam os trabalhos da
+fila, processam os pontos pendentes em grupos de ``CHUNK_POINTS`` com o mesmo
+pipeline da linha de comando e gravam o resultado de cada ponto assim que o
+grupo termina. Assim o progresso sobrevive ao fechamento da aba do navegador e
+a falhas do processo: um trabalho cujo trabalhador parou de dar sinal de vida
+(``STALE_SECONDS``) volta para a fila e continua dos pontos ainda pendentes.
+
+Tipos de trabalho: ``batch`` (métricas de um ano), ``timeseries`` e
+``transitions`` (intervalo de anos).
+
+Linha de comando::
+
+    python -m landscapemetrics.jobs submit pontos.geojson --buffer 5000
+    python -m landscapemetrics.jobs worker --workers 2
+    python -m landscapemetrics.jobs status
+    python -m landscapemetrics.jobs results <id> -o metricas.parquet
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+
+import pandas as pd
+
+from .earthengine import namespaced_path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB = os.path.join(tempfile.gettempdir(), "landscapemetrics-jobs.sqlite3")
+JOB_KINDS = ('batch', 'timeseries', 'transitions')
+# Pontos processados entre dois salvamentos de progresso
+CHUNK_POINTS = 50
+HEARTBEAT_SECONDS = 15
+# Sem sinal de vida por mais que isso, o trabalho volta para a fila
+STALE_SECONDS = 120
+POLL_SECONDS = 2.0
+DEFAULT_JOB_WORKERS = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    done INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    heartbeat_at REAL
+);
+CREATE TABLE IF NOT EXISTS points (
+    job_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    point_id TEXT NOT NULL,
+    lon REAL NOT NULL,
+    lat REAL NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    result TEXT,
+    error TEXT,
+    PRIMARY KEY (job_id, idx)
+);
+CREATE INDEX IF NOT EXISTS points_pending ON points (job_id, status);
+"""
+
+
+def _json_value(value):
+    # Identificadores numpy (int64...) viram tipos nativos do Python
+    return value.item() if hasattr(value, 'item') else value
+
+
+def encode_table(table):
+    """Tabela em JSON ``split`` sem perda: floats com todos os dígitos (``repr``), não os 10 do pandas"""
+    return json.dumps(table.to_dict(orient='split', index=False), default=_json_value)
+
+
+def decode_table(result):
+    """Inverso de ``encode_table``"""
+    table = json.loads(result)
+    return pd.DataFrame(table['data'], columns=table['columns'])
+
+
+class JobQueue:
+    """Fila de trabalhos num arquivo SQLite, compartilhável entre processos"""
+
+    def __init__(self, path=None):
+        self.path = path or os.environ.get("LANDSCAPEMETRICS_JOBS_DB", namespaced_path(DEFAULT_DB))
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as connection:
+            connection.executescript(SCHEMA)
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return _Connection(connection)
+
+    def submit(self, gdf, buffer_dist, kind='batch', year=None, years=None, step=None, metrics=None,
+               id_column=None):
+        """Enfileira os pontos do GeoDataFrame e retorna o id do trabalho"""
+        from .batch import points_from_gdf
+
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Tipo de trabalho inválido: {kind} (use {JOB_KINDS})")
+        if kind != 'batch' and years is None:
+            raise ValueError(f"Trabalhos '{kind}' exigem um intervalo de anos")
+        points = points_from_gdf(gdf, id_column=id_column)
+        if not points:
+            raise ValueError("Nenhum ponto para processar")
+
+        job_id = uuid.uuid4().hex[:12]
+        params = {'buffer_dist': buffer_dist, 'year': year, 'years': list(years) if years else None,
+                  'step': step, 'metrics': list(metrics) if metrics else None}
+        with self._connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute(
+                "INSERT INTO jobs (id, kind, params, status, total, created_at) VALUES (?, ?, ?, 'queued', ?, ?)",
+                (job_id, kind, json.dumps(params), len(points), time.time()),
+            )
+            connection.executemany(
+                "INSERT INTO points (job_id, idx, point_id, lon, lat) VALUES (?, ?, ?, ?, ?)",
+                [(job_id, idx, json.dumps(_json_value(point_id)), lon, lat)
+                 for idx, (point_id, lon, lat) in enumerate(points)],
+            )
+            connection.execute("COMMIT")
+        logger.info(f"Trabalho {job_id} ({kind}) enfileirado: {len(points)} pontos")
+        return job_id
+
+    def status(self, job_id):
+        """Estado do trabalho como dicionário (ou ``None`` se não existir)"""
+        with self._connect() as connection:
+            row = connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['params'] = json.loads(job['params'])
+        job['progress'] = (job['done'] + job['failed']) / job['total'] if job['total'] else 1.0
+        return job
+
+    def list_jobs(self, limit=20):
+        """Trabalhos mais recentes, sem os parâmetros"""
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT id, kind, status, total, done, failed, created_at, finished_at FROM jobs "
+                "ORDER BY created_at DESC LIMIT ?", (limit,),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def cancel(self, job_id):
+        """Cancela um trabalho na fila ou em andamento (o trabalhador para no fim do grupo atual)"""
+        with self._connect() as connection:
+            connection.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status IN ('queued', 'running')",
+                (time.time(), job_id),
+            )
+
+    def resume(self, job_id):
+        """Devolve à fila um trabalho com falha ou cancelado; só os pontos pendentes são processados"""
+        with self._connect() as connection:
+            connection.execute(
+                "UPDATE jobs SET status = 'queued', error = NULL, finished_at = NULL, worker = NULL "
+                "WHERE id = ? AND status IN ('failed', 'cancelled')", (job_id,),
+            )
+
+    def iter_results(self, job_id):
+        """Gera as tabelas dos pontos concluídos, na ordem do arquivo"""
+        with self._connect() as connection:
+            cursor = connection.execute(
+                "SELECT result FROM points WHERE job_id = ? AND status = 'done' ORDER BY idx", (job_id,)
+            )
+            for (result,) in cursor:
+                yield decode_table(result)
+
+    def results(self, job_id):
+        """Resultados dos pontos concluídos numa única tabela"""
+        tables = list(self.iter_results(job_id))
+        return pd.concat(tables, ignore_index=True) if tables else pd.DataFrame()
+
+    def write_results(self, job_id, writer):
+        """Grava os resultados ponto a ponto num gravador de ``export``"""
+        for table in self.iter_results(job_id):
+            writer.write(table)
+
+    def failures(self, job_id):
+        """``{point_id: mensagem}`` dos pontos que falharam"""
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT point_id, error FROM points WHERE job_id = ? AND status = 'failed' ORDER BY idx", (job_id,)
+            ).fetchall()
+        return {json.loads(point_id): error for point_id, error in rows}
+
+    def claim(self, worker):
+        """Pega o trabalho mais antigo na fila, ou um em andamento sem sinal de vida"""
+        now = time.time()
+        with self._connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute(
+                "SELECT id, status FROM jobs WHERE status = 'queued' "
+                "OR (status = 'running' AND heartbeat_at < ?) ORDER BY created_at LIMIT 1",
+                (now - STALE_SECONDS,),
+            ).fetchone()
+            if row is None:
+                connection.execute("COMMIT")
+                return None
+            connection.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, attempts = attempts + 1, heartbeat_at = ?, "
+                "started_at = COALESCE(started_at, ?) WHERE id = ?",
+                (worker, now, now, row['id']),
+            )
+            connection.execute("COMMIT")
+        if row['status'] == 'running':
+            logger.warning(f"Trabalho {row['id']} retomado por {worker} (trabalhador anterior parou)")
+        return row['id']
+
+    def heartbeat(self, job_id, worker):
+        """Renova o sinal de vida; False se o trabalho não pertence mais ao trabalhador"""
+        with self._connect() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                (time.time(), job_id, worker),
+            )
+            return cursor.rowcount == 1
+
+    def pending_points(self, job_id, limit):
+        with self._connect() as connection:
+            return [
+                (row['idx'], json.loads(row['point_id']), row['lon'], row['lat'])
+                for row in connection.execute(
+                    "SELECT idx, point_id, lon, lat FROM points WHERE job_id = ? AND status = 'pending' "
+                    "ORDER BY idx LIMIT ?", (job_id, limit),
+                )
+            ]
+
+    def save_points(self, job_id, worker, results, failures):
+        """Grava os resultados (``{idx: tabela}``) e falhas (``{idx: erro}``) de um grupo numa transação"""
+        with self._connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            owner = connection.execute("SELECT worker, status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if owner is None or owner['worker'] != worker or owner['status'] != 'running':
+                connection.execute("ROLLBACK")
+                return False
+            connection.executemany(
+                "UPDATE points SET status = 'done', result = ? WHERE job_id = ? AND idx = ?",
+                [(encode_table(table), job_id, idx) for idx, table in results.items()],
+            )
+            connection.executemany(
+                "UPDATE points SET status = 'failed', error = ? WHERE job_id = ? AND idx = ?",
+                [(str(error), job_id, idx) for idx, error in failures.items()],
+            )
+            connection.execute(
+                "UPDATE jobs SET done = done + ?, failed = failed + ?, heartbeat_at = ? WHERE id = ?",
+                (len(results), len(failures), time.time(), job_id),
+            )
+            connection.execute("COMMIT")
+        return True
+
+    def finish(self, job_id, worker, error=None):
+        with self._connect() as connection:
+            connection.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ? AND worker = ? "
+                "AND status = 'running'",
+                ('failed' if error else 'done', error, time.time(), job_id, worker),
+            )
+
+
+class _Connection:
+    """Conexão SQLite fechada ao sair do bloco ``with`` (o ``with`` do sqlite3 não fecha)"""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self.connection
+
+    def __exit__(self, *exc_info):
+        self.connection.close()
+
+
+def _run_chunk(kind, params, chunk):
+    """Processa um grupo de pontos com o pipeline e separa o resultado por ponto"""
+    import geopandas as gpd
+
+    from .pipeline import run_pipeline, run_timeseries_pipeline, run_transitions_pipeline
+
+    gdf = gpd.GeoDataFrame(
+        {'_idx': [idx for idx, _, _, _ in chunk]},
+        geometry=gpd.points_from_xy([lon for _, _, lon, _ in chunk], [lat for _, _, _, lat in chunk]),
+        crs='EPSG:4326',
+    )
+    if kind == 'batch':
+        # Cada trabalhador já é um processo; as métricas são calculadas nele mesmo
+        result = run_pipeline(gdf, params['buffer_dist'], year=params['year'], id_column='_idx',
+                              metrics=params['metrics'], max_workers=1)
+    elif kind == 'timeseries':
+        result = run_timeseries_pipeline(gdf, params['buffer_dist'], *params['years'], id_column='_idx',
+                                         metrics=params['metrics'], max_workers=1)
+    else:
+        result = run_transitions_pipeline(gdf, params['buffer_dist'], *params['years'], step=params['step'],
+                                          id_column='_idx')
+
+    point_ids = {idx: point_id for idx, point_id, _, _ in chunk}
+    results = {}
+    for idx, table in result.table.groupby('point_id', sort=False):
+        table = table.reset_index(drop=True)
+        table['point_id'] = point_ids[int(idx)]
+        results[int(idx)] = table
+    failures = {int(idx): error for idx, error in result.failures.items()}
+    # Pontos sem tabela nem falha (ex.: nenhuma classe válida) contam como concluídos
+    for idx in point_ids:
+        if idx not in results and idx not in failures:
+            results[idx] = pd.DataFrame(columns=result.table.columns)
+    return results, failures
+
+
+def run_job(queue, job_id, worker, chunk_points=CHUNK_POINTS):
+    """Processa os pontos pendentes de um trabalho já reservado por ``worker``"""
+    job = queue.status(job_id)
+    kind, params = job['kind'], job['params']
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(HEARTBEAT_SECONDS):
+            if not queue.heartbeat(job_id, worker):
+                stop.set()
+
+    heartbeat = threading.Thread(target=beat, name=f"heartbeat-{job_id}", daemon=True)
+    heartbeat.start()
+    try:
+        while not stop.is_set():
+            chunk = queue.pending_points(job_id, chunk_points)
+            if not chunk:
+                queue.finish(job_id, worker)
+                logger.info(f"Trabalho {job_id} concluído")
+                return
+            results, failures = _run_chunk(kind, params, chunk)
+            if not queue.save_points(job_id, worker, results, failures):
+                logger.info(f"Trabalho {job_id} cancelado ou assumido por outro trabalhador")
+                return
+    except Exception as job_error:
+        logger.error(f"Trabalho {job_id} falhou: {job_error}")
+        queue.finish(job_id, worker, error=str(job_error))
+    finally:
+        stop.set()
+
+
+def worker_loop(db_path=None, credentials_json=None, offline=False, poll_seconds=POLL_SECONDS,
+                stop_when_idle=False):
+    """Laço de um processo trabalhador: pega trabalhos da fila e os processa"""
+    from .earthengine import initialize, set_ee
+
+    if offline:
+        from . import fake_ee
+        set_ee(fake_ee)
+    else:
+        initialize(credentials_json)
+    queue = JobQueue(db_path)
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    logger.info(f"Trabalhador {worker} aguardando trabalhos em {queue.path}")
+    while True:
+        job_id = queue.claim(worker)
+        if job_id is None:
+            if stop_when_idle:
+                return
+            time.sleep(poll_seconds)
+            continue
+        run_job(queue, job_id, worker)
+
+
+def start_workers(n_workers=DEFAULT_JOB_WORKERS, db_path=None, credentials_json=None, offline=False,
+                  stop_when_idle=False):
+    """Inicia ``n_workers`` processos trabalhadores (concorrência limitada) e retorna os processos"""
+    from .parallel import DEFAULT_MP_CONTEXT
+
+    context = multiprocessing.get_context(DEFAULT_MP_CONTEXT)
+    processes = []
+    for _ in range(n_workers):
+        process = context.Process(target=worker_loop,
+                                  args=(db_path, credentials_json, offline, POLL_SECONDS, stop_when_idle),
+                                  name="landscapemetrics-job-worker", daemon=True)
+        process.start()
+        processes.append(process)
+    return processes
+
+
+def main(argv=None):
+    from .export import open_writer
+    from .ingest import read_points
+
+    parser = argparse.ArgumentParser(prog="landscapemetrics.jobs", description="Fila local de trabalhos em lote")
+    parser.add_argument("--db", help="Arquivo SQLite da fila")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    submit = commands.add_parser("submit", help="Enfileira um arquivo de pontos")
+    submit.add_argument("input")
+    submit.add_argument("-b", "--buffer", type=int, default=5000)
+    submit.add_argument("--kind", choices=JOB_KINDS, default="batch")
+    submit.add_argument("-y", "--year", type=int)
+    submit.add_argument("--years", type=int, nargs=2, metavar=("INICIO", "FIM"))
+    submit.add_argument("--step", type=int)
+    submit.add_argument("--metrics", nargs="+")
+    submit.add_argument("--id-column")
+
+    worker = commands.add_parser("worker", help="Processa a fila")
+    worker.add_argument("--workers", type=int, default=DEFAULT_JOB_WORKERS)
+    worker.add_argument("--offline", action="store_true", help="Usa o substituto local do Earth Engine")
+    worker.add_argument("--once", action="store_true", help="Sai quando a fila esvaziar")
+
+    status = commands.add_parser("status", help="Estado dos trabalhos")
+    status.add_argument("job_id", nargs="?")
+
+    results = commands.add_parser("results", help="Exporta os resultados de um trabalho")
+    results.add_argument("job_id")
+    results.add_argument("-o", "--output", default="-")
+
+    cancel = commands.add_parser("cancel", help="Cancela um trabalho")
+    cancel.add_argument("job_id")
+
+    resume = commands.add_parser("resume", help="Devolve à fila um trabalho com falha ou cancelado")
+    resume.add_argument("job_id")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    queue = JobQueue(args.db)
+
+    if args.command == "submit":
+        print(queue.submit(read_points(args.input), args.buffer, kind=args.kind, year=args.year,
+                           years=args.years, step=args.step, metrics=args.metrics, id_column=args.id_column))
+    elif args.command == "worker":
+        if args.workers == 1:
+            worker_loop(queue.path, offline=args.offline, stop_when_idle=args.once)
+        else:
+            for process in start_workers(args.workers, queue.path, offline=args.offline,
+                                         stop_when_idle=args.once):
+                process.join()
+    elif args.command == "status":
+        jobs = [queue.status(args.job_id)] if args.job_id else queue.list_jobs()
+        for job in jobs:
+            if job is None:
+                print(f"Trabalho {args.job_id} não encontrado")
+                return 1
+            print(f"{job['id']}  {job['kind']:<11} {job['status']:<9} {job['done']}/{job['total']} "
+                  f"({job['failed']} falhas)")
+    elif args.command == "results":
+        with open_writer(args.output) as writer:
+            queue.write_results(args.job_id, writer)
+        for point_id, message in queue.failures(args.job_id).items():
+            logger.error(f"Ponto {point_id} falhou: {message}")
+    elif args.command == "cancel":
+        queue.cancel(args.job_id)
+    elif args.command == "resume":
+        queue.resume(args.job_id)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
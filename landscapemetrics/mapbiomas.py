@@ -0,0 +1,253 @@
+"""Assets, legenda e descoberta de bandas do MapBiomas"""
+
+import collections
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from .earthengine import get_ee, namespaced_path
+
+logger = logging.getLogger(__name__)
+
+# Validade da resolução de asset/anos em cache (s); após 80% dela renova em segundo plano
+SOURCE_TTL_SECONDS = 24 * 3600
+SOURCE_REFRESH_FRACTION = 0.8
+DEFAULT_SOURCE_CACHE = os.path.join(tempfile.gettempdir(), "landscapemetrics-mapbiomas-source.json")
+
+# Assets oficiais do MapBiomas, do mais recente para o mais antigo
+MAPBIOMAS_ASSETS = [
+    "projects/mapbiomas-public/assets/brazil/lulc/collection9/mapbiomas_collection90_integration_v1",
+    "projects/mapbiomas-public/assets/brazil/lulc/collection8/mapbiomas_collection80_integration_v1",
+    "projects/mapbiomas-workspace/public/collection7/mapbiomas_collection70_integration_v2",
+    "projects/mapbiomas-workspace/public/collection6/mapbiomas_collection60_integration_v1"
+]
+
+CLASSIFICATION_PREFIX = "classification_"
+
+# Dicionário de legendas MapBiomas completo
+LEGEND_KEYS = [
+    ' ',  # 0
+    'Floresta',  # 1
+    ' ',  # 2
+    'Formacao florestal',  # 3
+    'Savana',  # 4
+    'Mangue',  # 5
+    ' ', ' ', ' ',  # 6-8
+    'Silvicultura',  # 9
+    'Formação natural nao-florestal',  # 10
+    'Campo Alagado e Área Pantanosa',  # 11
+    'Campos',  # 12
+    'Outras formacoes nao-florestais',  # 13
+    'Agropecuaria',  # 14
+    'Pastagem',  # 15
+    ' ', ' ',  # 16-17
+    'Agricultura',  # 18
+    'Agricultura temporarias',  # 19
+    'Cana',  # 20
+    'Mosaico de Agricultura e Pastagem',  # 21
+    'Area nao Vegetada',  # 22
+    'Dunas',  # 23
+    'Area Urbanizada',  # 24
+    'Outras areas nao vegetadas',  # 25
+    'Agua',  # 26
+    'Nao Observado',  # 27
+    ' ',  # 28
+    'Afloramento rochoso',  # 29
+    'Mineracao',  # 30
+    'Aquicultura',  # 31
+    'Sal',  # 32
+    'Rio, lago e oceano',  # 33
+    ' ', ' ',  # 34-35
+    'Lavoura Perene',  # 36
+    ' ', ' ',  # 37-38
+    'Soja',  # 39
+    'Arroz',  # 40
+    'Outras culturas temporarias',  # 41
+    ' ', ' ', ' ', ' ',  # 42-45
+    'Cafe',  # 46
+    'Citrus',  # 47
+    'Outras lavouras perenes',  # 48
+    'Restinga arborea'  # 49
+]
+
+LEGEND_DICT = {key: name for key, name in enumerate(LEGEND_KEYS)}
+
+MapBiomasSource = collections.namedtuple(
+    "MapBiomasSource", ["image", "asset", "collection_number", "bands"]
+)
+
+
+def class_name(class_value):
+    """Nome da classe MapBiomas para um código de pixel"""
+    return LEGEND_DICT.get(int(class_value), f'Classe {class_value}')
+
+
+def collection_number_from_asset(asset):
+    """Número da coleção MapBiomas a partir do caminho do asset"""
+    for number in (9, 8, 7):
+        if f"collection{number}" in asset:
+            return number
+    return 6
+
+
+def parse_classification_years(bands):
+    """Extrai os anos das bandas ``classification_YYYY`` em ordem crescente"""
+    available_years = []
+    for band in bands:
+        if CLASSIFICATION_PREFIX in band:
+            year = band.replace(CLASSIFICATION_PREFIX, '')
+            if year.isdigit():
+                available_years.append(int(year))
+    return sorted(available_years)
+
+
+def latest_classification_band(source):
+    """Retorna (ano, banda) da classificação mais recente da fonte"""
+    available_years = parse_classification_years(source.bands)
+    if available_years:
+        latest_year = available_years[-1]
+    else:
+        latest_year = 2023 if source.collection_number >= 9 else 2022
+    return latest_year, f'{CLASSIFICATION_PREFIX}{latest_year}'
+
+
+def resolve_mapbiomas(assets=None, on_attempt=None):
+    """Testa os assets em ordem e retorna o primeiro disponível como ``MapBiomasSource``
+
+    ``on_attempt`` é chamado com o caminho de cada asset testado (útil para
+    mensagens de progresso na interface).
+    """
+    ee = get_ee()
+    for asset in assets or MAPBIOMAS_ASSETS:
+        try:
+            if on_attempt is not None:
+                on_attempt(asset)
+            image = ee.Image(asset)
+            bands = image.bandNames().getInfo()
+
+            if bands and len(bands) > 0:
+                return MapBiomasSource(
+                    image, asset, collection_number_from_asset(asset), bands
+                )
+
+        except Exception as asset_error:
+            logger.warning(f"Asset {asset} falhou: {asset_error}")
+            continue
+
+    raise ValueError("Nenhum asset MapBiomas disponível")
+
+
+class SourceResolver:
+    """Resolve o asset MapBiomas uma vez e reaproveita o resultado entre sessões
+
+    O resultado (asset, coleção e bandas) fica em memória e num arquivo JSON
+    compartilhado entre processos. Enquanto válido, ``get()`` não faz nenhuma
+    chamada ao Earth Engine. Perto do vencimento, ou já vencido, o valor em
+    cache continua sendo servido e a renovação roda numa thread em segundo
+    plano; só a primeira resolução (sem cache) é bloqueante.
+    """
+
+    def __init__(self, path=None, ttl=SOURCE_TTL_SECONDS, assets=None):
+        self.path = path or os.environ.get("LANDSCAPEMETRICS_SOURCE_CACHE",
+                                           namespaced_path(DEFAULT_SOURCE_CACHE))
+        self.ttl = ttl
+        self.assets = assets
+        self._entry = None
+        self._lock = threading.Lock()
+        self._refreshing = threading.Lock()
+
+    def _read_disk(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            if entry.get("asset") and entry.get("bands"):
+                return entry
+        except (FileNotFoundError, ValueError, OSError):
+            pass
+        return None
+
+    def _write_disk(self, entry):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self.path)
+        except OSError as write_error:
+            logger.warning(f"Não foi possível gravar o cache do asset: {write_error}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def refresh(self):
+        """Resolve o asset no Earth Engine e atualiza os caches em memória e em disco"""
+        source = resolve_mapbiomas(assets=self.assets)
+        entry = {
+            "asset": source.asset,
+            "collection_number": source.collection_number,
+            "bands": source.bands,
+            "resolved_at": time.time(),
+        }
+        with self._lock:
+            self._entry = entry
+        self._write_disk(entry)
+        logger.info(f"Asset MapBiomas resolvido: {source.asset} ({len(source.bands)} bandas)")
+        return entry
+
+    def _refresh_in_background(self):
+        if not self._refreshing.acquire(blocking=False):
+            return
+
+        def run():
+            try:
+                self.refresh()
+            except Exception as refresh_error:
+                logger.warning(f"Renovação do asset MapBiomas falhou: {refresh_error}")
+            finally:
+                self._refreshing.release()
+
+        threading.Thread(target=run, name="mapbiomas-source-refresh", daemon=True).start()
+
+    def _current_entry(self):
+        with self._lock:
+            entry = self._entry
+        disk_entry = self._read_disk()
+        if disk_entry and (entry is None or disk_entry["resolved_at"] > entry["resolved_at"]):
+            entry = disk_entry
+            with self._lock:
+                self._entry = entry
+        return entry
+
+    def get(self):
+        """Retorna a ``MapBiomasSource`` em cache (resolve de forma bloqueante só sem cache)"""
+        with self._lock:
+            entry = self._entry
+        if entry is None or self._age(entry) > self.ttl * SOURCE_REFRESH_FRACTION:
+            entry = self._current_entry()
+
+        if entry is None:
+            entry = self.refresh()
+        elif self._age(entry) > self.ttl * SOURCE_REFRESH_FRACTION:
+            self._refresh_in_background()
+
+        return MapBiomasSource(
+            get_ee().Image(entry["asset"]), entry["asset"], entry["collection_number"], entry["bands"]
+        )
+
+    @staticmethod
+    def _age(entry):
+        return time.time() - entry["resolved_at"]
+
+
+_default_resolver = None
+
+
+def get_mapbiomas_source():
+    """``MapBiomasSource`` do resolvedor compartilhado do processo"""
+    global _default_resolver
+    if _default_resolver is None:
+        _default_resolver = SourceResolver()
+    return _default_resolver.get()
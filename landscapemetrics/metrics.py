@@ -0,0 +1,62 @@
+"""Cálculo das métricas de classe com PyLandStats"""
+
+import hashlib
+import logging
+
+import numpy as np
+
+from .mapbiomas import class_name
+
+logger = logging.getLogger(__name__)
+
+RESOLUTION = (30, 30)
+
+# Valor sem dados do MapBiomas (também o nodata padrão do PyLandStats)
+NODATA = 0
+
+CLASS_METRICS = [
+    'total_area', 'proportion_of_landscape', 'number_of_patches',
+    'largest_patch_index', 'total_edge', 'landscape_shape_index',
+    'area_mn', 'perimeter_mn', 'perimeter_area_ratio_mn',
+    'shape_index_mn', 'fractal_dimension_mn', 'euclidean_nearest_neighbor_mn'
+]
+
+
+def prepare_array(np_arr_mb):
+    """Garante um array 2D com pelo menos 3×3 pixels (preenchendo com nodata)"""
+    np_arr_mb = np.asarray(np_arr_mb)
+    if np_arr_mb.shape[0] < 3 or np_arr_mb.shape[1] < 3:
+        np_arr_mb = np.pad(np_arr_mb, ((1, 1), (1, 1)), mode='constant', constant_values=NODATA)
+    return np_arr_mb
+
+
+def raster_key(np_arr_mb):
+    """Chave do conteúdo de um raster (forma, tipo e pixels) para caches"""
+    np_arr_mb = np.ascontiguousarray(np_arr_mb)
+    digest = hashlib.sha1(f"{np_arr_mb.shape}{np_arr_mb.dtype.str}".encode())
+    digest.update(np_arr_mb.data)
+    return digest.hexdigest()
+
+
+def build_landscape(np_arr_mb, res=RESOLUTION):
+    """Instancia ``pls.Landscape`` a partir do array de classes"""
+    # Importado sob demanda: o PyLandStats só é necessário quando já existe um raster
+    import pylandstats as pls
+
+    return pls.Landscape(prepare_array(np_arr_mb), res=res)
+
+
+def compute_class_metrics(np_arr_mb, metrics=None, res=RESOLUTION):
+    """Calcula as métricas de classe de um array MapBiomas
+
+    Retorna o DataFrame do PyLandStats indexado pelo código da classe.
+    """
+    ls = build_landscape(np_arr_mb, res=res)
+    return ls.compute_class_metrics_df(metrics=metrics or CLASS_METRICS)
+
+
+def label_classes(class_metrics_df):
+    """Substitui os códigos das classes pelos nomes da legenda MapBiomas"""
+    class_metrics_df = class_metrics_df.copy()
+    class_metrics_df.index = [class_name(x) for x in class_metrics_df.index]
+    return class_metrics_df
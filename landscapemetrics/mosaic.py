@@ -0,0 +1,199 @@
+"""Mosaico de blocos compartilhado entre buffers sobrepostos do modo lote.
+
+Pontos de campo costumam estar agrupados, e os buffers vizinhos se sobrepõem.
+Em vez de baixar o retângulo inteiro de cada ponto, as janelas são cobertas por
+blocos de uma grade fixa (alinhada à grade global de ``tiling``). Os blocos já
+baixados ficam num índice espacial — um dicionário indexado pela (linha,
+coluna) do bloco na grade — e só os ausentes vão ao Earth Engine, via
+computePixels (NPY) e em paralelo. Cada paisagem é montada a partir dos blocos compartilhados; assim o
+total de pixels transferidos acompanha a área da união dos buffers, e não a
+soma das áreas.
+
+Os pontos são percorridos em ordem de Morton (curva Z) e cada bloco é liberado
+depois do último ponto que o usa, o que mantém a memória limitada aos blocos da
+vizinhança atual.
+"""
+
+import collections
+import logging
+
+import numpy as np
+
+from .extraction import MAX_PIXELS_PER_REQUEST, _chunk_windows, _extract_chunk, iter_point_arrays
+from .tiling import buffer_window, window_pixels, window_shape
+
+logger = logging.getLogger(__name__)
+
+# Lado do bloco em relação ao lado da janela: blocos menores desperdiçam menos
+# pixels nas bordas da união, blocos maiores fazem menos requisições
+MOSAIC_TILE_FRACTION = 4
+MIN_MOSAIC_TILE = 32
+MAX_MOSAIC_TILE = 256
+# Só usa o mosaico se a união dos blocos for menor que esta fração da soma das janelas
+MOSAIC_MAX_RATIO = 0.8
+
+
+def mosaic_tile_size(windows):
+    """Lado do bloco para um conjunto de janelas (uma fração da maior janela)"""
+    side = max(max(window_shape(window)) for window in windows)
+    return int(min(MAX_MOSAIC_TILE, max(MIN_MOSAIC_TILE, side // MOSAIC_TILE_FRACTION)))
+
+
+def tile_keys(window, tile_size):
+    """Índices (linha, coluna) dos blocos da grade que cobrem a janela"""
+    row0, row1, col0, col1 = window
+    return [
+        (r, c)
+        for r in range(row0 // tile_size, (row1 - 1) // tile_size + 1)
+        for c in range(col0 // tile_size, (col1 - 1) // tile_size + 1)
+    ]
+
+
+def tile_window(key, tile_size):
+    """Janela de pixels de um bloco"""
+    r, c = key
+    return r * tile_size, (r + 1) * tile_size, c * tile_size, (c + 1) * tile_size
+
+
+def morton_key(key):
+    """Posição do bloco na curva Z (intercala os bits de linha e coluna)"""
+    r, c = key
+    code = 0
+    for bit in range(32):
+        code |= ((r >> bit) & 1) << (2 * bit + 1) | ((c >> bit) & 1) << (2 * bit)
+    return code
+
+
+def mosaic_plan(windows, tile_size=None):
+    """Resumo do mosaico para as janelas: lado do bloco, blocos e pixels com e sem mosaico"""
+    tile_size = tile_size or mosaic_tile_size(windows)
+    union = set()
+    for window in windows:
+        union.update(tile_keys(window, tile_size))
+    return {
+        'tile_size': tile_size,
+        'tiles': len(union),
+        'mosaic_pixels': len(union) * tile_size * tile_size,
+        'window_pixels': sum(window_pixels(window) for window in windows),
+    }
+
+
+class TileMosaic:
+    """Blocos de uma banda baixados sob demanda e compartilhados entre janelas"""
+
+    def __init__(self, image, band, tile_size, max_pixels_per_request=MAX_PIXELS_PER_REQUEST):
+        self.image = image
+        self.band = band
+        self.tile_size = tile_size
+        self.max_pixels_per_request = max_pixels_per_request
+        # (linha, coluna) do bloco → array; blocos que falharam → erro
+        self.tiles = {}
+        self.errors = {}
+        self.tiles_fetched = 0
+        self.requests = 0
+
+    @property
+    def pixels_fetched(self):
+        return self.tiles_fetched * self.tile_size * self.tile_size
+
+    def missing(self, keys):
+        """Blocos ainda não baixados (nem com falha), sem repetição"""
+        return [key for key in dict.fromkeys(keys) if key not in self.tiles and key not in self.errors]
+
+    def fetch(self, keys):
+        """Baixa os blocos ausentes em paralelo, em grupos que respeitam o orçamento de pixels"""
+        requested = [(key, tile_window(key, self.tile_size)) for key in self.missing(keys)]
+        for chunk in _chunk_windows(requested, self.max_pixels_per_request):
+            self.requests += len(chunk)
+            for key, array, error in _extract_chunk(self.image, self.band, chunk):
+                if array is None:
+                    self.errors[key] = error
+                    continue
+                self.tiles[key] = array
+                self.tiles_fetched += 1
+
+    def assemble(self, window):
+        """Monta o array da janela a partir dos blocos (que precisam estar baixados)"""
+        row0, row1, col0, col1 = window
+        mosaic = np.zeros(window_shape(window), dtype=np.uint8)
+        for key in tile_keys(window, self.tile_size):
+            if key in self.errors:
+                raise self.errors[key]
+            r0, r1, c0, c1 = tile_window(key, self.tile_size)
+            tile = self.tiles[key]
+            rs, re_ = max(r0, row0), min(r1, row1)
+            cs, ce = max(c0, col0), min(c1, col1)
+            mosaic[rs - row0:re_ - row0, cs - col0:ce - col0] = tile[rs - r0:re_ - r0, cs - c0:ce - c0]
+        return mosaic
+
+    def release(self, keys):
+        for key in keys:
+            self.tiles.pop(key, None)
+            self.errors.pop(key, None)
+
+
+def iter_mosaic_arrays(image, band, windows, tile_size=None, max_pixels_per_request=MAX_PIXELS_PER_REQUEST):
+    """Gera ``(point_id, array, erro)`` para ``windows`` (``(point_id, janela)``) usando blocos compartilhados
+
+    Os pontos saem em ordem espacial, não na ordem de entrada.
+    """
+    if not windows:
+        return
+    tile_size = tile_size or mosaic_tile_size([window for _, window in windows])
+    mosaic = TileMosaic(image, band, tile_size, max_pixels_per_request=max_pixels_per_request)
+    keys = {point_id: tile_keys(window, tile_size) for point_id, window in windows}
+    references = collections.Counter(key for point_keys in keys.values() for key in set(point_keys))
+    ordered = sorted(windows, key=lambda w: morton_key(keys[w[0]][len(keys[w[0]]) // 2]))
+
+    tile_pixels = tile_size * tile_size
+    start = 0
+    while start < len(ordered):
+        # Junta os próximos pontos até os blocos ausentes encherem o orçamento de pixels
+        end, pending = start, {}
+        while end < len(ordered):
+            new = [k for k in mosaic.missing(keys[ordered[end][0]]) if k not in pending]
+            if pending and (len(pending) + len(new)) * tile_pixels > max_pixels_per_request:
+                break
+            pending.update(dict.fromkeys(new))
+            end += 1
+        mosaic.fetch(list(pending))
+
+        for point_id, window in ordered[start:end]:
+            try:
+                yield point_id, mosaic.assemble(window), None
+            except Exception as tile_error:
+                logger.warning(f"Extração pelo mosaico falhou para o ponto {point_id}: {tile_error}")
+                yield point_id, None, tile_error
+            # Libera os blocos que nenhum ponto restante usa
+            released = []
+            for key in set(keys[point_id]):
+                references[key] -= 1
+                if references[key] == 0:
+                    released.append(key)
+            mosaic.release(released)
+        start = end
+
+    logger.info(f"Mosaico: {len(windows)} pontos, {mosaic.tiles_fetched} blocos de {tile_size}px "
+                f"({mosaic.pixels_fetched} pixels) em {mosaic.requests} requisições")
+
+
+def iter_shared_point_arrays(image, band, points, buffer_dist, max_pixels_per_request=MAX_PIXELS_PER_REQUEST,
+                             mosaic=None):
+    """Como ``iter_point_arrays``, mas usa o mosaico quando os buffers se sobrepõem
+
+    Com ``mosaic=None`` o mosaico é usado se a união dos blocos tiver menos de
+    ``MOSAIC_MAX_RATIO`` dos pixels da soma das janelas; ``True``/``False``
+    força a escolha.
+    """
+    windows = [(point_id, buffer_window(lon, lat, buffer_dist)) for point_id, lon, lat in points]
+    if not windows:
+        return
+    if mosaic is None:
+        plan = mosaic_plan([window for _, window in windows])
+        mosaic = plan['mosaic_pixels'] < MOSAIC_MAX_RATIO * plan['window_pixels']
+        logger.info(f"Mosaico {'ativado' if mosaic else 'desativado'}: união de {plan['mosaic_pixels']} pixels "
+                    f"contra {plan['window_pixels']} nas janelas")
+    if mosaic:
+        yield from iter_mosaic_arrays(image, band, windows, max_pixels_per_request=max_pixels_per_request)
+    else:
+        yield from iter_point_arrays(image, band, points, buffer_dist, max_pixels_per_request=max_pixels_per_request)
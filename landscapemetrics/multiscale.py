@@ -0,0 +1,107 @@
+"""Análise multiescala (escala de efeito): vários raios a partir de um único download.
+
+O buffer do maior raio é extraído uma vez. Cada raio é obtido localmente: a
+janela de ``tiling.buffer_window`` do raio é recortada e os pixels cujo centro
+fica fora do círculo recebem o valor nodata, de modo que todas as paisagens
+são circulares e concêntricas. A distância usa o mesmo ``METERS_PER_DEGREE``
+da janela, então o círculo de cada raio cabe exatamente na sua janela.
+"""
+
+import logging
+import math
+
+import numpy as np
+import pandas as pd
+
+from .cache import extract_buffer_cached
+from .mapbiomas import class_name
+from .instrumentation import span
+from .metrics import CLASS_METRICS, NODATA
+from .parallel import choose_workers, compute_metrics_parallel
+from .tiling import GRID_ORIGIN, METERS_PER_DEGREE, PIXEL_SIZE_DEG, buffer_window
+
+logger = logging.getLogger(__name__)
+
+LONG_COLUMNS = ['radius', 'class_value', 'class_name', 'metric', 'value']
+
+
+def radius_range(start, stop, step):
+    """Raios de ``start`` a ``stop`` (inclusivo) em passos de ``step`` metros"""
+    if step <= 0 or start <= 0 or stop < start:
+        raise ValueError(f"Intervalo de raios inválido: {start}-{stop}, passo {step}")
+    return list(range(start, stop + 1, step))
+
+
+def raster_offset(transform):
+    """Linha e coluna da grade global do canto superior esquerdo do raster"""
+    _, _, c, _, _, f = transform
+    return round((GRID_ORIGIN[1] - f) / PIXEL_SIZE_DEG), round((c - GRID_ORIGIN[0]) / PIXEL_SIZE_DEG)
+
+
+def distance_grid(transform, shape, lon, lat):
+    """Distância (m) do centro de cada pixel ao ponto, numa aproximação equirretangular"""
+    a, _, c, _, e, f = transform
+    rows, cols = shape
+    xs = c + (np.arange(cols) + 0.5) * a
+    ys = f + (np.arange(rows) + 0.5) * e
+    dx = (xs - lon) * METERS_PER_DEGREE * math.cos(math.radians(lat))
+    dy = (ys - lat) * METERS_PER_DEGREE
+    return np.hypot(dy[:, None], dx[None, :])
+
+
+def concentric_landscapes(raster, lon, lat, radii):
+    """Gera ``(raio, array)`` com a paisagem circular de cada raio
+
+    Recorta do raster a janela de ``buffer_window`` do raio e marca como nodata
+    os pixels fora do círculo.
+    """
+    row_offset, col_offset = raster_offset(raster.transform)
+    rows, cols = raster.array.shape
+    distances = distance_grid(raster.transform, raster.array.shape, lon, lat)
+    for radius in sorted(radii):
+        row0, row1, col0, col1 = buffer_window(lon, lat, radius)
+        row0, row1 = row0 - row_offset, row1 - row_offset
+        col0, col1 = col0 - col_offset, col1 - col_offset
+        if row0 < 0 or col0 < 0 or row1 > rows or col1 > cols:
+            raise ValueError(f"Janela do raio de {radius}m fora do raster extraído")
+        window = np.s_[row0:row1, col0:col1]
+        inside = distances[window] <= radius
+        if not inside.any():
+            raise ValueError(f"Raio de {radius}m menor que um pixel")
+        yield radius, np.where(inside, raster.array[window], NODATA).astype(np.uint8)
+
+
+def metrics_long(radius, class_metrics_df):
+    """Converte o DataFrame do PyLandStats de um raio para o formato longo"""
+    table = class_metrics_df.reset_index()
+    table = table.rename(columns={table.columns[0]: 'class_value'})
+    table = table.melt(id_vars=['class_value'], var_name='metric', value_name='value')
+    table.insert(0, 'radius', radius)
+    table.insert(2, 'class_name', [class_name(x) for x in table['class_value']])
+    return table
+
+
+def run_multiscale(source, band, lon, lat, radii, metrics=None, max_workers=None, cache=None):
+    """Métricas de classe para vários raios concêntricos com uma única extração
+
+    Retorna uma tabela longa raio × classe × métrica.
+    """
+    radii = sorted(set(radii))
+    if not radii:
+        raise ValueError("Nenhum raio informado")
+    with span('extract', radius=radii[-1]) as extract_span:
+        raster = extract_buffer_cached(source.image.select(band), source.asset, band, lon, lat, radii[-1],
+                                       cache=cache)
+        extract_span.set_array(raster.array)
+    logger.info(f"Multiescala: {len(radii)} raios ({radii[0]}-{radii[-1]}m), array {raster.array.shape}")
+
+    tables = {}
+    with span('multiscale_metrics', radii=len(radii)):
+        for radius, class_metrics_df, error in compute_metrics_parallel(
+                concentric_landscapes(raster, lon, lat, radii), metrics=metrics or CLASS_METRICS,
+                max_workers=choose_workers(len(radii), max_workers), chunksize=1):
+            if error is not None:
+                raise RuntimeError(f"Métricas falharam para o raio de {radius}m: {error}")
+            tables[radius] = metrics_long(radius, class_metrics_df)
+
+    return pd.concat([tables[radius] for radius in radii], ignore_index=True)
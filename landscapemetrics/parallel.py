@@ -0,0 +1,178 @@
+"""Cálculo paralelo de métricas de classe em várias paisagens.
+
+As paisagens são agrupadas em blocos (``chunksize``); cada bloco é copiado uma
+única vez para um segmento de memória compartilhada e os processos recebem
+apenas descritores (nome do segmento, deslocamento, forma, dtype), sem cópias
+serializadas dos arrays. Os resultados são devolvidos à medida que os blocos
+terminam, e o número de blocos em andamento é limitado para manter a memória
+estável com entradas grandes ou geradas sob demanda.
+"""
+
+import logging
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .metrics import CLASS_METRICS, RESOLUTION, compute_class_metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNKSIZE = 4
+# Abaixo disso o custo de iniciar os processos supera o ganho
+PARALLEL_MIN_LANDSCAPES = 8
+# Blocos em andamento por processo
+INFLIGHT_PER_WORKER = 2
+# 'spawn' evita herdar threads do processo pai (ex.: servidor do Streamlit)
+DEFAULT_MP_CONTEXT = 'spawn'
+
+
+def default_workers(n_tasks=None):
+    """Número de processos: núcleos disponíveis, limitado ao número de tarefas"""
+    workers = os.cpu_count() or 1
+    return max(1, min(workers, n_tasks)) if n_tasks else workers
+
+
+def choose_workers(n_tasks, max_workers=None):
+    """Processos para ``n_tasks`` paisagens; poucas paisagens são calculadas no próprio processo"""
+    if max_workers is not None:
+        return max(1, max_workers)
+    if n_tasks < PARALLEL_MIN_LANDSCAPES:
+        return 1
+    return default_workers(n_tasks)
+
+
+def _warm_up():
+    # Importa o PyLandStats uma vez por processo, fora do tempo das tarefas
+    import pylandstats  # noqa: F401
+
+
+def _compute_chunk(shm_name, descriptors, metrics, res):
+    """Executa no processo filho: calcula as métricas das paisagens de um bloco"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    results = []
+    try:
+        for key, offset, shape, dtype in descriptors:
+            array = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+            try:
+                results.append((key, compute_class_metrics(array, metrics=metrics, res=res), None))
+            except Exception as metrics_error:
+                results.append((key, None, f"{type(metrics_error).__name__}: {metrics_error}"))
+            finally:
+                del array
+    finally:
+        shm.close()
+    return results
+
+
+def _pack_chunk(chunk):
+    """Copia as paisagens de um bloco para um novo segmento de memória compartilhada"""
+    arrays = [np.ascontiguousarray(array) for _, array in chunk]
+    size = max(1, sum(array.nbytes for array in arrays))
+    shm = shared_memory.SharedMemory(create=True, size=size)
+    descriptors = []
+    offset = 0
+    for (key, _), array in zip(chunk, arrays):
+        view = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf, offset=offset)
+        view[...] = array
+        del view
+        descriptors.append((key, offset, array.shape, array.dtype.str))
+        offset += array.nbytes
+    return shm, descriptors
+
+
+def _release(shm):
+    shm.close()
+    shm.unlink()
+
+
+class MetricsExecutor:
+    """Pool de processos reutilizável para calcular métricas de muitas paisagens
+
+    Uso::
+
+        with MetricsExecutor(max_workers=8) as executor:
+            for key, class_metrics_df, error in executor.map(landscapes):
+                ...
+
+    ``landscapes`` é um iterável de tuplas ``(chave, array)``. Com
+    ``max_workers=1`` as métricas são calculadas no próprio processo.
+    """
+
+    def __init__(self, max_workers=None, chunksize=DEFAULT_CHUNKSIZE, mp_context=DEFAULT_MP_CONTEXT):
+        self.max_workers = max_workers or default_workers()
+        self.chunksize = max(1, chunksize)
+        self._pool = None
+        if self.max_workers > 1:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context(mp_context),
+                initializer=_warm_up,
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def map(self, landscapes, metrics=None, res=RESOLUTION):
+        """Gera ``(chave, DataFrame, erro)`` na ordem em que os blocos terminam"""
+        metrics = metrics or CLASS_METRICS
+        if self._pool is None:
+            for key, array in landscapes:
+                try:
+                    yield key, compute_class_metrics(array, metrics=metrics, res=res), None
+                except Exception as metrics_error:
+                    yield key, None, f"{type(metrics_error).__name__}: {metrics_error}"
+            return
+
+        max_inflight = self.max_workers * INFLIGHT_PER_WORKER
+        inflight = {}
+        try:
+            for chunk in _chunks(landscapes, self.chunksize):
+                while len(inflight) >= max_inflight:
+                    yield from self._collect(inflight, FIRST_COMPLETED)
+                shm, descriptors = _pack_chunk(chunk)
+                future = self._pool.submit(_compute_chunk, shm.name, descriptors, metrics, res)
+                inflight[future] = shm
+            while inflight:
+                yield from self._collect(inflight, FIRST_COMPLETED)
+        finally:
+            for future, shm in inflight.items():
+                future.cancel()
+            wait(list(inflight))
+            for shm in inflight.values():
+                _release(shm)
+
+    @staticmethod
+    def _collect(inflight, return_when):
+        done, _ = wait(list(inflight), return_when=return_when)
+        for future in done:
+            _release(inflight.pop(future))
+            yield from future.result()
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def compute_metrics_parallel(landscapes, metrics=None, max_workers=None, chunksize=DEFAULT_CHUNKSIZE,
+                             res=RESOLUTION):
+    """Calcula as métricas de ``(chave, array)`` em paralelo, gerando os resultados à medida que ficam prontos"""
+    with MetricsExecutor(max_workers=max_workers, chunksize=chunksize) as executor:
+        yield from executor.map(landscapes, metrics=metrics, res=res)
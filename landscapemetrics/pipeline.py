@@ -0,0 +1,142 @@
+"""Pipeline sem interface: arquivo → ROI → MapBiomas → PyLandStats → tabela de métricas.
+
+Pode ser usado em notebooks, cron jobs e workers sem sessão do Streamlit::
+
+    from landscapemetrics.earthengine import initialize
+    from landscapemetrics.pipeline import process_file
+
+    initialize()
+    result = process_file("pontos.geojson", buffer_dist=5000)
+    result.table.to_csv("metricas.csv", sep=";", decimal=",", index=False)
+"""
+
+import collections
+import logging
+
+import pandas as pd
+
+from .batch import points_from_gdf, run_batch
+from .change import run_transitions_batch
+from .composition import is_composition_only, run_composition
+from .export import InsertColumns
+from .extraction import MAX_PIXELS_PER_REQUEST
+from .ingest import read_points
+from .instrumentation import span
+from .mapbiomas import CLASSIFICATION_PREFIX, get_mapbiomas_source, latest_classification_band
+from .timeseries import LONG_COLUMNS, run_timeseries
+
+logger = logging.getLogger(__name__)
+
+PipelineResult = collections.namedtuple("PipelineResult", ["table", "failures", "year", "asset"])
+
+
+def select_band(source, year=None):
+    """Retorna (ano, banda) pedida, ou a mais recente quando ``year`` é None"""
+    if year is None:
+        return latest_classification_band(source)
+    band = f'{CLASSIFICATION_PREFIX}{year}'
+    if band not in source.bands:
+        raise ValueError(f"Ano {year} indisponível em {source.asset}")
+    return int(year), band
+
+
+def run_pipeline(gdf, buffer_dist, year=None, id_column=None, metrics=None,
+                 max_pixels_per_request=MAX_PIXELS_PER_REQUEST, writer=None, rasters=None, max_workers=None):
+    """Calcula as métricas de classe no buffer de cada ponto do GeoDataFrame
+
+    Se só forem pedidas métricas de composição (área e proporção), usa o
+    histograma calculado no servidor, sem baixar pixels; nesse caso polígonos
+    também são aceitos.
+
+    Com ``writer``/``rasters`` (ver ``export``) os resultados são gravados à
+    medida que ficam prontos e a tabela retornada fica vazia.
+    """
+    with span('mapbiomas_source'):
+        source = get_mapbiomas_source()
+    year, band = select_band(source, year)
+    year_writer = InsertColumns(writer, [(1, 'year', year)]) if writer is not None else None
+    if is_composition_only(metrics):
+        if rasters is not None:
+            logger.warning("Métricas de composição não baixam pixels; nenhum raster será exportado")
+        with span('composition', points=len(gdf)):
+            table, failures = run_composition(
+                gdf, buffer_dist, source.image.select(band), band, id_column=id_column, metrics=metrics
+            )
+        if year_writer is not None:
+            year_writer.write(table)
+            table = table.iloc[0:0]
+    else:
+        with span('batch', points=len(gdf)):
+            table, failures = run_batch(
+                gdf, buffer_dist, source.image.select(band), band,
+                id_column=id_column, metrics=metrics, max_pixels_per_request=max_pixels_per_request,
+                writer=year_writer, rasters=rasters, max_workers=max_workers
+            )
+    table.insert(1, 'year', year)
+    return PipelineResult(table, failures, year, source.asset)
+
+
+def run_timeseries_pipeline(gdf, buffer_dist, start_year=None, end_year=None, id_column=None,
+                            metrics=None, max_workers=None, writer=None):
+    """Série temporal (formato longo) no buffer de cada ponto do GeoDataFrame
+
+    Com ``writer`` a série de cada ponto é gravada assim que fica pronta.
+    """
+    with span('mapbiomas_source'):
+        source = get_mapbiomas_source()
+    tables = []
+    failures = {}
+    for point_id, lon, lat in points_from_gdf(gdf, id_column=id_column):
+        try:
+            table = run_timeseries(source, lon, lat, buffer_dist, start_year, end_year,
+                                   metrics=metrics, max_workers=max_workers)
+        except Exception as timeseries_error:
+            logger.warning(f"Série temporal falhou para o ponto {point_id}: {timeseries_error}")
+            failures[point_id] = str(timeseries_error)
+            continue
+        table.insert(0, 'point_id', point_id)
+        if writer is not None:
+            writer.write(table)
+            continue
+        tables.append(table)
+
+    table = pd.concat(tables, ignore_index=True) if tables else pd.DataFrame(columns=['point_id'] + LONG_COLUMNS)
+    return PipelineResult(table, failures, (start_year, end_year), source.asset)
+
+
+def run_transitions_pipeline(gdf, buffer_dist, start_year=None, end_year=None, step=None, id_column=None,
+                             writer=None):
+    """Transições de cobertura entre os anos do intervalo no buffer de cada ponto"""
+    with span('mapbiomas_source'):
+        source = get_mapbiomas_source()
+    with span('transitions', points=len(gdf)):
+        table, failures = run_transitions_batch(gdf, buffer_dist, source, start_year, end_year, step=step,
+                                                id_column=id_column, writer=writer)
+    return PipelineResult(table, failures, (start_year, end_year), source.asset)
+
+
+def process_file(path, buffer_dist, year=None, years=None, id_column=None, metrics=None,
+                 writer=None, rasters=None, transitions=False, step=None):
+    """Lê um arquivo de pontos e executa o pipeline completo
+
+    Com ``years=(início, fim)`` calcula a série temporal em vez de um único ano,
+    ou, com ``transitions=True``, as transições de cobertura entre os anos
+    (a cada ``step`` anos).
+    ``writer`` e ``rasters`` gravam os resultados de forma incremental (ver
+    ``export``); rasters não são exportados na série temporal.
+    """
+    with span('read_points'):
+        gdf = read_points(path)
+    logger.info(f"{path}: {len(gdf)} pontos, buffer de {buffer_dist}m")
+    if transitions:
+        if years is None:
+            raise ValueError("Transições exigem um intervalo de anos")
+        return run_transitions_pipeline(gdf, buffer_dist, years[0], years[1], step=step,
+                                        id_column=id_column, writer=writer)
+    if years is not None:
+        if rasters is not None:
+            logger.warning("Rasters não são exportados na série temporal")
+        return run_timeseries_pipeline(gdf, buffer_dist, years[0], years[1],
+                                       id_column=id_column, metrics=metrics, writer=writer)
+    return run_pipeline(gdf, buffer_dist, year=year, id_column=id_column, metrics=metrics,
+                        writer=writer, rasters=rasters)
@@ -0,0 +1,115 @@
+"""Renderização das classes do MapBiomas sem matplotlib.
+
+As cores ficam numa tabela de consulta (``CLASS_LUT``, 256 × 3 em uint8): a
+imagem RGB é obtida indexando a tabela com o raster de classes, numa única
+operação vetorizada, e codificada em PNG. A legenda usa os nomes de
+``LEGEND_DICT`` e só as classes presentes no raster.
+"""
+
+import io
+
+import numpy as np
+
+from .mapbiomas import LEGEND_DICT
+from .metrics import NODATA
+
+# Cores oficiais da legenda do MapBiomas (coleções 8 e 9)
+CLASS_COLORS = {
+    1: '#1f8d49',
+    3: '#1f8d49',
+    4: '#7dc975',
+    5: '#04381d',
+    9: '#7a5900',
+    10: '#d6bc74',
+    11: '#519799',
+    12: '#d6bc74',
+    13: '#d89f5c',
+    14: '#ffefc3',
+    15: '#edde8e',
+    18: '#e974ed',
+    19: '#c27ba0',
+    20: '#db7093',
+    21: '#ffefc3',
+    22: '#d4271e',
+    23: '#ffa07a',
+    24: '#d4271e',
+    25: '#db4d4f',
+    26: '#2532e4',
+    27: '#ffffff',
+    29: '#ffaa5f',
+    30: '#9c0027',
+    31: '#091077',
+    32: '#fc8114',
+    33: '#2532e4',
+    36: '#d082de',
+    39: '#f5b3c8',
+    40: '#c71585',
+    41: '#f54ca9',
+    46: '#d68fe2',
+    47: '#9932cc',
+    48: '#e6ccff',
+    49: '#02d659',
+}
+NODATA_COLOR = '#ffffff'
+# Classes fora da legenda
+UNKNOWN_COLOR = '#808080'
+
+
+def hex_to_rgb(color):
+    color = color.lstrip('#')
+    return tuple(int(color[i:i + 2], 16) for i in (0, 2, 4))
+
+
+def build_lut(colors=CLASS_COLORS):
+    """Tabela de cores 256 × 3 (uint8) indexada pelo código da classe"""
+    lut = np.tile(np.array(hex_to_rgb(UNKNOWN_COLOR), dtype=np.uint8), (256, 1))
+    lut[NODATA] = hex_to_rgb(NODATA_COLOR)
+    for class_value, color in colors.items():
+        lut[class_value] = hex_to_rgb(color)
+    return lut
+
+
+CLASS_LUT = build_lut()
+
+
+def render_rgb(np_arr_mb, lut=CLASS_LUT, scale=1):
+    """Imagem RGB (uint8) do raster de classes; ``scale`` amplia cada pixel"""
+    classes = np.asarray(np_arr_mb)
+    if classes.dtype != np.uint8:
+        classes = np.clip(classes, 0, 255).astype(np.uint8)
+    rgb = lut[classes]
+    if scale > 1:
+        rgb = rgb.repeat(scale, axis=0).repeat(scale, axis=1)
+    return rgb
+
+
+def render_png(np_arr_mb, lut=CLASS_LUT, scale=1):
+    """PNG do raster de classes, em bytes"""
+    from PIL import Image
+
+    png = io.BytesIO()
+    Image.fromarray(render_rgb(np_arr_mb, lut, scale), mode='RGB').save(png, format='PNG')
+    return png.getvalue()
+
+
+def legend_entries(np_arr_mb, legend=LEGEND_DICT, colors=CLASS_COLORS):
+    """``(código, nome, cor)`` das classes presentes no raster, sem nodata"""
+    entries = []
+    for class_value in np.unique(np_arr_mb):
+        class_value = int(class_value)
+        if class_value == NODATA:
+            continue
+        name = legend.get(class_value, '').strip() or f'Classe {class_value}'
+        entries.append((class_value, name, colors.get(class_value, UNKNOWN_COLOR)))
+    return entries
+
+
+def legend_html(entries):
+    """Legenda em HTML (quadrados de cor com o nome da classe)"""
+    items = [
+        f"<div style='display:flex;align-items:center;margin:2px 0'>"
+        f"<span style='width:14px;height:14px;background:{color};border:1px solid #555;"
+        f"margin-right:6px;display:inline-block'></span>{class_value} - {name}</div>"
+        for class_value, name, color in entries
+    ]
+    return "<div style='font-size:0.85em'>" + ''.join(items) + "</div>"
@@ -0,0 +1,363 @@
+"""Cliente ``ee`` de gravação e reprodução, para testes de carga e de regressão offline.
+
+Os objetos (``Image``, ``Geometry``, ``Feature``, ``Reducer``...) e seus métodos
+(``select``, ``buffer``, ``bounds``, ``sampleRectangle``, ``reduceRegion``...)
+apenas montam a expressão, como no cliente real. As idas ao servidor passam
+sempre por ``data.computeValue`` (``getInfo``) e ``data.computePixels``; só
+essas duas chamadas são gravadas e reproduzidas, indexadas pelo hash da
+expressão canônica.
+
+- ``record``: repassa as chamadas a outro cliente (``ee`` real ou ``fake_ee``)
+  e grava cada resposta (ou erro) em disco, com o tempo gasto;
+- ``replay``: responde do disco, sem rede nem credenciais, com latência
+  sintética configurável (fixa, proporcional ao tempo gravado e/ou à banda),
+  o que torna vazão e latência reproduzíveis numa máquina isolada. Uma
+  expressão sem gravação gera ``EEException``.
+
+Uso::
+
+    from landscapemetrics import replay_ee
+    from landscapemetrics.earthengine import set_ee
+
+    replay_ee.configure(mode='record', directory='gravacoes', inner='ee')
+    set_ee(replay_ee)          # ... executa o fluxo uma vez com o Earth Engine
+    replay_ee.configure(mode='replay', latency=0.2, jitter=0.3)
+
+Ou por variáveis de ambiente (inclusive no app)::
+
+    LANDSCAPEMETRICS_EE_BACKEND=replay LANDSCAPEMETRICS_REPLAY_MODE=replay \\
+        LANDSCAPEMETRICS_REPLAY_DIR=gravacoes LANDSCAPEMETRICS_REPLAY_LATENCY=0.2 streamlit run app.py
+
+Mapas do geemap precisam de objetos do cliente real e ficam indisponíveis.
+"""
+
+import hashlib
+import io
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+# Separa os caches em disco dos usados diretamente com o Earth Engine
+CACHE_NAMESPACE = "replay"
+MODES = ('record', 'replay')
+DEFAULT_DIRECTORY = os.path.join(tempfile.gettempdir(), "landscapemetrics-replay")
+
+_lock = threading.Lock()
+_config = {
+    "mode": os.environ.get("LANDSCAPEMETRICS_REPLAY_MODE", "replay"),
+    "directory": os.environ.get("LANDSCAPEMETRICS_REPLAY_DIR", DEFAULT_DIRECTORY),
+    "inner": os.environ.get("LANDSCAPEMETRICS_REPLAY_INNER", "ee"),
+    # Latência por ida ao servidor: fixa (s) + fração do tempo gravado + bytes / banda
+    "latency": float(os.environ.get("LANDSCAPEMETRICS_REPLAY_LATENCY", 0.0)),
+    "recorded_latency": float(os.environ.get("LANDSCAPEMETRICS_REPLAY_RECORDED_LATENCY", 0.0)),
+    "bandwidth": None,
+    "jitter": 0.0,
+}
+_random = random.Random(1)
+stats = {"round_trips": 0, "hits": 0, "misses": 0, "recorded": 0, "bytes": 0}
+
+
+class EEException(Exception):
+    pass
+
+
+def configure(mode=None, directory=None, inner=None, latency=None, recorded_latency=None,
+              bandwidth=None, jitter=None, seed=None):
+    """Ajusta modo, diretório, cliente gravado e a latência sintética da reprodução
+
+    ``inner`` é um módulo ``ee`` ou o nome de um cliente (``'ee'``/``'fake'``);
+    ``recorded_latency`` multiplica o tempo gravado de cada resposta;
+    ``bandwidth`` (bytes/s) acrescenta o tempo de transferência;
+    ``jitter`` varia cada atraso em ±fração, com sorteio reproduzível por ``seed``.
+    """
+    if mode is not None:
+        if mode not in MODES:
+            raise ValueError(f"Modo inválido: {mode} (use {MODES})")
+        _config["mode"] = mode
+    if directory is not None:
+        _config["directory"] = directory
+    if inner is not None:
+        _config["inner"] = inner
+    if latency is not None:
+        _config["latency"] = latency
+    if recorded_latency is not None:
+        _config["recorded_latency"] = recorded_latency
+    if bandwidth is not None:
+        _config["bandwidth"] = bandwidth or None
+    if jitter is not None:
+        _config["jitter"] = jitter
+    if seed is not None:
+        _random.seed(seed)
+
+
+def reset_stats():
+    """Zera os contadores de idas e voltas, acertos, faltas, gravações e bytes"""
+    with _lock:
+        for name in stats:
+            stats[name] = 0
+
+
+def _count(**amounts):
+    with _lock:
+        for name, amount in amounts.items():
+            stats[name] += amount
+
+
+def _recording():
+    return _config["mode"] == "record"
+
+
+def _inner():
+    """Cliente gravado (só no modo ``record``)"""
+    inner = _config["inner"]
+    if isinstance(inner, str):
+        from .earthengine import load_backend
+
+        if inner == "replay":
+            raise ValueError("O cliente gravado não pode ser o próprio replay")
+        inner = _config["inner"] = load_backend(inner)
+    return inner
+
+
+def Initialize(*args, **kwargs):
+    if _recording():
+        return _inner().Initialize(*args, **kwargs)
+    return None
+
+
+def ServiceAccountCredentials(*args, **kwargs):
+    if _recording():
+        return _inner().ServiceAccountCredentials(*args, **kwargs)
+    return None
+
+
+class _Node:
+    """Expressão do Earth Engine; no modo ``record`` também guarda o objeto do cliente gravado"""
+
+    def __init__(self, expression, inner=None):
+        self._expression = expression
+        self._inner = inner
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        function = getattr(self._inner, name) if self._inner is not None else None
+
+        def method(*args, **kwargs):
+            return _invoke(['call', self._expression, name], function, args, kwargs)
+
+        return method
+
+    def getInfo(self):
+        return data.computeValue(self)
+
+    def __repr__(self):
+        return f"<replay_ee {json.dumps(self._expression)[:120]}>"
+
+
+class _Class:
+    """Construtor e funções estáticas de uma classe do ``ee`` (``ee.Image(...)``, ``ee.Geometry.Point(...)``)"""
+
+    def __init__(self, name):
+        self._name = name
+
+    def _inner_class(self):
+        return getattr(_inner(), self._name) if _recording() else None
+
+    def __call__(self, *args, **kwargs):
+        return _invoke(['new', self._name], self._inner_class(), args, kwargs)
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        inner_class = self._inner_class()
+        function = getattr(inner_class, name) if inner_class is not None else None
+
+        def static(*args, **kwargs):
+            return _invoke(['static', self._name, name], function, args, kwargs)
+
+        return static
+
+
+def __getattr__(name):
+    # Qualquer classe do ``ee`` (Image, Geometry, Reducer, ...) é aceita
+    if name[:1].isupper():
+        return _Class(name)
+    raise AttributeError(name)
+
+
+def _canonical(value):
+    """Forma JSON estável de uma expressão (chave das gravações)"""
+    if isinstance(value, _Node):
+        return value._expression
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in sorted(value.items(), key=lambda item: str(item[0]))}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    if callable(value):
+        # Funções de ``map``: a expressão é a do resultado aplicado a um argumento simbólico
+        return ['function', _canonical(value(_Node(['argument'])))]
+    return value
+
+
+def _live(value):
+    """True se todos os nós do valor têm objeto do cliente gravado"""
+    if isinstance(value, _Node):
+        return value._inner is not None
+    if isinstance(value, dict):
+        return all(_live(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return all(_live(v) for v in value)
+    return True
+
+
+def _unwrap(value):
+    if isinstance(value, _Node):
+        return value._inner
+    if isinstance(value, dict):
+        return {k: _unwrap(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_unwrap(v) for v in value)
+    if callable(value) and not isinstance(value, _Class):
+        return lambda argument: _unwrap(value(_Node(['argument'], argument)))
+    return value
+
+
+def _invoke(head, function, args, kwargs):
+    expression = head + [_canonical(list(args)), _canonical(kwargs)]
+    inner = None
+    # Nós derivados do argumento simbólico de um ``map`` só têm expressão
+    if function is not None and _live(args) and _live(kwargs):
+        inner = function(*_unwrap(args), **_unwrap(kwargs))
+    return _Node(expression, inner)
+
+
+def request_key(request):
+    """Hash SHA-1 da requisição canônica"""
+    encoded = json.dumps(request, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha1(encoded.encode('utf-8')).hexdigest()
+
+
+def _paths(key):
+    base = os.path.join(_config["directory"], key[:2], key)
+    return f"{base}.json", f"{base}.npy"
+
+
+def _write_atomic(path, payload):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _record(request, call):
+    key = request_key(request)
+    meta_path, payload_path = _paths(key)
+    entry = {"request": request}
+    start = time.perf_counter()
+    try:
+        response = call()
+    except Exception as call_error:
+        entry.update(error=str(call_error), elapsed=time.perf_counter() - start)
+        _write_atomic(meta_path, json.dumps(entry).encode('utf-8'))
+        _count(round_trips=1, recorded=1)
+        raise
+    entry["elapsed"] = time.perf_counter() - start
+
+    # Pixels em NPY ficam num arquivo binário ao lado da descrição
+    nbytes = 0
+    if isinstance(response, (bytes, bytearray)):
+        entry["kind"] = "bytes"
+        payload = bytes(response)
+    elif isinstance(response, np.ndarray):
+        entry["kind"] = "ndarray"
+        buffer = io.BytesIO()
+        np.save(buffer, response, allow_pickle=False)
+        payload = buffer.getvalue()
+    else:
+        entry["kind"] = "value"
+        entry["value"] = response
+        payload = None
+    if payload is not None:
+        nbytes = len(payload)
+        _write_atomic(payload_path, payload)
+    entry["bytes"] = nbytes
+    _write_atomic(meta_path, json.dumps(entry).encode('utf-8'))
+    _count(round_trips=1, recorded=1, bytes=nbytes)
+    return response
+
+
+def _delay(entry):
+    delay = _config["latency"] + _config["recorded_latency"] * entry.get("elapsed", 0.0)
+    if _config["bandwidth"]:
+        delay += entry.get("bytes", 0) / _config["bandwidth"]
+    if _config["jitter"] and delay:
+        with _lock:
+            delay *= 1 + _random.uniform(-_config["jitter"], _config["jitter"])
+    return max(0.0, delay)
+
+
+def _replay(request):
+    key = request_key(request)
+    meta_path, payload_path = _paths(key)
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+    except FileNotFoundError:
+        _count(round_trips=1, misses=1)
+        raise EEException(f"Resposta não gravada ({key}) em {_config['directory']}") from None
+
+    delay = _delay(entry)
+    if delay:
+        time.sleep(delay)
+    _count(round_trips=1, hits=1, bytes=entry.get("bytes", 0))
+    if "error" in entry:
+        raise EEException(entry["error"])
+    if entry["kind"] == "value":
+        return entry["value"]
+    with open(payload_path, "rb") as f:
+        payload = f.read()
+    if entry["kind"] == "ndarray":
+        return np.load(io.BytesIO(payload), allow_pickle=False)
+    return payload
+
+
+def _round_trip(request, call):
+    if _recording():
+        return _record(request, call)
+    return _replay(request)
+
+
+def _require_live(value):
+    if not _live(value):
+        raise EEException("Expressão sem objeto do cliente gravado (criada antes do modo record?)")
+    return _unwrap(value)
+
+
+class _Data:
+    """Equivalente a ``ee.data``: as duas chamadas que vão ao servidor"""
+
+    def computeValue(self, obj):
+        request = ['computeValue', _canonical(obj)]
+        return _round_trip(request, lambda: _inner().data.computeValue(_require_live(obj)))
+
+    def computePixels(self, params):
+        request = ['computePixels', _canonical(params)]
+        return _round_trip(request, lambda: _inner().data.computePixels(_require_live(params)))
+
+
+data = _Data()
@@ -0,0 +1,167 @@
+"""Orçamento de idas e voltas ao Earth Engine.
+
+``RoundTripCounter`` conta as chamadas bloqueantes ao servidor (``getInfo``,
+``computePixels``...) feitas enquanto está ativo, e pode falhar se um orçamento
+for excedido. ``Deferred`` acumula valores do servidor e resolve todos com um
+único ``getInfo`` sobre um ``ee.Dictionary``.
+
+Os contadores ativos ficam numa ``contextvars.ContextVar``: cada contador só
+vê as chamadas feitas no próprio contexto (a thread da sessão ou da execução),
+não as de outras sessões simultâneas. Threads auxiliares herdam os contadores
+quando criadas por ``ContextThreadPoolExecutor``, que copia o contexto de quem
+submete a tarefa.
+"""
+
+import contextvars
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .earthengine import get_ee
+
+logger = logging.getLogger(__name__)
+
+# Funções de ``ee.data`` que fazem uma requisição ao servidor
+ROUND_TRIP_FUNCTIONS = ('computeValue', 'computePixels', 'computeFeatures', 'getPixels', 'getInfo')
+
+_lock = threading.Lock()
+# Contadores ativos no contexto atual (os aninhados contam todos)
+_active = contextvars.ContextVar('landscapemetrics_round_trip_counters', default=())
+
+
+class RoundTripBudgetExceeded(RuntimeError):
+    """Mais idas e voltas do que o orçamento permite"""
+
+
+def _response_bytes(result):
+    """Tamanho das respostas binárias (NPY); respostas JSON não são medidas"""
+    if isinstance(result, (bytes, bytearray)):
+        return len(result)
+    return getattr(result, 'nbytes', 0)
+
+
+def _counting(name, function):
+    def wrapper(*args, **kwargs):
+        nbytes = 0
+        try:
+            result = function(*args, **kwargs)
+            nbytes = _response_bytes(result)
+            return result
+        finally:
+            for counter in _active.get():
+                counter._record(name, nbytes)
+
+    wrapper._counts_round_trips = True
+    wrapper.__wrapped__ = function
+    return wrapper
+
+
+def install(ee=None):
+    """Instala (uma única vez) os contadores nas funções de ``ee.data``"""
+    data = (ee or get_ee()).data
+    with _lock:
+        for name in ROUND_TRIP_FUNCTIONS:
+            function = getattr(data, name, None)
+            if function is not None and not getattr(function, '_counts_round_trips', False):
+                setattr(data, name, _counting(name, function))
+
+
+class RoundTripCounter:
+    """Conta as idas e voltas ao servidor dentro de um bloco ``with``
+
+    Uso::
+
+        with RoundTripCounter(budget=2) as round_trips:
+            run_pipeline(gdf, 5000)
+        print(round_trips.count, round_trips.calls)
+
+    Com ``budget``, sai com ``RoundTripBudgetExceeded`` se o bloco fizer mais
+    chamadas do que o permitido.
+    """
+
+    def __init__(self, budget=None, label='execução', log=True):
+        self.budget = budget
+        self.label = label
+        self.log = log
+        self.calls = {}
+        self.bytes = 0
+        self._count_lock = threading.Lock()
+
+    @property
+    def count(self):
+        return sum(self.calls.values())
+
+    def _record(self, name, nbytes=0):
+        with self._count_lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+            self.bytes += nbytes
+
+    def start(self):
+        install()
+        _active.set(_active.get() + (self,))
+        return self
+
+    def stop(self):
+        _active.set(tuple(counter for counter in _active.get() if counter is not self))
+        if self.log:
+            logger.info(f"Idas ao Earth Engine ({self.label}): {self.count} {self.calls}")
+
+    def check(self):
+        if self.budget is not None and self.count > self.budget:
+            raise RoundTripBudgetExceeded(
+                f"{self.label}: {self.count} idas ao Earth Engine, orçamento de {self.budget}"
+            )
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        if exc_type is None:
+            self.check()
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """``ThreadPoolExecutor`` que executa cada tarefa numa cópia do contexto de quem a submeteu
+
+    Assim as chamadas feitas pelas threads do pool contam nos contadores ativos
+    da execução que as disparou.
+    """
+
+    def submit(self, fn, /, *args, **kwargs):
+        # Uma cópia por tarefa: o mesmo contexto não pode estar ativo em duas threads
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+class Deferred:
+    """Valores do servidor resolvidos juntos, com uma única ida e volta
+
+    Os valores são registrados com ``add`` e avaliados na primeira leitura com
+    ``get``; registrar depois da resolução dispara uma nova resolução apenas
+    para os valores pendentes.
+    """
+
+    def __init__(self):
+        self._pending = {}
+        self._results = {}
+
+    def add(self, key, value):
+        self._pending[key] = value
+        return key
+
+    @property
+    def pending(self):
+        return list(self._pending)
+
+    def resolve(self):
+        """Avalia todos os valores pendentes num único ``ee.Dictionary``"""
+        if self._pending:
+            ee = get_ee()
+            self._results.update(ee.Dictionary(self._pending).getInfo())
+            self._pending = {}
+        return dict(self._results)
+
+    def get(self, key, default=None):
+        if key in self._pending:
+            self.resolve()
+        return self._results.get(key, default)
@@ -0,0 +1,374 @@
+"""Serviço HTTP de métricas de classe para um ponto, buffer e ano.
+
+Para outros serviços que precisam das métricas sem passar pela interface do
+Streamlit. Usa só a biblioteca padrão (``http.server``) e o mesmo caminho do
+app: cache de blocos em disco → PyLandStats.
+
+Endpoints::
+
+    GET  /v1/metrics?lon=-49.3&lat=-27.1&buffer=5000[&year=2023][&metrics=total_area,area_mn][&format=parquet]
+    POST /v1/metrics   (os mesmos parâmetros num objeto JSON)
+    GET  /health
+    GET  /stats
+
+Requisições simultâneas para a mesma paisagem (asset, banda, janela de pixels
+do buffer e métricas) são agrupadas: só a primeira baixa o raster e calcula as
+métricas, as demais esperam e recebem o mesmo resultado. Pontos diferentes
+que caem na mesma janela da grade também são agrupados, pois o raster é o
+mesmo.
+
+Contrapressão: no máximo ``max_computations`` cálculos distintos rodam ao
+mesmo tempo; um cálculo que não consegue vaga em ``queue_timeout`` segundos,
+ou uma requisição que chega com ``max_requests`` já abertas, recebe 503 com
+``Retry-After``.
+
+Teste local, sem Earth Engine::
+
+    python -m landscapemetrics.service --offline --port 8080
+"""
+
+import argparse
+import json
+import logging
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from .cache import extract_window_cached
+from .earthengine import initialize, set_ee
+from .export import table_bytes
+from .mapbiomas import class_name, get_mapbiomas_source
+from .metrics import CLASS_METRICS, compute_class_metrics
+from .pipeline import select_band
+from .tiling import buffer_window, window_shape
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8080
+MIN_BUFFER = 100
+MAX_BUFFER = 10000
+# Cálculos distintos simultâneos (cada um faz as próprias chamadas ao Earth Engine)
+MAX_COMPUTATIONS = 4
+# Requisições abertas, incluindo as que esperam um cálculo agrupado
+MAX_REQUESTS = 256
+QUEUE_TIMEOUT = 30.0
+RETRY_AFTER_SECONDS = 5
+RESPONSE_FORMATS = {'json': 'application/json', 'parquet': 'application/vnd.apache.parquet'}
+
+
+class Overloaded(RuntimeError):
+    """Serviço sem vaga para mais uma requisição ou cálculo"""
+
+
+class InvalidRequest(ValueError):
+    """Requisição válida na forma, mas que não corresponde a dados disponíveis (ex.: ano)"""
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Executa uma só vez as chamadas simultâneas com a mesma chave
+
+    ``do`` retorna ``(resultado, agrupada)``; ``agrupada`` é True para as
+    chamadas que só esperaram o resultado de outra. Nada fica em cache depois
+    que a chamada termina.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, function):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = function()
+        except Exception as call_error:
+            call.error = call_error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+
+def parse_request(params):
+    """Valida os parâmetros (strings da query ou valores do JSON) e retorna um dicionário"""
+    def number(name, cast, required=True):
+        value = params.get(name)
+        if value in (None, ''):
+            if required:
+                raise ValueError(f"Parâmetro obrigatório ausente: {name}")
+            return None
+        try:
+            return cast(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Parâmetro inválido: {name}={value!r}") from None
+
+    lon, lat = number('lon', float), number('lat', float)
+    if not (-180 <= lon <= 180 and -90 <= lat <= 90):
+        raise ValueError(f"Coordenadas fora do intervalo: {lon}, {lat}")
+    buffer_dist = number('buffer', int)
+    if not MIN_BUFFER <= buffer_dist <= MAX_BUFFER:
+        raise ValueError(f"Buffer deve estar entre {MIN_BUFFER} e {MAX_BUFFER} m")
+
+    metrics = params.get('metrics') or None
+    if isinstance(metrics, str):
+        metrics = [m.strip() for m in metrics.split(',') if m.strip()]
+    if metrics:
+        unknown = [m for m in metrics if m not in CLASS_METRICS]
+        if unknown:
+            raise ValueError(f"Métricas desconhecidas: {unknown}")
+
+    response_format = params.get('format') or 'json'
+    if response_format not in RESPONSE_FORMATS:
+        raise ValueError(f"Formato inválido: {response_format} (use {sorted(RESPONSE_FORMATS)})")
+
+    return {'lon': lon, 'lat': lat, 'buffer': buffer_dist, 'year': number('year', int, required=False),
+            'metrics': list(metrics) if metrics else None, 'format': response_format}
+
+
+class MetricsService:
+    """Cálculo das métricas com agrupamento de requisições e limites de carga"""
+
+    def __init__(self, max_computations=MAX_COMPUTATIONS, max_requests=MAX_REQUESTS,
+                 queue_timeout=QUEUE_TIMEOUT, cache=None):
+        self.max_computations = max_computations
+        self.max_requests = max_requests
+        self.queue_timeout = queue_timeout
+        self.cache = cache
+        self.flight = SingleFlight()
+        self._slots = threading.BoundedSemaphore(max_computations)
+        self._lock = threading.Lock()
+        self._open = 0
+        self._counters = {'requests': 0, 'computations': 0, 'coalesced': 0, 'rejected': 0, 'errors': 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+            counters['open_requests'] = self._open
+        counters['in_flight'] = self.flight.in_flight()
+        return counters
+
+    def metrics(self, request):
+        """Métricas de classe para uma requisição validada por ``parse_request``
+
+        Retorna um dicionário com a tabela (``table``) e os metadados da
+        paisagem; ``coalesced`` indica se o resultado veio de outra requisição.
+        """
+        opened = False
+        try:
+            with self._lock:
+                if self._open >= self.max_requests:
+                    raise Overloaded(f"{self._open} requisições abertas")
+                self._open += 1
+                self._counters['requests'] += 1
+            opened = True
+            # Fonte e banda vêm do cache do resolvedor, sem chamada ao Earth Engine
+            source = get_mapbiomas_source()
+            try:
+                year, band = select_band(source, request['year'])
+            except ValueError as year_error:
+                raise InvalidRequest(str(year_error)) from None
+            window = buffer_window(request['lon'], request['lat'], request['buffer'])
+            metrics = tuple(request['metrics'] or CLASS_METRICS)
+            key = (source.asset, band, window, metrics)
+            result, coalesced = self.flight.do(key, lambda: self._compute(source, band, window, metrics))
+        except Overloaded:
+            # Única contagem das rejeições (limite de requisições ou sem vaga para calcular)
+            self._count('rejected')
+            raise
+        finally:
+            if opened:
+                with self._lock:
+                    self._open -= 1
+        if coalesced:
+            self._count('coalesced')
+        return dict(result, year=year, band=band, coalesced=coalesced)
+
+    def _compute(self, source, band, window, metrics):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise Overloaded(f"Nenhum cálculo liberado em {self.queue_timeout}s")
+        try:
+            self._count('computations')
+            start = time.perf_counter()
+            np_arr_mb = extract_window_cached(source.image.select(band), source.asset, band, window,
+                                              cache=self.cache).array
+            table = compute_class_metrics(np_arr_mb, metrics=list(metrics)).reset_index()
+            table = table.rename(columns={table.columns[0]: 'class_value'})
+            table.insert(1, 'class_name', [class_name(x) for x in table['class_value']])
+            logger.info(f"Métricas {band} {window_shape(window)}: {time.perf_counter() - start:.2f}s")
+        finally:
+            self._slots.release()
+        return {'asset': source.asset, 'shape': list(window_shape(window)), 'table': table}
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Rotas HTTP do serviço (``self.server.service`` é o ``MetricsService``)"""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'landscapemetrics'
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == '/health':
+            self._send_json(HTTPStatus.OK, {'status': 'ok'})
+        elif url.path == '/stats':
+            self._send_json(HTTPStatus.OK, self.server.service.stats())
+        elif url.path == '/v1/metrics':
+            params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+            self._handle_metrics(params)
+        else:
+            self._send_error(HTTPStatus.NOT_FOUND, f"Rota inexistente: {url.path}")
+
+    def do_POST(self):
+        if urlsplit(self.path).path != '/v1/metrics':
+            self._send_error(HTTPStatus.NOT_FOUND, f"Rota inexistente: {self.path}")
+            return
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            params = json.loads(self.rfile.read(length) or b'{}')
+            if not isinstance(params, dict):
+                raise ValueError("O corpo deve ser um objeto JSON")
+        except ValueError as body_error:
+            self._send_error(HTTPStatus.BAD_REQUEST, f"JSON inválido: {body_error}")
+            return
+        self._handle_metrics(params)
+
+    def _handle_metrics(self, params):
+        service = self.server.service
+        try:
+            request = parse_request(params)
+        except ValueError as request_error:
+            self._send_error(HTTPStatus.BAD_REQUEST, str(request_error))
+            return
+        try:
+            result = service.metrics(request)
+        except Overloaded as overload:
+            self._send_error(HTTPStatus.SERVICE_UNAVAILABLE, f"Serviço sobrecarregado: {overload}",
+                             headers={'Retry-After': str(RETRY_AFTER_SECONDS)})
+            return
+        except InvalidRequest as request_error:
+            self._send_error(HTTPStatus.BAD_REQUEST, str(request_error))
+            return
+        except Exception as compute_error:
+            # Falhas na extração ou no cálculo (inclusive ValueError) vêm de trás do serviço
+            service._count('errors')
+            logger.error(f"Falha nas métricas de {params}: {compute_error}")
+            self._send_error(HTTPStatus.BAD_GATEWAY, f"Falha no Earth Engine: {compute_error}")
+            return
+
+        headers = {'X-Coalesced': str(result['coalesced']).lower()}
+        table = result['table']
+        if request['format'] == 'parquet':
+            self._send(HTTPStatus.OK, table_bytes(table, 'parquet'), RESPONSE_FORMATS['parquet'], headers)
+            return
+        self._send_json(HTTPStatus.OK, {
+            'asset': result['asset'], 'year': result['year'], 'band': result['band'],
+            'lon': request['lon'], 'lat': request['lat'], 'buffer': request['buffer'],
+            'shape': result['shape'], 'coalesced': result['coalesced'],
+            'metrics': json.loads(table.to_json(orient='records')),
+        }, headers)
+
+    def _send_json(self, status, payload, headers=None):
+        self._send(status, json.dumps(payload, ensure_ascii=False).encode('utf-8'),
+                   'application/json; charset=utf-8', headers)
+
+    def _send_error(self, status, message, headers=None):
+        self._send_json(status, {'error': message}, headers)
+
+    def _send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.info(f"{self.address_string()} {format % args}")
+
+
+def make_server(host=DEFAULT_HOST, port=DEFAULT_PORT, service=None):
+    """Servidor HTTP com uma thread por conexão (``port=0`` escolhe uma porta livre)"""
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    server.service = service or MetricsService()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="landscapemetrics.service",
+                                     description="Serviço HTTP de métricas de paisagem do MapBiomas")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-computations", type=int, default=MAX_COMPUTATIONS,
+                        help="Cálculos distintos simultâneos")
+    parser.add_argument("--max-requests", type=int, default=MAX_REQUESTS,
+                        help="Requisições abertas antes de responder 503")
+    parser.add_argument("--queue-timeout", type=float, default=QUEUE_TIMEOUT,
+                        help="Espera máxima (s) por uma vaga de cálculo")
+    parser.add_argument("--credentials", help="Arquivo JSON da conta de serviço do Earth Engine")
+    parser.add_argument("--offline", action="store_true",
+                        help="Usa o substituto local do Earth Engine (dados sintéticos)")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.offline:
+        from . import fake_ee
+        set_ee(fake_ee)
+    else:
+        credentials_json = None
+        if args.credentials:
+            with open(args.credentials, "r", encoding="utf-8") as f:
+                credentials_json = f.read()
+        initialize(credentials_json)
+
+    service = MetricsService(max_computations=args.max_computations, max_requests=args.max_requests,
+                             queue_timeout=args.queue_timeout)
+    server = make_server(args.host, args.port, service)
+    logger.warning(f"Servindo em http://{args.host}:{server.server_port}/v1/metrics")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,235 @@
+"""Extração em blocos para buffers maiores que o limite do sampleRectangle.
+
+Todas as janelas são definidas numa grade global fixa (EPSG:4326 com o tamanho
+de pixel do MapBiomas, ancorada em -180/90). A imagem é reprojetada para essa
+grade antes da amostragem, de modo que cada bloco tem exatamente as linhas e
+colunas esperadas e os blocos se encaixam sem sobreposição nem lacunas.
+"""
+
+import collections
+import logging
+import math
+
+import numpy as np
+
+from .earthengine import get_ee
+from .roundtrips import ContextThreadPoolExecutor
+from .transfer import NPY_TILE_SIZE, fetch_pixels, fetch_pixels_stack, npy_tile_size
+
+logger = logging.getLogger(__name__)
+
+PIXEL_SIZE_DEG = 0.00026949458523585647
+GRID_ORIGIN = (-180.0, 90.0)
+GRID_CRS = 'EPSG:4326'
+GRID_TRANSFORM = [PIXEL_SIZE_DEG, 0, GRID_ORIGIN[0], 0, -PIXEL_SIZE_DEG, GRID_ORIGIN[1]]
+
+# 512 × 512 = 262144, o limite de pixels de uma chamada sampleRectangle
+TILE_SIZE = 512
+MAX_TILE_WORKERS = 8
+
+# Transporte dos pixels: 'npy' (binário, uint8) ou 'json' (sampleRectangle)
+DEFAULT_TRANSPORT = 'npy'
+
+# Metros por grau usados para o retângulo envolvente (valor conservador)
+METERS_PER_DEGREE = 110000.0
+
+Raster = collections.namedtuple("Raster", ["array", "transform"])
+
+
+def buffer_bbox(lon, lat, buffer_dist):
+    """Retângulo envolvente (xmin, ymin, xmax, ymax) em graus de um buffer circular"""
+    dlat = buffer_dist / METERS_PER_DEGREE
+    dlon = buffer_dist / (METERS_PER_DEGREE * math.cos(math.radians(lat)))
+    return lon - dlon, lat - dlat, lon + dlon, lat + dlat
+
+
+def _coordinates(coordinates):
+    """Pares (lon, lat) de coordenadas GeoJSON aninhadas"""
+    if coordinates and isinstance(coordinates[0], (int, float)):
+        yield coordinates[0], coordinates[1]
+        return
+    for part in coordinates:
+        yield from _coordinates(part)
+
+
+def geometry_bbox(geometry, buffer_dist=0):
+    """Retângulo envolvente em graus de uma geometria GeoJSON ampliada por ``buffer_dist`` metros"""
+    points = np.asarray(list(_coordinates(geometry['coordinates'])), dtype=float)
+    if points.size == 0:
+        raise ValueError(f"Geometria {geometry['type']} sem coordenadas")
+    xmin, ymin = points.min(axis=0).tolist()
+    xmax, ymax = points.max(axis=0).tolist()
+    dlat = buffer_dist / METERS_PER_DEGREE
+    dlon = buffer_dist / (METERS_PER_DEGREE * math.cos(math.radians(max(abs(ymin), abs(ymax)))))
+    return xmin - dlon, ymin - dlat, xmax + dlon, ymax + dlat
+
+
+def bbox_window(bbox):
+    """Janela (row0, row1, col0, col1) da grade global que cobre o retângulo
+
+    ``row1`` e ``col1`` são exclusivos.
+    """
+    xmin, ymin, xmax, ymax = bbox
+    row0 = int(math.floor((GRID_ORIGIN[1] - ymax) / PIXEL_SIZE_DEG))
+    row1 = int(math.floor((GRID_ORIGIN[1] - ymin) / PIXEL_SIZE_DEG)) + 1
+    col0 = int(math.floor((xmin - GRID_ORIGIN[0]) / PIXEL_SIZE_DEG))
+    col1 = int(math.floor((xmax - GRID_ORIGIN[0]) / PIXEL_SIZE_DEG)) + 1
+    return row0, row1, col0, col1
+
+
+def buffer_window(lon, lat, buffer_dist):
+    """Janela da grade global que cobre o buffer de um ponto"""
+    return bbox_window(buffer_bbox(lon, lat, buffer_dist))
+
+
+def window_shape(window):
+    row0, row1, col0, col1 = window
+    return row1 - row0, col1 - col0
+
+
+def window_pixels(window):
+    rows, cols = window_shape(window)
+    return rows * cols
+
+
+def window_transform(window):
+    """Transformação afim (a, b, c, d, e, f) do canto superior esquerdo da janela"""
+    row0, _, col0, _ = window
+    return (PIXEL_SIZE_DEG, 0.0, GRID_ORIGIN[0] + col0 * PIXEL_SIZE_DEG,
+            0.0, -PIXEL_SIZE_DEG, GRID_ORIGIN[1] - row0 * PIXEL_SIZE_DEG)
+
+
+def split_window(window, tile_size=TILE_SIZE):
+    """Divide a janela em blocos de no máximo ``tile_size`` × ``tile_size`` pixels"""
+    row0, row1, col0, col1 = window
+    return [
+        (r, min(r + tile_size, row1), c, min(c + tile_size, col1))
+        for r in range(row0, row1, tile_size)
+        for c in range(col0, col1, tile_size)
+    ]
+
+
+def window_rectangle(window):
+    """Retângulo do Earth Engine que seleciona exatamente os pixels da janela
+
+    As bordas ficam um quarto de pixel para dentro, evitando ambiguidade na
+    borda entre pixels vizinhos.
+    """
+    ee = get_ee()
+    row0, row1, col0, col1 = window
+    inset = 0.25 * PIXEL_SIZE_DEG
+    xmin = GRID_ORIGIN[0] + col0 * PIXEL_SIZE_DEG + inset
+    xmax = GRID_ORIGIN[0] + col1 * PIXEL_SIZE_DEG - inset
+    ymax = GRID_ORIGIN[1] - row0 * PIXEL_SIZE_DEG - inset
+    ymin = GRID_ORIGIN[1] - row1 * PIXEL_SIZE_DEG + inset
+    return ee.Geometry.Rectangle([xmin, ymin, xmax, ymax], proj=GRID_CRS, geodesic=False)
+
+
+def grid_image(image):
+    """Reprojeta a imagem para a grade global fixa"""
+    return image.reproject(crs=GRID_CRS, crsTransform=GRID_TRANSFORM)
+
+
+def fetch_window(image, band, window):
+    """Extrai uma janela de até ``TILE_SIZE`` × ``TILE_SIZE`` pixels com sampleRectangle"""
+    sample_result = grid_image(image).sampleRectangle(region=window_rectangle(window), defaultValue=0)
+    tile = np.array(sample_result.get(band).getInfo())
+    if tile.shape != window_shape(window):
+        raise ValueError(f"Bloco com forma inesperada: {tile.shape} != {window_shape(window)}")
+    return tile
+
+
+def fetch_window_npy(image, band, window):
+    """Extrai uma janela como uint8 via computePixels em formato NPY"""
+    return fetch_pixels(image, band, window_transform(window), window_shape(window))
+
+
+TRANSPORTS = {
+    'json': (fetch_window, TILE_SIZE),
+    'npy': (fetch_window_npy, NPY_TILE_SIZE),
+}
+
+
+def extract_window(image, band, window, tile_size=None, max_workers=MAX_TILE_WORKERS,
+                   transport=DEFAULT_TRANSPORT):
+    """Extrai uma janela de qualquer tamanho buscando os blocos em paralelo
+
+    Retorna um ``Raster`` com o array montado e a transformação afim da janela.
+    Se o transporte binário falhar, repete a extração via JSON.
+    """
+    try:
+        return _extract_window(image, band, window, tile_size, max_workers, transport)
+    except Exception as transfer_error:
+        if transport == 'json':
+            raise
+        logger.warning(f"Transporte {transport} falhou ({transfer_error}); usando JSON")
+        return _extract_window(image, band, window, None, max_workers, 'json')
+
+
+def _extract_window(image, band, window, tile_size, max_workers, transport):
+    fetch, default_tile_size = TRANSPORTS[transport]
+    tiles = split_window(window, tile_size=tile_size or default_tile_size)
+    if len(tiles) == 1:
+        return Raster(fetch(image, band, window), window_transform(window))
+
+    logger.info(f"Extraindo janela {window_shape(window)} em {len(tiles)} blocos ({transport})")
+    with ContextThreadPoolExecutor(max_workers=min(max_workers, len(tiles))) as executor:
+        arrays = list(executor.map(lambda tile: fetch(image, band, tile), tiles))
+
+    row0, _, col0, _ = window
+    mosaic = np.zeros(window_shape(window), dtype=arrays[0].dtype)
+    for (r0, r1, c0, c1), tile in zip(tiles, arrays):
+        mosaic[r0 - row0:r1 - row0, c0 - col0:c1 - col0] = tile
+    return Raster(mosaic, window_transform(window))
+
+
+def extract_buffer(image, band, lon, lat, buffer_dist, tile_size=None, max_workers=MAX_TILE_WORKERS,
+                   transport=DEFAULT_TRANSPORT):
+    """Extrai o retângulo envolvente do buffer de um ponto, em blocos se necessário"""
+    return extract_window(image, band, buffer_window(lon, lat, buffer_dist),
+                          tile_size=tile_size, max_workers=max_workers, transport=transport)
+
+
+def extract_geometry(image, band, geometry, buffer_dist=0, max_workers=MAX_TILE_WORKERS):
+    """Extrai a janela envolvente de uma geometria GeoJSON (com buffer), em blocos se necessário
+
+    A imagem é recortada à geometria no servidor, então os pixels fora dela
+    chegam como 0 (nodata).
+    """
+    ee = get_ee()
+    region = ee.Geometry(geometry)
+    if buffer_dist:
+        region = region.buffer(buffer_dist)
+    masked = image.clip(region).unmask(0, False)
+    return extract_window(masked, band, bbox_window(geometry_bbox(geometry, buffer_dist)),
+                          max_workers=max_workers)
+
+
+def extract_window_stack(image, bands, window, max_workers=MAX_TILE_WORKERS):
+    """Extrai várias bandas de uma janela como array uint8 (banda, linha, coluna)
+
+    Cada bloco traz todas as bandas numa única chamada computePixels; o lado
+    do bloco diminui com o número de bandas para respeitar o limite de bytes.
+    """
+    tiles = split_window(window, tile_size=npy_tile_size(len(bands)))
+
+    def fetch(tile):
+        return fetch_pixels_stack(image, bands, window_transform(tile), window_shape(tile))
+
+    if len(tiles) == 1:
+        return Raster(fetch(window), window_transform(window))
+
+    logger.info(f"Extraindo {len(bands)} bandas da janela {window_shape(window)} em {len(tiles)} blocos")
+    with ContextThreadPoolExecutor(max_workers=min(max_workers, len(tiles))) as executor:
+        arrays = list(executor.map(fetch, tiles))
+
+    row0, _, col0, _ = window
+    mosaic = np.zeros((len(bands),) + window_shape(window), dtype=np.uint8)
+    for (r0, r1, c0, c1), tile in zip(tiles, arrays):
+        mosaic[:, r0 - row0:r1 - row0, c0 - col0:c1 - col0] = tile
+    return Raster(mosaic, window_transform(window))
+
+
+def extract_buffer_stack(image, bands, lon, lat, buffer_dist, max_workers=MAX_TILE_WORKERS):
+    """Extrai várias bandas do retângulo envolvente do buffer de um ponto"""
+    return extract_window_stack(image, bands, buffer_window(lon, lat, buffer_dist), max_workers=max_workers)
@@ -0,0 +1,74 @@
+"""Série temporal: todas as bandas ``classification_YYYY`` do buffer numa só requisição.
+
+As bandas do intervalo pedido são baixadas juntas como um array uint8
+``(ano, linha, coluna)`` e as métricas de classe de cada ano são calculadas em
+paralelo, resultando numa tabela longa ano × classe × métrica.
+"""
+
+import logging
+
+import pandas as pd
+
+from .mapbiomas import CLASSIFICATION_PREFIX, class_name, parse_classification_years
+from .instrumentation import span
+from .metrics import CLASS_METRICS
+from .parallel import choose_workers, compute_metrics_parallel
+from .tiling import extract_buffer_stack
+
+logger = logging.getLogger(__name__)
+
+LONG_COLUMNS = ['year', 'class_value', 'class_name', 'metric', 'value']
+
+
+def select_years(source, start_year=None, end_year=None):
+    """Anos disponíveis na fonte dentro do intervalo (inclusivo)"""
+    years = [
+        year for year in parse_classification_years(source.bands)
+        if (start_year is None or year >= start_year) and (end_year is None or year <= end_year)
+    ]
+    if not years:
+        raise ValueError(f"Nenhum ano disponível entre {start_year} e {end_year}")
+    return years
+
+
+def metrics_long(year, class_metrics_df):
+    """Converte o DataFrame do PyLandStats de um ano para o formato longo"""
+    table = class_metrics_df.reset_index()
+    table = table.rename(columns={table.columns[0]: 'class_value'})
+    table = table.melt(id_vars=['class_value'], var_name='metric', value_name='value')
+    table.insert(0, 'year', year)
+    table.insert(2, 'class_name', [class_name(x) for x in table['class_value']])
+    return table
+
+
+def compute_timeseries_metrics(stack, years, metrics=None, max_workers=None):
+    """Calcula as métricas de cada ano de um array ``(ano, linha, coluna)`` em paralelo
+
+    Séries curtas (ou ``max_workers=1``) são calculadas no próprio processo.
+    """
+    metrics = metrics or CLASS_METRICS
+    max_workers = choose_workers(len(years), max_workers)
+
+    tables = {}
+    for year, class_metrics_df, error in compute_metrics_parallel(
+            zip(years, stack), metrics=metrics, max_workers=max_workers, chunksize=1):
+        if error is not None:
+            raise RuntimeError(f"Métricas falharam para {year}: {error}")
+        tables[year] = metrics_long(year, class_metrics_df)
+    tables = [tables[year] for year in years]
+
+    if not tables:
+        return pd.DataFrame(columns=LONG_COLUMNS)
+    return pd.concat(tables, ignore_index=True)
+
+
+def run_timeseries(source, lon, lat, buffer_dist, start_year=None, end_year=None, metrics=None,
+                   max_workers=None):
+    """Extrai o buffer de um ponto para todos os anos do intervalo e calcula as métricas"""
+    years = select_years(source, start_year, end_year)
+    bands = [f'{CLASSIFICATION_PREFIX}{year}' for year in years]
+    with span('extract_stack') as extract_span:
+        stack = extract_span.set_array(extract_buffer_stack(source.image, bands, lon, lat, buffer_dist).array)
+    logger.info(f"Série temporal: {len(years)} anos, array {stack.shape}")
+    with span('timeseries_metrics', years=len(years)):
+        return compute_timeseries_metrics(stack, years, metrics=metrics, max_workers=max_workers)
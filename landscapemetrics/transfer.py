@@ -0,0 +1,86 @@
+"""Transferência binária de pixels (NPY) via ``ee.data.computePixels``.
+
+Em vez de ``sampleRectangle(...).getInfo()``, que devolve listas aninhadas de
+números JSON convertidas depois num array int64, os pixels chegam como bytes
+NPY de uma imagem uint8 e são decodificados direto num array uint8, sem listas
+intermediárias.
+"""
+
+import io
+import logging
+
+import numpy as np
+
+from .earthengine import get_ee
+
+logger = logging.getLogger(__name__)
+
+# computePixels aceita respostas de até 48 MB e no máximo 32768 pixels por dimensão
+NPY_TILE_SIZE = 4096
+NPY_MAX_BYTES = 32 * 1024 * 1024
+GRID_CRS = 'EPSG:4326'
+
+
+def npy_tile_size(n_bands=1):
+    """Lado do bloco para que uma requisição com ``n_bands`` bandas uint8 caiba no limite"""
+    return max(1, min(NPY_TILE_SIZE, int((NPY_MAX_BYTES / n_bands) ** 0.5)))
+
+
+def compute_pixels_request(image, band, transform, shape):
+    """Monta a requisição computePixels de uma janela da grade em formato NPY
+
+    ``band`` pode ser o nome de uma banda ou uma lista de bandas.
+    """
+    bands = [band] if isinstance(band, str) else list(band)
+    a, b, c, d, e, f = transform
+    rows, cols = shape
+    return {
+        'expression': image.select(bands).toUint8(),
+        'fileFormat': 'NPY',
+        'bandIds': bands,
+        'grid': {
+            'dimensions': {'width': int(cols), 'height': int(rows)},
+            'affineTransform': {
+                'scaleX': a, 'shearX': b, 'translateX': c,
+                'shearY': d, 'scaleY': e, 'translateY': f,
+            },
+            'crsCode': GRID_CRS,
+        },
+    }
+
+
+def decode_npy(payload, band):
+    """Decodifica bytes NPY (array estruturado por banda) num array uint8 2D"""
+    array = np.load(io.BytesIO(payload), allow_pickle=False)
+    if array.dtype.names:
+        array = array[band]
+    return np.ascontiguousarray(array, dtype=np.uint8)
+
+
+def decode_npy_stack(payload, bands):
+    """Decodifica bytes NPY de várias bandas num array uint8 3D (banda, linha, coluna)"""
+    array = np.load(io.BytesIO(payload), allow_pickle=False)
+    stack = np.empty((len(bands),) + array.shape, dtype=np.uint8)
+    for i, band in enumerate(bands):
+        stack[i] = array[band]
+    return stack
+
+
+def fetch_pixels(image, band, transform, shape):
+    """Busca uma janela da grade como uint8 com uma chamada computePixels"""
+    ee = get_ee()
+    payload = ee.data.computePixels(compute_pixels_request(image, band, transform, shape))
+    tile = decode_npy(payload, band)
+    if tile.shape != tuple(shape):
+        raise ValueError(f"Bloco com forma inesperada: {tile.shape} != {tuple(shape)}")
+    return tile
+
+
+def fetch_pixels_stack(image, bands, transform, shape):
+    """Busca várias bandas de uma janela numa única chamada computePixels"""
+    ee = get_ee()
+    payload = ee.data.computePixels(compute_pixels_request(image, bands, transform, shape))
+    stack = decode_npy_stack(payload, bands)
+    if stack.shape != (len(bands),) + tuple(shape):
+        raise ValueError(f"Bloco com forma inesperada: {stack.shape} != {(len(bands),) + tuple(shape)}")
+    return stack
@@ -0,0 +1,30 @@
+"""Fixtures compartilhadas: todos os testes usam o substituto local ``fake_ee``"""
+
+import pytest
+
+from landscapemetrics import cache, fake_ee, mapbiomas
+from landscapemetrics.earthengine import set_ee
+
+
+@pytest.fixture(autouse=True)
+def fake_backend(tmp_path, monkeypatch):
+    """Ativa o ``fake_ee`` sem latência, com caches em disco isolados por teste"""
+    monkeypatch.setenv("LANDSCAPEMETRICS_CACHE_DIR", str(tmp_path / "tiles"))
+    monkeypatch.setenv("LANDSCAPEMETRICS_SOURCE_CACHE", str(tmp_path / "source.json"))
+    monkeypatch.setattr(cache, "_default_cache", None)
+    monkeypatch.setattr(mapbiomas, "_default_resolver", None)
+    previous = set_ee(fake_ee)
+    fake_ee.configure(latency=0.0)
+    fake_ee.reset_stats()
+    yield fake_ee
+    set_ee(previous)
+
+
+@pytest.fixture
+def source():
+    return mapbiomas.get_mapbiomas_source()
+
+
+@pytest.fixture
+def band(source):
+    return mapbiomas.latest_classification_band(source)[1]
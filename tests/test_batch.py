@@ -0,0 +1,123 @@
+import geopandas as gpd
+import numpy as np
+import pytest
+from shapely.geometry import Point, Polygon
+
+from landscapemetrics import extraction
+from landscapemetrics.batch import points_from_gdf, run_batch
+from landscapemetrics.metrics import compute_class_metrics
+from landscapemetrics.mosaic import iter_shared_point_arrays
+from landscapemetrics.pipeline import run_pipeline
+from landscapemetrics.tiling import buffer_window, extract_buffer
+
+METRICS = ['total_area', 'number_of_patches']
+# Pontos distantes (sem sobreposição) e pontos vizinhos (buffers sobrepostos)
+FAR = [('a', -49.3, -27.1), ('b', -48.0, -26.0), ('c', -47.0, -25.0)]
+NEAR = [('a', -49.3, -27.1), ('b', -49.295, -27.1), ('c', -49.3, -27.095)]
+
+
+def gdf_from(points, **columns):
+    return gpd.GeoDataFrame(
+        dict({'name': [p[0] for p in points]}, **columns),
+        geometry=[Point(lon, lat) for _, lon, lat in points],
+        crs='EPSG:4326',
+    )
+
+
+def test_points_from_gdf_uses_id_column():
+    assert points_from_gdf(gdf_from(FAR)) == FAR
+
+
+def test_points_from_gdf_falls_back_to_index():
+    gdf = gdf_from(FAR).drop(columns='name')
+
+    assert [point_id for point_id, _, _ in points_from_gdf(gdf)] == [0, 1, 2]
+
+
+def test_points_from_gdf_reprojects_and_skips_non_points():
+    gdf = gdf_from(FAR)
+    gdf.loc[1, 'geometry'] = Polygon([(-48, -26), (-47.9, -26), (-47.9, -25.9)])
+    points = points_from_gdf(gdf.to_crs('EPSG:3857'))
+
+    assert [point_id for point_id, _, _ in points] == ['a', 'c']
+    assert points[0][1:] == pytest.approx(FAR[0][1:])
+
+
+def test_points_from_gdf_rejects_duplicate_ids():
+    with pytest.raises(ValueError, match="duplicados"):
+        points_from_gdf(gdf_from(FAR, point_id=[1, 1, 2]))
+
+
+@pytest.mark.parametrize('points', [FAR, NEAR])
+@pytest.mark.parametrize('mosaic', [None, True, False])
+def test_shared_point_arrays_match_single_extraction(source, band, points, mosaic):
+    image = source.image.select(band)
+
+    arrays = {point_id: (array, error)
+              for point_id, array, error in iter_shared_point_arrays(image, band, points, 1500, mosaic=mosaic)}
+
+    assert set(arrays) == {point_id for point_id, _, _ in points}
+    for point_id, lon, lat in points:
+        array, error = arrays[point_id]
+        assert error is None
+        np.testing.assert_array_equal(array, extract_buffer(image, band, lon, lat, 1500).array)
+
+
+def test_run_batch_table_in_file_order(source, band):
+    image = source.image.select(band)
+
+    table, failures = run_batch(gdf_from(NEAR), 1000, image, band, metrics=METRICS, max_workers=1)
+
+    assert failures == {}
+    assert list(table.columns) == ['point_id', 'class_value', 'class_name'] + METRICS
+    assert list(dict.fromkeys(table['point_id'])) == ['a', 'b', 'c']
+    _, lon, lat = NEAR[1]
+    expected = compute_class_metrics(extract_buffer(image, band, lon, lat, 1000).array, metrics=METRICS)
+    rows = table[table['point_id'] == 'b'].set_index('class_value')[METRICS]
+    np.testing.assert_allclose(rows.to_numpy(float), expected.to_numpy(float))
+
+
+def test_run_batch_isolates_failed_point(source, band, monkeypatch):
+    failing = buffer_window(FAR[1][1], FAR[1][2], 1000)
+    extract_window = extraction.extract_window
+
+    def flaky_extract_window(image, band, window, **kwargs):
+        if window == failing:
+            raise RuntimeError("Falha simulada")
+        return extract_window(image, band, window, **kwargs)
+
+    monkeypatch.setattr(extraction, 'extract_window', flaky_extract_window)
+
+    table, failures = run_batch(gdf_from(FAR), 1000, source.image.select(band), band,
+                                metrics=METRICS, max_workers=1, mosaic=False)
+
+    assert failures == {'b': "Falha simulada"}
+    assert list(dict.fromkeys(table['point_id'])) == ['a', 'c']
+
+
+def test_run_pipeline_reports_failures(monkeypatch):
+    def failing_extract_window(image, band, window, **kwargs):
+        raise RuntimeError("Falha simulada")
+
+    monkeypatch.setattr(extraction, 'extract_window', failing_extract_window)
+
+    result = run_pipeline(gdf_from(FAR), 1000, metrics=METRICS)
+
+    assert set(result.failures) == {'a', 'b', 'c'}
+    assert result.table.empty
+
+
+def test_run_pipeline_output_table(source):
+    result = run_pipeline(gdf_from(FAR), 1000, year=2000, metrics=METRICS)
+
+    assert result.failures == {}
+    assert result.year == 2000
+    assert result.asset == source.asset
+    assert list(result.table.columns) == ['point_id', 'year', 'class_value', 'class_name'] + METRICS
+    assert (result.table['year'] == 2000).all()
+    assert set(result.table['point_id']) == {'a', 'b', 'c'}
+
+
+def test_run_pipeline_rejects_unavailable_year():
+    with pytest.raises(ValueError, match="indisponível"):
+        run_pipeline(gdf_from(FAR), 1000, year=1900)
@@ -0,0 +1,89 @@
+import os
+
+import numpy as np
+import pytest
+
+from landscapemetrics import cache as cache_module
+from landscapemetrics.cache import TileCache, aligned_tiles, extract_window_cached
+from landscapemetrics.tiling import buffer_window, extract_window
+
+ASSET = 'projects/mapbiomas/collection9'
+TILE = (0, 16, 0, 16)
+
+
+def tile_array(value, size=16):
+    return np.full((size, size), value, dtype=np.uint8)
+
+
+def test_aligned_tiles_cover_the_window():
+    tiles = aligned_tiles((-5, 20, 250, 260), tile_size=16)
+
+    assert tiles[0] == (-16, 0, 240, 256)
+    assert tiles[-1] == (16, 32, 256, 272)
+    assert len(tiles) == 3 * 2
+
+
+def test_overwrite_keeps_byte_count(tmp_path):
+    cache = TileCache(str(tmp_path), max_bytes=10 ** 6)
+
+    cache.put(ASSET, 'b', TILE, tile_array(1))
+    once = cache.stats()['bytes']
+    cache.put(ASSET, 'b', TILE, tile_array(2))
+
+    assert once > 0
+    assert cache.stats()['bytes'] == once == cache.disk_usage()
+    np.testing.assert_array_equal(cache.get(ASSET, 'b', TILE), tile_array(2))
+    assert cache.get(ASSET, 'b', (16, 32, 0, 16)) is None
+    assert cache.stats()['hits'] == cache.stats()['misses'] == 1
+
+
+def test_other_processes_writes_are_remeasured(tmp_path, monkeypatch):
+    # Dois caches no mesmo diretório fazem o papel de dois processos
+    first = TileCache(str(tmp_path), max_bytes=10 ** 6)
+    second = TileCache(str(tmp_path), max_bytes=10 ** 6)
+    first.put(ASSET, 'b', TILE, tile_array(1))
+    size = first.stats()['bytes']
+
+    second.put(ASSET, 'b', (16, 32, 0, 16), tile_array(1))
+    assert second.stats()['bytes'] == size
+
+    monkeypatch.setattr(cache_module, 'DISK_USAGE_INTERVAL', 0.0)
+    second.put(ASSET, 'b', (32, 48, 0, 16), tile_array(1))
+    assert second.stats()['bytes'] == 3 * size
+    assert first.measure() == 3 * size
+
+
+def test_eviction_removes_least_recently_used(tmp_path):
+    probe = TileCache(str(tmp_path / 'probe'))
+    probe.put(ASSET, 'b', TILE, tile_array(0))
+    size = probe.disk_usage()
+    cache = TileCache(str(tmp_path / 'lru'), max_bytes=3 * size)
+    tiles = [(16 * i, 16 * (i + 1), 0, 16) for i in range(3)]
+    for age, tile in enumerate(tiles):
+        cache.put(ASSET, 'b', tile, tile_array(age))
+        mtime = 1000 + age
+        os.utime(cache.key_path(ASSET, 'b', tile), (mtime, mtime))
+    # Ler o mais antigo o torna o mais recente
+    assert cache.get(ASSET, 'b', tiles[0]) is not None
+
+    cache.put(ASSET, 'b', (48, 64, 0, 16), tile_array(9))
+
+    assert cache.get(ASSET, 'b', tiles[1]) is None
+    assert cache.get(ASSET, 'b', tiles[0]) is not None
+    assert cache.stats()['evictions'] >= 1
+    assert cache.stats()['bytes'] == cache.disk_usage() <= 3 * size
+
+
+def test_extract_window_cached_downloads_missing_tiles_once(source, band, fake_backend, tmp_path):
+    cache = TileCache(str(tmp_path / 'tiles'), tile_size=64)
+    image = source.image.select(band)
+    window = buffer_window(-49.3, -27.1, 2000)
+
+    first = extract_window_cached(image, source.asset, band, window, cache=cache)
+    round_trips = fake_backend.stats['round_trips']
+    second = extract_window_cached(image, source.asset, band, window, cache=cache)
+
+    assert fake_backend.stats['round_trips'] == round_trips
+    np.testing.assert_array_equal(first.array, second.array)
+    np.testing.assert_array_equal(first.array, extract_window(image, band, window).array)
+    assert first.transform == pytest.approx(second.transform)
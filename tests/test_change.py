@@ -0,0 +1,102 @@
+import geopandas as gpd
+import numpy as np
+import pytest
+from shapely.geometry import Point
+
+from landscapemetrics.change import (
+    TRANSITION_COLUMNS, chain_years, run_transitions, run_transitions_batch, transition_counts,
+    transition_matrix, transition_table,
+)
+from landscapemetrics.mapbiomas import CLASSIFICATION_PREFIX
+from landscapemetrics.metrics import NODATA
+from landscapemetrics.tiling import extract_buffer_stack
+from landscapemetrics.timeseries import select_years
+
+LON, LAT = -49.3, -27.1
+
+
+def masked_counts(stack):
+    # Referência com uma máscara por par de classes
+    counts = np.zeros((len(stack) - 1, 256, 256), dtype=np.int64)
+    for pair in range(len(stack) - 1):
+        before, after = stack[pair], stack[pair + 1]
+        valid = (before != NODATA) & (after != NODATA)
+        for class_from in np.unique(before[valid]):
+            for class_to in np.unique(after[valid]):
+                counts[pair, class_from, class_to] = (valid & (before == class_from) & (after == class_to)).sum()
+    return counts
+
+
+def test_bincount_matches_masks():
+    stack = np.random.default_rng(0).choice([0, 3, 15, 21, 33], size=(3, 30, 40)).astype(np.uint8)
+
+    np.testing.assert_array_equal(transition_counts(stack), masked_counts(stack))
+    with pytest.raises(ValueError):
+        transition_counts(stack[:1])
+
+
+def test_transition_matrix_labels_and_units():
+    before = np.array([[3, 3, 15], [2, 0, 15]], dtype=np.uint8)
+    after = np.array([[3, 15, 15], [2, 3, 0]], dtype=np.uint8)
+
+    pixels = transition_matrix(before, after)
+    hectares = transition_matrix(before, after, unit='ha')
+
+    # O código 2 não tem nome na legenda
+    assert pixels.index[0] == '2'
+    assert list(pixels.index) == list(pixels.columns)
+    assert pixels.values.sum() == 4
+    np.testing.assert_allclose(hectares.values, pixels.values * 0.09)
+    with pytest.raises(ValueError):
+        transition_matrix(before, after, unit='m2')
+
+
+def test_transition_table_is_long_and_sparse():
+    stack = np.array([[[3, 3]], [[3, 15]], [[15, 15]]], dtype=np.uint8)
+
+    table = transition_table(stack, [2000, 2001, 2002])
+
+    assert list(table.columns) == TRANSITION_COLUMNS
+    assert set(zip(table['year_from'], table['class_from'], table['class_to'], table['pixels'])) == {
+        (2000, 3, 3, 1), (2000, 3, 15, 1), (2001, 3, 15, 1), (2001, 15, 15, 1),
+    }
+    with pytest.raises(ValueError):
+        transition_table(stack, [2000, 2001])
+
+
+def test_chain_years_keeps_the_last_year():
+    assert chain_years([2003, 2000, 2001, 2002]) == [2000, 2001, 2002, 2003]
+    assert chain_years(range(2000, 2011), step=4) == [2000, 2004, 2008, 2010]
+
+
+def test_run_transitions_uses_one_stack(source, fake_backend):
+    years = select_years(source)[-3:]
+    fake_backend.reset_stats()
+
+    table = run_transitions(source, LON, LAT, 1000, years)
+
+    assert fake_backend.stats['round_trips'] == 1
+    bands = [f'{CLASSIFICATION_PREFIX}{year}' for year in years]
+    stack = extract_buffer_stack(source.image, bands, LON, LAT, 1000).array
+    assert table['pixels'].sum() == ((stack[:-1] != NODATA) & (stack[1:] != NODATA)).sum()
+
+
+def test_run_transitions_batch_isolates_failures(source, monkeypatch):
+    from landscapemetrics import change
+
+    gdf = gpd.GeoDataFrame({'id': ['a', 'b']}, geometry=[Point(LON, LAT), Point(LON + 0.05, LAT)],
+                           crs='EPSG:4326')
+    original = change.run_transitions
+
+    def flaky(source, lon, lat, buffer_dist, years):
+        if lon != LON:
+            raise RuntimeError("falha simulada")
+        return original(source, lon, lat, buffer_dist, years)
+
+    monkeypatch.setattr(change, 'run_transitions', flaky)
+
+    table, failures = run_transitions_batch(gdf, 500, source, step=10, id_column='id')
+
+    assert set(failures) == {'b'}
+    assert set(table['point_id']) == {'a'}
+    assert list(table.columns) == ['point_id'] + TRANSITION_COLUMNS
@@ -0,0 +1,95 @@
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+from shapely.geometry import Point, box
+
+from landscapemetrics import composition
+from landscapemetrics.batch import run_batch
+from landscapemetrics.composition import (
+    COMPOSITION_METRICS, histogram_metrics, is_composition_only, regions_from_gdf, run_composition,
+)
+from landscapemetrics.metrics import NODATA, compute_class_metrics
+from landscapemetrics.surfaces import aoi_mask
+from landscapemetrics.tiling import bbox_window, extract_window
+
+POINTS = [('a', -49.3, -27.1), ('b', -48.0, -26.0), ('c', -47.0, -25.0)]
+
+
+def points_gdf():
+    return gpd.GeoDataFrame({'name': [p[0] for p in POINTS]},
+                            geometry=[Point(lon, lat) for _, lon, lat in POINTS], crs='EPSG:4326')
+
+
+def test_is_composition_only():
+    assert is_composition_only(['total_area'])
+    assert not is_composition_only(['total_area', 'number_of_patches'])
+    assert not is_composition_only([])
+
+
+def test_histogram_metrics_ignores_nodata_and_null():
+    table = histogram_metrics({'3': 30, '15.0': 10, '0': 99, 'null': 5})
+
+    assert list(table.index) == [3, 15]
+    np.testing.assert_allclose(table['total_area'], [30 * 0.09, 10 * 0.09])
+    np.testing.assert_allclose(table['proportion_of_landscape'], [75, 25])
+    assert histogram_metrics({}).empty
+
+
+def test_histogram_matches_the_raster_path(source, band):
+    image = source.image.select(band)
+
+    fast, fast_failures = run_composition(points_gdf(), 2000, image, band)
+    slow, slow_failures = run_batch(points_gdf(), 2000, image, band, metrics=list(COMPOSITION_METRICS),
+                                    max_workers=1)
+
+    assert fast_failures == slow_failures == {}
+    columns = ['point_id', 'class_value'] + list(COMPOSITION_METRICS)
+    pd.testing.assert_frame_equal(fast[columns], slow[columns], check_dtype=False)
+
+
+def test_polygon_histogram_counts_its_pixels(source, band):
+    bounds = (-49.32, -27.12, -49.29, -27.09)
+    gdf = gpd.GeoDataFrame({'name': ['talhao']}, geometry=[box(*bounds)], crs='EPSG:4326')
+    image = source.image.select(band)
+
+    table, _ = run_composition(gdf, None, image, band)
+
+    # Pixels com o centro dentro do polígono
+    window = bbox_window(bounds)
+    inside = aoi_mask(box(*bounds).__geo_interface__, window)
+    expected = compute_class_metrics(np.where(inside, extract_window(image, band, window).array, NODATA),
+                                     metrics=['total_area'])
+    np.testing.assert_allclose(table['total_area'], expected['total_area'])
+
+
+def test_regions_are_grouped_per_request(source, band, fake_backend):
+    fake_backend.reset_stats()
+
+    table, _ = run_composition(points_gdf(), 1000, source.image.select(band), band, regions_per_request=2)
+
+    assert fake_backend.stats['round_trips'] == 2
+    assert list(table['point_id'].unique()) == ['a', 'b', 'c']
+
+
+def test_failed_group_falls_back_to_single_regions(source, band, monkeypatch):
+    def broken(*args):
+        raise RuntimeError("grupo falhou")
+
+    monkeypatch.setattr(composition, '_fetch_histograms', broken)
+
+    table, failures = run_composition(points_gdf(), 1000, source.image.select(band), band)
+
+    assert failures == {}
+    assert set(table['point_id']) == {'a', 'b', 'c'}
+    with pytest.raises(ValueError):
+        run_composition(points_gdf(), 1000, source.image.select(band), band, metrics=['number_of_patches'])
+
+
+def test_regions_from_gdf_reprojects_and_checks_ids():
+    regions = regions_from_gdf(points_gdf().to_crs('EPSG:3857'))
+
+    assert [region_id for region_id, _ in regions] == ['a', 'b', 'c']
+    assert regions[0][1]['coordinates'] == pytest.approx((-49.3, -27.1))
+    with pytest.raises(ValueError):
+        regions_from_gdf(gpd.GeoDataFrame({'name': ['a', 'a']}, geometry=[Point(0, 0), Point(1, 1)]))
@@ -0,0 +1,124 @@
+import io
+import zipfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from landscapemetrics.export import (
+    CSVWriter, InsertColumns, RasterZip, TableWriter, open_writer, table_bytes, table_format,
+)
+
+TRANSFORM = (0.0003, 0.0, -49.3, 0.0, -0.0003, -27.1)
+
+
+def chunks():
+    yield pd.DataFrame({'point_id': ['a', 'a'], 'class_value': [3, 15], 'total_area': [1.5, 2.25]})
+    yield pd.DataFrame({'point_id': ['b'], 'class_value': [3], 'total_area': [0.5], 'extra': [1]})
+    yield pd.DataFrame({'point_id': ['c'], 'class_value': [21]})
+
+
+def expected():
+    table = pd.concat(list(chunks()), ignore_index=True)
+    return table[['point_id', 'class_value', 'total_area']]
+
+
+def test_table_writer_is_abstract():
+    with pytest.raises(TypeError):
+        TableWriter(io.StringIO())
+
+
+def test_table_format_by_extension():
+    assert table_format('out.PARQUET') == 'parquet'
+    assert table_format('out.feather') == 'arrow'
+    assert table_format('out.xyz') == table_format('-') == 'csv'
+    with pytest.raises(ValueError):
+        open_writer('-', 'parquet')
+
+
+@pytest.mark.parametrize('name', ['out.csv', 'out.parquet', 'out.arrow'])
+def test_writers_stream_groups_with_first_columns(tmp_path, name):
+    pytest.importorskip('pyarrow')
+    path = tmp_path / name
+
+    with open_writer(path, flush_rows=2) as writer:
+        tables = chunks()
+        writer.write(next(tables))
+        # O primeiro grupo já foi gravado e fixou as colunas
+        assert writer.rows == 2
+        writer.write(next(tables))
+        writer.write(pd.DataFrame())
+        assert writer.rows == 2
+        writer.write(next(tables))
+
+    assert writer.rows == 4
+    if name.endswith('.csv'):
+        table = pd.read_csv(path, sep=';', decimal=',')
+    elif name.endswith('.parquet'):
+        table = pd.read_parquet(path)
+    else:
+        table = pd.read_feather(path)
+    pd.testing.assert_frame_equal(table, expected(), check_dtype=False)
+
+
+def test_csv_writer_keeps_foreign_file_open():
+    buffer = io.StringIO()
+    writer = InsertColumns(CSVWriter(buffer), [(1, 'year', 2022)])
+
+    writer.write(next(chunks()))
+    writer.writer.close()
+
+    assert not buffer.closed
+    assert buffer.getvalue().splitlines() == [
+        'point_id;year;class_value;total_area', 'a;2022;3;1,5', 'a;2022;15;2,25',
+    ]
+
+
+def test_table_bytes_round_trips():
+    pytest.importorskip('pyarrow')
+    table = expected()
+
+    csv = table_bytes(table, 'csv').decode('utf-8')
+    parquet = table_bytes(table, 'parquet')
+
+    pd.testing.assert_frame_equal(pd.read_csv(io.StringIO(csv), sep=';', decimal=','), table)
+    pd.testing.assert_frame_equal(pd.read_parquet(io.BytesIO(parquet)), table)
+
+
+def test_raster_zip_npz():
+    buffer = io.BytesIO()
+    array = np.arange(12, dtype=np.uint8).reshape(3, 4)
+
+    with RasterZip(buffer, fmt='npz') as rasters:
+        rasters.add('a_2022', array, TRANSFORM)
+        rasters.add('b_2022', array[::-1], TRANSFORM)
+
+    assert rasters.count == 2
+    with zipfile.ZipFile(io.BytesIO(buffer.getvalue())) as archive:
+        assert archive.namelist() == ['a_2022.npz', 'b_2022.npz']
+        with np.load(io.BytesIO(archive.read('a_2022.npz'))) as data:
+            np.testing.assert_array_equal(data['classes'], array)
+            np.testing.assert_allclose(data['transform'], TRANSFORM)
+
+
+def test_raster_zip_geotiff():
+    rasterio = pytest.importorskip('rasterio')
+    from rasterio.io import MemoryFile
+
+    buffer = io.BytesIO()
+    array = np.arange(12, dtype=np.uint8).reshape(3, 4)
+    with RasterZip(buffer) as rasters:
+        rasters.add('a_2022', array, TRANSFORM)
+
+    with zipfile.ZipFile(io.BytesIO(buffer.getvalue())) as archive:
+        with MemoryFile(archive.read('a_2022.tif')) as memory_file, memory_file.open() as dataset:
+            np.testing.assert_array_equal(dataset.read(1), array)
+            assert dataset.crs == rasterio.crs.CRS.from_epsg(4326)
+            assert dataset.nodata == 0
+            t = dataset.transform
+            assert (t.a, t.b, t.c, t.d, t.e, t.f) == pytest.approx(TRANSFORM)
+
+
+def test_raster_zip_rejects_unknown_format():
+    with pytest.raises(ValueError):
+        RasterZip(io.BytesIO(), fmt='png')
@@ -0,0 +1,41 @@
+import numpy as np
+
+from landscapemetrics.extraction import iter_point_arrays
+from landscapemetrics.mosaic import iter_mosaic_arrays
+from landscapemetrics.roundtrips import RoundTripCounter
+from landscapemetrics.tiling import buffer_window, extract_buffer
+
+POINTS = [(i, -49.3 + 0.02 * i, -27.1) for i in range(5)]
+
+
+def test_point_arrays_use_compute_pixels_only(source, band):
+    image = source.image.select(band)
+
+    with RoundTripCounter(log=False) as round_trips:
+        arrays = {point_id: array for point_id, array, _ in iter_point_arrays(image, band, POINTS, 1000)}
+
+    assert round_trips.calls == {'computePixels': len(POINTS)}
+    for point_id, lon, lat in POINTS:
+        assert arrays[point_id].dtype == np.uint8
+        np.testing.assert_array_equal(arrays[point_id], extract_buffer(image, band, lon, lat, 1000).array)
+
+
+def test_windows_over_budget_are_extracted_alone(source, band):
+    image = source.image.select(band)
+
+    results = list(iter_point_arrays(image, band, POINTS[:2], 1000, max_pixels_per_request=100))
+
+    assert [error for _, _, error in results] == [None, None]
+    np.testing.assert_array_equal(results[0][1], extract_buffer(image, band, *POINTS[0][1:], 1000).array)
+
+
+def test_mosaic_tiles_use_compute_pixels_only(source, band):
+    image = source.image.select(band)
+    windows = [(point_id, buffer_window(lon, lat, 1000)) for point_id, lon, lat in POINTS]
+
+    with RoundTripCounter(log=False) as round_trips:
+        arrays = dict((point_id, array) for point_id, array, _ in iter_mosaic_arrays(image, band, windows))
+
+    assert set(round_trips.calls) == {'computePixels'}
+    for point_id, lon, lat in POINTS:
+        np.testing.assert_array_equal(arrays[point_id], extract_buffer(image, band, lon, lat, 1000).array)
@@ -0,0 +1,101 @@
+import io
+import json
+
+import geopandas as gpd
+import pytest
+from shapely.geometry import Point, Polygon
+
+from landscapemetrics.ingest import (
+    iter_geojson_features, read_geojson_stream, read_points, read_points_bytes, read_points_csv,
+)
+
+
+def feature_collection(n, **header):
+    features = [
+        {'type': 'Feature', 'properties': {'id': f'p{i}', 'value': i * 1.25},
+         'geometry': {'type': 'Point', 'coordinates': [-49.0 - i / 1000, -27.0 + i / 1000]}}
+        for i in range(n)
+    ]
+    features.append({'type': 'Feature', 'properties': {'id': 'poly', 'value': None},
+                     'geometry': {'type': 'Polygon', 'coordinates': [[[0, 0], [1, 0], [1, 1], [0, 0]]]}})
+    return dict({'type': 'FeatureCollection', 'name': 'campo'}, features=features, **header)
+
+
+class CountingReader(io.StringIO):
+    """Registra o maior bloco pedido ao arquivo"""
+
+    largest = 0
+
+    def read(self, size=-1):
+        self.largest = max(self.largest, size)
+        return super().read(size)
+
+
+@pytest.mark.parametrize('chunk_size', [7, 64, 1024 * 1024])
+def test_stream_matches_json(chunk_size):
+    data = feature_collection(50)
+    header = {}
+
+    features = list(iter_geojson_features(io.StringIO(json.dumps(data, indent=1)), header, chunk_size))
+
+    assert features == data['features']
+    assert header == {'type': 'FeatureCollection', 'name': 'campo'}
+
+
+def test_stream_reads_in_blocks():
+    reader = CountingReader(json.dumps(feature_collection(200)))
+
+    gdf = read_geojson_stream(reader, chunk_size=256)
+
+    assert 0 < reader.largest <= 256
+    assert len(gdf) == 201
+    assert gdf.geometry.iloc[3] == Point(-49.003, -26.997)
+    assert isinstance(gdf.geometry.iloc[-1], Polygon)
+    assert list(gdf['id'][:2]) == ['p0', 'p1']
+    assert gdf.crs.to_epsg() == 4326
+
+
+def test_stream_rejects_other_objects():
+    with pytest.raises(ValueError):
+        read_geojson_stream(io.StringIO(json.dumps({'type': 'Feature', 'geometry': None})))
+    with pytest.raises(ValueError):
+        read_geojson_stream(io.StringIO('{"type": "FeatureCollection", "features": [{"type": '))
+
+
+def test_legacy_crs_member_is_honoured():
+    data = feature_collection(1, crs={'type': 'name', 'properties': {'name': 'EPSG:31982'}})
+
+    assert read_geojson_stream(io.StringIO(json.dumps(data))).crs.to_epsg() == 31982
+
+
+def test_csv_with_semicolon_and_decimal_comma():
+    gdf = read_points_csv(b'id;Latitude;Longitude\na;-27,1;-49,3\nb;-26,5;-48,25\n')
+
+    assert list(gdf['id']) == ['a', 'b']
+    assert gdf.geometry.iloc[1] == Point(-48.25, -26.5)
+    with pytest.raises(ValueError):
+        read_points_csv(b'id,a,b\n1,2,3\n')
+
+
+def test_csv_with_wkt_column():
+    gdf = read_points_bytes(b'name,geometry\nx,POINT (-49.3 -27.1)\n', '.csv')
+
+    assert gdf.geometry.iloc[0] == Point(-49.3, -27.1)
+
+
+def test_files_and_bytes_agree(tmp_path):
+    pytest.importorskip('pyarrow')
+    data = feature_collection(5)
+    geojson = tmp_path / 'campo.geojson'
+    geojson.write_text(json.dumps(data))
+    parquet = tmp_path / 'campo.parquet'
+    read_points(geojson).to_parquet(parquet)
+
+    from_file = read_points(geojson)
+    from_bytes = read_points_bytes(geojson.read_bytes(), '.GEOJSON')
+    from_parquet = read_points(parquet)
+
+    for gdf in (from_bytes, from_parquet):
+        assert isinstance(gdf, gpd.GeoDataFrame)
+        assert list(gdf['id']) == list(from_file['id'])
+        assert gdf.geometry.equals(from_file.geometry)
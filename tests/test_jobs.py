@@ -0,0 +1,40 @@
+import geopandas as gpd
+import pandas as pd
+
+from landscapemetrics.jobs import JobQueue, run_job
+from landscapemetrics.pipeline import run_pipeline
+
+
+def points_gdf():
+    return gpd.GeoDataFrame(
+        {'name': ['a', 'b', 'c']},
+        geometry=gpd.points_from_xy([-49.3, -49.25, -49.2], [-27.1, -27.05, -27.0]),
+        crs='EPSG:4326',
+    )
+
+
+def test_job_results_match_inline_pipeline(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"))
+    gdf = points_gdf()
+    job_id = queue.submit(gdf, 1000)
+    assert queue.status(job_id)['status'] == 'queued'
+
+    assert queue.claim('teste') == job_id
+    run_job(queue, job_id, 'teste')
+
+    job = queue.status(job_id)
+    assert job['status'] == 'done'
+    assert (job['done'], job['failed'], job['progress']) == (3, 0, 1.0)
+    inline = run_pipeline(gdf, 1000).table
+    # Sem truncamento dos floats na gravação em SQLite
+    pd.testing.assert_frame_equal(queue.results(job_id), inline, check_dtype=False)
+
+
+def test_cancelled_job_is_not_claimed(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"))
+    job_id = queue.submit(points_gdf(), 1000)
+
+    queue.cancel(job_id)
+
+    assert queue.status(job_id)['status'] == 'cancelled'
+    assert queue.claim('teste') is None
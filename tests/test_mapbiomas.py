@@ -0,0 +1,82 @@
+import json
+import threading
+import time
+
+import pytest
+
+from landscapemetrics import fake_ee
+from landscapemetrics.mapbiomas import (
+    MAPBIOMAS_ASSETS, SourceResolver, latest_classification_band, parse_classification_years, resolve_mapbiomas,
+)
+
+
+def wait_refresh():
+    for thread in threading.enumerate():
+        if thread.name == "mapbiomas-source-refresh":
+            thread.join(timeout=10)
+
+
+def write_entry(path, asset, bands, age):
+    entry = {"asset": asset, "collection_number": 9, "bands": bands, "resolved_at": time.time() - age}
+    path.write_text(json.dumps(entry))
+
+
+def test_parse_years_and_latest_band(source):
+    years = parse_classification_years(['classification_2001', 'other', 'classification_1985'])
+
+    assert years == [1985, 2001]
+    year, band = latest_classification_band(source)
+    assert band == f'classification_{year}' and band in source.bands
+
+
+def test_resolve_skips_unavailable_assets(monkeypatch):
+    monkeypatch.setitem(fake_ee._config, "unavailable_assets", {MAPBIOMAS_ASSETS[0]})
+    attempts = []
+
+    source = resolve_mapbiomas(on_attempt=attempts.append)
+
+    assert source.asset == MAPBIOMAS_ASSETS[1]
+    assert attempts == MAPBIOMAS_ASSETS[:2]
+    monkeypatch.setitem(fake_ee._config, "unavailable_assets", set(MAPBIOMAS_ASSETS))
+    with pytest.raises(ValueError):
+        resolve_mapbiomas()
+
+
+def test_fresh_entry_is_served_without_round_trips(tmp_path, fake_backend):
+    path = tmp_path / "source.json"
+    first = SourceResolver(str(path)).get()
+    round_trips = fake_backend.stats['round_trips']
+
+    again = SourceResolver(str(path)).get()
+
+    assert fake_backend.stats['round_trips'] == round_trips == 1
+    assert (again.asset, again.bands) == (first.asset, first.bands)
+
+
+def test_stale_entry_is_served_while_refreshing(tmp_path, fake_backend):
+    path = tmp_path / "source.json"
+    write_entry(path, MAPBIOMAS_ASSETS[1], ['classification_2000'], age=3600)
+    resolver = SourceResolver(str(path), ttl=1000)
+
+    stale = resolver.get()
+    wait_refresh()
+    fresh = resolver.get()
+
+    assert stale.asset == MAPBIOMAS_ASSETS[1]
+    assert fresh.asset == MAPBIOMAS_ASSETS[0]
+    assert len(fresh.bands) > 1
+    assert json.loads(path.read_text())["asset"] == MAPBIOMAS_ASSETS[0]
+    assert fake_backend.stats['round_trips'] == 1
+
+
+def test_failed_refresh_keeps_the_cached_entry(tmp_path, monkeypatch):
+    path = tmp_path / "source.json"
+    write_entry(path, MAPBIOMAS_ASSETS[1], ['classification_2000'], age=3600)
+    monkeypatch.setitem(fake_ee._config, "unavailable_assets", set(MAPBIOMAS_ASSETS))
+    resolver = SourceResolver(str(path), ttl=1000)
+
+    resolver.get()
+    wait_refresh()
+
+    assert resolver.get().asset == MAPBIOMAS_ASSETS[1]
+    assert json.loads(path.read_text())["asset"] == MAPBIOMAS_ASSETS[1]
@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+
+from landscapemetrics import mosaic as mosaic_module
+from landscapemetrics.mosaic import (
+    iter_mosaic_arrays, mosaic_plan, mosaic_tile_size, morton_key, tile_keys, tile_window,
+)
+from landscapemetrics.tiling import buffer_window, extract_window, window_pixels
+
+# Uma fileira de pontos a cada ~500 m, com buffers de 1 km bem sobrepostos
+ROW = [(f'p{i}', -49.3 + i * 0.005, -27.1) for i in range(8)]
+
+
+def windows(points, buffer_dist=1000):
+    return [(point_id, buffer_window(lon, lat, buffer_dist)) for point_id, lon, lat in points]
+
+
+def test_tiles_cover_the_window():
+    window = (-5, 20, 250, 260)
+    keys = tile_keys(window, 16)
+
+    assert keys == [(-1, 15), (-1, 16), (0, 15), (0, 16), (1, 15), (1, 16)]
+    covered = set()
+    for key in keys:
+        r0, r1, c0, c1 = tile_window(key, 16)
+        covered.update((r, c) for r in range(r0, r1) for c in range(c0, c1))
+    assert {(r, c) for r in range(-5, 20) for c in range(250, 260)} <= covered
+
+
+def test_morton_key_interleaves_bits():
+    assert [morton_key(key) for key in [(0, 0), (0, 1), (1, 0), (1, 1), (0, 2)]] == [0, 1, 2, 3, 4]
+
+
+def test_plan_favours_overlapping_windows():
+    near = [window for _, window in windows(ROW)]
+    far = [window for _, window in windows([(p, lon + i * 0.1, lat) for i, (p, lon, lat) in enumerate(ROW)])]
+
+    near_plan, far_plan = mosaic_plan(near), mosaic_plan(far)
+
+    assert near_plan['tile_size'] == mosaic_tile_size(near)
+    assert near_plan['window_pixels'] == sum(window_pixels(w) for w in near)
+    assert near_plan['mosaic_pixels'] < mosaic_module.MOSAIC_MAX_RATIO * near_plan['window_pixels']
+    assert far_plan['mosaic_pixels'] >= far_plan['window_pixels']
+
+
+def test_mosaic_arrays_match_and_share_tiles(source, band, fake_backend, monkeypatch):
+    image = source.image.select(band)
+    peak = []
+
+    class TrackedMosaic(mosaic_module.TileMosaic):
+        def release(self, keys):
+            peak.append(len(self.tiles))
+            super().release(keys)
+
+    monkeypatch.setattr(mosaic_module, 'TileMosaic', TrackedMosaic)
+    point_windows = windows(ROW)
+    fake_backend.reset_stats()
+
+    arrays = {point_id: (array, error)
+              for point_id, array, error in iter_mosaic_arrays(image, band, point_windows, tile_size=32,
+                                                               max_pixels_per_request=12 * 32 * 32)}
+
+    mosaic_bytes = fake_backend.stats['bytes']
+    assert set(arrays) == {point_id for point_id, _, _ in ROW}
+    for point_id, window in point_windows:
+        array, error = arrays[point_id]
+        assert error is None
+        np.testing.assert_array_equal(array, extract_window(image, band, window).array)
+    # Blocos compartilhados: menos bytes que baixar as janelas uma a uma
+    assert mosaic_bytes < fake_backend.stats['bytes'] - mosaic_bytes
+    # Blocos liberados depois do último ponto que os usa
+    assert max(peak) < mosaic_plan([w for _, w in point_windows], 32)['tiles']
+
+
+def test_failed_tile_only_fails_its_points(source, band, monkeypatch):
+    image = source.image.select(band)
+    point_windows = [('west', buffer_window(-49.3, -27.1, 500)), ('east', buffer_window(-48.3, -27.1, 500))]
+    bad_keys = set(tile_keys(point_windows[1][1], 32))
+    extract_chunk = mosaic_module._extract_chunk
+
+    def failing_chunk(image, band, chunk):
+        for key, array, error in extract_chunk(image, band, chunk):
+            if key in bad_keys:
+                yield key, None, RuntimeError("bloco indisponível")
+            else:
+                yield key, array, error
+
+    monkeypatch.setattr(mosaic_module, '_extract_chunk', failing_chunk)
+
+    results = {point_id: error for point_id, _, error in iter_mosaic_arrays(image, band, point_windows, 32)}
+
+    assert results['west'] is None
+    assert isinstance(results['east'], RuntimeError)
+    assert list(iter_mosaic_arrays(image, band, [])) == []
+
+
+def test_tile_size_is_bounded():
+    assert mosaic_tile_size([(0, 10, 0, 10)]) == mosaic_module.MIN_MOSAIC_TILE
+    assert mosaic_tile_size([(0, 10 ** 5, 0, 10)]) == mosaic_module.MAX_MOSAIC_TILE
+    with pytest.raises(ValueError):
+        mosaic_tile_size([])
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from landscapemetrics.metrics import NODATA
+from landscapemetrics.multiscale import concentric_landscapes, distance_grid, radius_range, run_multiscale
+from landscapemetrics.tiling import buffer_window, extract_buffer, window_shape, window_transform
+
+LON, LAT = -49.3, -27.1
+RADII = [500, 1000, 2000]
+
+
+@pytest.fixture
+def raster(source, band):
+    return extract_buffer(source.image.select(band), band, LON, LAT, RADII[-1])
+
+
+def test_radius_range_is_inclusive():
+    assert radius_range(500, 2000, 500) == [500, 1000, 1500, 2000]
+    with pytest.raises(ValueError):
+        radius_range(2000, 500, 500)
+
+
+def test_landscapes_are_circles_in_buffer_windows(raster):
+    for radius, landscape in concentric_landscapes(raster, LON, LAT, RADII):
+        window = buffer_window(LON, LAT, radius)
+        assert landscape.shape == window_shape(window)
+        distances = distance_grid(window_transform(window), landscape.shape, LON, LAT)
+        assert (landscape[distances > radius] == NODATA).all()
+        assert (landscape[distances <= radius] != NODATA).any()
+        # Cantos da janela ficam fora do círculo
+        assert landscape[0, 0] == landscape[-1, -1] == NODATA
+
+
+def test_landscapes_are_nested(raster):
+    landscapes = dict(concentric_landscapes(raster, LON, LAT, RADII))
+    small, large = landscapes[500], landscapes[2000]
+    row0, _, col0, _ = buffer_window(LON, LAT, 2000)
+    r0, r1, c0, c1 = buffer_window(LON, LAT, 500)
+    inner = large[r0 - row0:r1 - row0, c0 - col0:c1 - col0]
+
+    inside = small != NODATA
+    np.testing.assert_array_equal(small[inside], inner[inside])
+
+
+def test_run_multiscale_extracts_once(source, band, fake_backend):
+    before = fake_backend.stats['round_trips']
+
+    table = run_multiscale(source, band, LON, LAT, RADII, metrics=['total_area'], max_workers=1)
+
+    assert fake_backend.stats['round_trips'] - before == 1
+    assert sorted(table['radius'].unique()) == RADII
+    areas = table.groupby('radius')['value'].sum()
+    assert areas[500] < areas[1000] < areas[2000]
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from landscapemetrics import parallel
+from landscapemetrics.metrics import compute_class_metrics
+from landscapemetrics.parallel import MetricsExecutor, choose_workers
+
+METRICS = ['total_area', 'number_of_patches']
+
+
+def landscapes(n):
+    rng = np.random.default_rng(0)
+    for index in range(n):
+        yield f'p{index}', rng.choice([0, 3, 15], size=(20 + index, 25)).astype(np.uint8)
+
+
+@pytest.fixture(scope='module')
+def executor():
+    # Um pool só para o módulo: iniciar processos com 'spawn' custa alguns segundos
+    with MetricsExecutor(max_workers=2) as executor:
+        yield executor
+
+
+@pytest.fixture
+def segments(monkeypatch):
+    """Nomes dos segmentos de memória compartilhada criados e liberados"""
+    created, released = [], []
+    pack, release = parallel._pack_chunk, parallel._release
+
+    def tracked_pack(chunk):
+        shm, descriptors = pack(chunk)
+        created.append(shm.name)
+        return shm, descriptors
+
+    def tracked_release(shm):
+        released.append(shm.name)
+        release(shm)
+
+    monkeypatch.setattr(parallel, '_pack_chunk', tracked_pack)
+    monkeypatch.setattr(parallel, '_release', tracked_release)
+    return created, released
+
+
+def test_choose_workers():
+    assert choose_workers(parallel.PARALLEL_MIN_LANDSCAPES - 1) == 1
+    assert choose_workers(1, max_workers=3) == 3
+    assert choose_workers(10 ** 6) == parallel.default_workers()
+
+
+def test_process_pool_matches_in_process(executor, segments, monkeypatch):
+    created, released = segments
+    items = list(landscapes(7)) + [('bad', np.ones((2, 5, 5), dtype=np.uint8))]
+    monkeypatch.setattr(executor, 'chunksize', 3)
+
+    results = {key: (table, error) for key, table, error in executor.map(items, metrics=METRICS)}
+
+    assert set(results) == {key for key, _ in items}
+    for key, array in items[:-1]:
+        table, error = results[key]
+        assert error is None
+        pd.testing.assert_frame_equal(table, compute_class_metrics(array, metrics=METRICS))
+    assert results['bad'][0] is None and results['bad'][1].startswith('ValueError')
+    assert len(created) == 3
+    assert sorted(released) == sorted(created)
+
+
+def test_abandoned_map_releases_segments(executor, segments, monkeypatch):
+    created, released = segments
+    monkeypatch.setattr(executor, 'chunksize', 1)
+
+    results = executor.map(landscapes(12), metrics=METRICS)
+    next(results)
+    results.close()
+
+    assert created
+    # Blocos em andamento limitados a 2 por processo
+    assert len(created) <= 2 * parallel.INFLIGHT_PER_WORKER + 1
+    assert sorted(released) == sorted(created)
+
+
+def test_single_worker_runs_in_process():
+    with MetricsExecutor(max_workers=1) as executor:
+        assert executor._pool is None
+        keys = [key for key, _, error in executor.map(landscapes(3), metrics=METRICS) if error is None]
+
+    assert keys == ['p0', 'p1', 'p2']
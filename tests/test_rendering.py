@@ -0,0 +1,55 @@
+import io
+
+import numpy as np
+import pytest
+
+from landscapemetrics.metrics import NODATA
+from landscapemetrics.rendering import (
+    CLASS_COLORS, CLASS_LUT, NODATA_COLOR, UNKNOWN_COLOR, hex_to_rgb, legend_entries, legend_html, render_png,
+    render_rgb,
+)
+
+CLASSES = np.array([[NODATA, 3, 15], [15, 250, 3]], dtype=np.uint8)
+
+
+def test_lut_matches_the_legend_colors():
+    assert CLASS_LUT.shape == (256, 3) and CLASS_LUT.dtype == np.uint8
+    assert tuple(CLASS_LUT[NODATA]) == hex_to_rgb(NODATA_COLOR)
+    for class_value, color in CLASS_COLORS.items():
+        assert tuple(CLASS_LUT[class_value]) == hex_to_rgb(color)
+
+
+def test_render_rgb_indexes_the_lut():
+    rgb = render_rgb(CLASSES)
+
+    assert rgb.shape == (2, 3, 3) and rgb.dtype == np.uint8
+    assert tuple(rgb[0, 1]) == hex_to_rgb(CLASS_COLORS[3])
+    assert tuple(rgb[1, 1]) == hex_to_rgb(UNKNOWN_COLOR)
+    # Outros dtypes são convertidos para uint8
+    np.testing.assert_array_equal(render_rgb(CLASSES.astype(np.int64)), rgb)
+
+
+def test_render_scale_repeats_pixels():
+    rgb = render_rgb(CLASSES, scale=3)
+
+    assert rgb.shape == (6, 9, 3)
+    np.testing.assert_array_equal(rgb[::3, ::3], render_rgb(CLASSES))
+
+
+def test_render_png_round_trips():
+    Image = pytest.importorskip('PIL.Image')
+
+    png = render_png(CLASSES, scale=2)
+
+    with Image.open(io.BytesIO(png)) as image:
+        np.testing.assert_array_equal(np.asarray(image.convert('RGB')), render_rgb(CLASSES, scale=2))
+
+
+def test_legend_lists_present_classes():
+    entries = legend_entries(CLASSES)
+
+    assert [class_value for class_value, _, _ in entries] == [3, 15, 250]
+    assert entries[0][2] == CLASS_COLORS[3]
+    assert entries[-1] == (250, 'Classe 250', UNKNOWN_COLOR)
+    html = legend_html(entries)
+    assert html.count("<span") == 3 and '250 - Classe 250' in html
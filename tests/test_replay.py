@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+from landscapemetrics import fake_ee, replay_ee
+from landscapemetrics.composition import class_histogram
+from landscapemetrics.earthengine import set_ee
+from landscapemetrics.mapbiomas import latest_classification_band, resolve_mapbiomas
+from landscapemetrics.tiling import buffer_window, extract_window, window_rectangle
+
+WINDOW = buffer_window(-49.3, -27.1, 1000)
+
+
+@pytest.fixture
+def replay(tmp_path, monkeypatch):
+    """``replay_ee`` gravando do ``fake_ee`` num diretório temporário"""
+    monkeypatch.setattr(replay_ee, '_config', dict(replay_ee._config))
+    replay_ee.configure(mode='record', directory=str(tmp_path / 'gravacoes'), inner=fake_ee,
+                        latency=0.0, recorded_latency=0.0, jitter=0.0)
+    replay_ee.reset_stats()
+    previous = set_ee(replay_ee)
+    yield replay_ee
+    set_ee(previous)
+
+
+def session():
+    """Fluxo de uma consulta: asset, pixels de uma janela e histograma de classes"""
+    source = resolve_mapbiomas()
+    _, band = latest_classification_band(source)
+    image = source.image.select(band)
+    pixels = extract_window(image, band, WINDOW).array
+    histogram = class_histogram(image, band, window_rectangle(WINDOW))
+    return source.asset, pixels, histogram
+
+
+def test_replay_matches_the_recording_offline(replay, fake_backend):
+    recorded = session()
+    recorded_stats = dict(replay.stats)
+    inner_round_trips = fake_backend.stats['round_trips']
+
+    replay.configure(mode='replay', inner='ee')
+    replay.reset_stats()
+    replayed = session()
+
+    assert recorded_stats['recorded'] == recorded_stats['round_trips'] >= 3
+    assert replay.stats['hits'] == recorded_stats['round_trips']
+    assert replay.stats['misses'] == 0
+    assert replay.stats['bytes'] == recorded_stats['bytes'] > 0
+    # Nenhuma chamada chegou ao cliente gravado
+    assert fake_backend.stats['round_trips'] == inner_round_trips
+    assert replayed[0] == recorded[0]
+    np.testing.assert_array_equal(replayed[1], recorded[1])
+    assert replayed[2] == recorded[2]
+
+
+def test_unrecorded_expression_raises(replay):
+    session()
+    replay.configure(mode='replay')
+
+    with pytest.raises(replay_ee.EEException):
+        extract_window(replay_ee.Image('outro/asset').select('b'), 'b', WINDOW)
+    assert replay.stats['misses'] >= 1
+
+
+def test_recorded_errors_are_replayed(replay, monkeypatch):
+    monkeypatch.setitem(fake_ee._config, 'unavailable_assets', {'projects/inexistente'})
+    with pytest.raises(Exception):
+        replay_ee.Image('projects/inexistente').bandNames().getInfo()
+
+    replay.configure(mode='replay')
+    with pytest.raises(replay_ee.EEException):
+        replay_ee.Image('projects/inexistente').bandNames().getInfo()
+    assert replay.stats['hits'] == 1
+
+
+def test_synthetic_latency(replay, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(replay_ee.time, 'sleep', sleeps.append)
+    replay_ee.Image('projects/a').bandNames().getInfo()
+
+    replay.configure(mode='replay', latency=0.2, bandwidth=1000)
+    replay_ee.Image('projects/a').bandNames().getInfo()
+    replay.configure(jitter=0.5, seed=3)
+    replay_ee.Image('projects/a').bandNames().getInfo()
+
+    assert sleeps[0] == pytest.approx(0.2)
+    assert 0.1 <= sleeps[1] <= 0.3
+    with pytest.raises(ValueError):
+        replay.configure(mode='proxy')
+
+
+def test_map_functions_are_keyed_by_their_expression(replay):
+    replay.configure(mode='replay')
+    double = replay_ee.Image('a').multiply(2)
+    features = replay_ee.FeatureCollection([replay_ee.Feature(None, {'i': 0})])
+
+    first = features.map(lambda feature: feature.set('x', double))
+    second = features.map(lambda feature: feature.set('x', replay_ee.Image('a').multiply(2)))
+    other = features.map(lambda feature: feature.set('x', 1))
+
+    key = replay_ee.request_key(first._expression)
+    assert key == replay_ee.request_key(second._expression)
+    assert key != replay_ee.request_key(other._expression)
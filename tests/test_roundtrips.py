@@ -0,0 +1,128 @@
+import threading
+
+import geopandas as gpd
+import pytest
+
+from landscapemetrics.roundtrips import (
+    ContextThreadPoolExecutor,
+    Deferred,
+    RoundTripBudgetExceeded,
+    RoundTripCounter,
+)
+from landscapemetrics.pipeline import run_pipeline
+from landscapemetrics.tiling import buffer_window, extract_window
+
+LON, LAT = -49.3, -27.1
+
+
+def extract(source, band, buffer_dist=1000, **kwargs):
+    return extract_window(source.image.select(band), band, buffer_window(LON, LAT, buffer_dist), **kwargs)
+
+
+def test_counter_counts_compute_pixels(source, band):
+    with RoundTripCounter(log=False) as round_trips:
+        extract(source, band)
+
+    assert round_trips.count == 1
+    assert round_trips.calls == {'computePixels': 1}
+    assert round_trips.bytes > 0
+
+
+def test_budget_exceeded_raises(source, band):
+    with pytest.raises(RoundTripBudgetExceeded, match="orçamento de 1"):
+        with RoundTripCounter(budget=1, log=False):
+            extract(source, band)
+            extract(source, band)
+
+
+def test_budget_respected_does_not_raise(source, band):
+    with RoundTripCounter(budget=2, log=False) as round_trips:
+        extract(source, band)
+        extract(source, band)
+
+    assert round_trips.count == 2
+
+
+def test_budget_not_checked_when_block_fails(source, band):
+    with pytest.raises(KeyError):
+        with RoundTripCounter(budget=0, log=False):
+            extract(source, band)
+            raise KeyError('falha do bloco')
+
+
+def test_pool_threads_count_in_submitting_context(source, band):
+    with RoundTripCounter(log=False) as round_trips:
+        extract(source, band, buffer_dist=3000, tile_size=64, max_workers=4)
+
+    assert round_trips.count > 1
+
+
+def test_counters_are_scoped_to_each_thread(source, band):
+    counts = {}
+
+    def session(i):
+        with RoundTripCounter(log=False) as round_trips:
+            for _ in range(i + 1):
+                extract(source, band)
+        counts[i] = round_trips.count
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counts == {0: 1, 1: 2, 2: 3, 3: 4}
+
+
+def test_threads_without_copied_context_are_not_counted(source, band):
+    with RoundTripCounter(log=False) as outer:
+        with ContextThreadPoolExecutor(max_workers=1) as executor:
+            executor.submit(extract, source, band).result()
+        detached = threading.Thread(target=extract, args=(source, band))
+        detached.start()
+        detached.join()
+
+    assert outer.count == 1
+
+
+def test_deferred_resolves_with_one_round_trip(fake_backend):
+    deferred = Deferred()
+    deferred.add('a', fake_backend.Number(1))
+    deferred.add('b', fake_backend.String('x'))
+
+    with RoundTripCounter(log=False) as round_trips:
+        assert deferred.get('a') == 1
+        assert deferred.get('b') == 'x'
+
+    assert round_trips.count == 1
+
+
+def far_points(n):
+    # Buffers sem sobreposição: uma extração por ponto, sem mosaico
+    return gpd.GeoDataFrame(geometry=gpd.points_from_xy([-49.0 + i for i in range(n)], [-27.0] * n),
+                            crs='EPSG:4326')
+
+
+def test_run_pipeline_within_round_trip_budget():
+    n_points = 4
+    # Uma resolução do asset (bandNames) + um computePixels por ponto
+    with RoundTripCounter(budget=n_points + 1, log=False) as round_trips:
+        result = run_pipeline(far_points(n_points), 1000, metrics=['number_of_patches'], max_workers=1)
+
+    assert result.failures == {}
+    assert round_trips.calls == {'computeValue': 1, 'computePixels': n_points}
+
+
+def test_run_pipeline_over_budget_raises():
+    with pytest.raises(RoundTripBudgetExceeded):
+        with RoundTripCounter(budget=2, log=False):
+            run_pipeline(far_points(4), 1000, metrics=['number_of_patches'], max_workers=1)
+
+
+def test_composition_pipeline_needs_one_round_trip_per_chunk():
+    with RoundTripCounter(budget=2, log=False) as round_trips:
+        result = run_pipeline(far_points(4), 1000, metrics=['total_area', 'proportion_of_landscape'])
+
+    assert result.failures == {}
+    assert round_trips.count == 2
@@ -0,0 +1,141 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from landscapemetrics import fake_ee
+from landscapemetrics import service as service_module
+from landscapemetrics.cache import TileCache
+from landscapemetrics.service import MetricsService, Overloaded, make_server, parse_request
+
+QUERY = "/v1/metrics?lon=-49.3&lat=-27.1&buffer=2000&metrics=total_area,number_of_patches"
+
+
+@pytest.fixture
+def server(tmp_path):
+    service = MetricsService(max_computations=2, cache=TileCache(str(tmp_path / "service")))
+    server = make_server(port=0, service=service)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def get(server, path):
+    url = f"http://127.0.0.1:{server.server_port}{path}"
+    try:
+        with urllib.request.urlopen(url, timeout=30) as response:
+            return response.status, dict(response.headers), json.loads(response.read())
+    except urllib.error.HTTPError as http_error:
+        return http_error.code, dict(http_error.headers), json.loads(http_error.read())
+
+
+def test_port_zero_binds_free_port(server):
+    status, _, body = get(server, "/health")
+
+    assert server.server_port != 0
+    assert status == 200
+    assert body['status'] == 'ok'
+
+
+def test_concurrent_requests_are_coalesced(server, source, monkeypatch):
+    n_requests = 8
+    extract = service_module.extract_window_cached
+
+    def extract_after_waiters(*args, **kwargs):
+        # Segura o primeiro cálculo até as outras requisições estarem esperando por ele
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            calls = list(server.service.flight._calls.values())
+            if calls and calls[0].waiters == n_requests - 1:
+                break
+            time.sleep(0.01)
+        return extract(*args, **kwargs)
+
+    monkeypatch.setattr(service_module, "extract_window_cached", extract_after_waiters)
+    fake_ee.reset_stats()
+
+    with ThreadPoolExecutor(max_workers=n_requests) as executor:
+        responses = list(executor.map(lambda _: get(server, QUERY), range(n_requests)))
+
+    assert [status for status, _, _ in responses] == [200] * n_requests
+    bodies = [body for _, _, body in responses]
+    assert all(body['metrics'] == bodies[0]['metrics'] for body in bodies)
+    coalesced = [headers['X-Coalesced'] == 'true' for _, headers, _ in responses]
+    assert coalesced.count(False) == 1
+    stats = server.service.stats()
+    assert stats['computations'] == 1
+    assert stats['coalesced'] == n_requests - 1
+    assert fake_ee.stats['round_trips'] == 1
+
+
+def test_sequential_requests_are_not_coalesced(server, source):
+    first = get(server, QUERY)
+    second = get(server, QUERY)
+
+    assert first[1]['X-Coalesced'] == second[1]['X-Coalesced'] == 'false'
+    assert server.service.stats()['computations'] == 2
+
+
+def test_invalid_buffer_is_rejected(server):
+    status, _, body = get(server, "/v1/metrics?lon=-49.3&lat=-27.1&buffer=10")
+
+    assert status == 400
+    assert 'Buffer' in body['error']
+
+
+def test_unavailable_year_is_bad_request(server):
+    status, _, body = get(server, QUERY + "&year=1900")
+
+    assert status == 400
+    assert '1900' in body['error']
+
+
+def test_compute_value_error_is_bad_gateway(server, monkeypatch):
+    def failing_metrics(array, metrics=None):
+        raise ValueError("paisagem sem classes")
+
+    monkeypatch.setattr(service_module, 'compute_class_metrics', failing_metrics)
+
+    status, _, body = get(server, QUERY)
+
+    assert status == 502
+    assert 'paisagem sem classes' in body['error']
+    assert server.service.stats()['errors'] == 1
+
+
+def test_request_limit_rejections_counted_once(source):
+    service = MetricsService(max_requests=0)
+    request = parse_request({'lon': -49.3, 'lat': -27.1, 'buffer': 1000})
+
+    for _ in range(3):
+        with pytest.raises(Overloaded):
+            service.metrics(request)
+
+    stats = service.stats()
+    assert (stats['rejected'], stats['requests'], stats['open_requests']) == (3, 0, 0)
+
+
+def test_queue_timeout_rejections_counted_once(tmp_path, source):
+    service = MetricsService(max_computations=1, queue_timeout=0.01, cache=TileCache(str(tmp_path / "service")))
+    fake_ee.configure(latency=0.5)
+    requests = [parse_request({'lon': -49.3 + i, 'lat': -27.1, 'buffer': 1000}) for i in range(3)]
+
+    def call(request):
+        try:
+            service.metrics(request)
+            return 'ok'
+        except Overloaded:
+            return 'rejected'
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        outcomes = list(executor.map(call, requests))
+
+    assert outcomes.count('ok') == 1
+    assert service.stats()['rejected'] == outcomes.count('rejected') == 2
@@ -0,0 +1,80 @@
+import json
+
+import numpy as np
+import pytest
+
+from landscapemetrics import surfaces
+from landscapemetrics.metrics import NODATA
+from landscapemetrics.surfaces import moving_window_surfaces, parse_metric, run_surfaces, window_runs, window_sum
+
+BBOX = (-49.32, -27.12, -49.29, -27.09)
+
+
+def brute_window_sum(values, runs):
+    rows, cols = values.shape
+    total = np.zeros(values.shape, dtype=np.int64)
+    for row in range(rows):
+        for col in range(cols):
+            for dy, start, end in runs:
+                r = row + dy
+                if 0 <= r < rows:
+                    total[row, col] += values[r, max(0, col + start):max(0, col + end + 1)].sum()
+    return total
+
+
+@pytest.mark.parametrize('window', ['square', 'circle'])
+def test_window_sum_matches_brute_force(window):
+    values = np.random.default_rng(0).integers(0, 3, size=(12, 15))
+    runs = window_runs(3, 4, window)
+
+    np.testing.assert_array_equal(window_sum(values, runs), brute_window_sum(values, runs))
+
+
+def test_square_window_is_the_default():
+    assert window_runs(2, 3) == window_runs(2, 3, 'square')
+    classes = np.random.default_rng(1).integers(0, 4, size=(20, 20)).astype(np.uint8)
+    metrics = [('proportion_of_landscape', 3), ('edge_density', None)]
+
+    default = moving_window_surfaces(classes, metrics, 2, 3)
+    square = moving_window_surfaces(classes, metrics, 2, 3, 'square')
+    circle = moving_window_surfaces(classes, metrics, 2, 3, 'circle')
+
+    for name in default:
+        np.testing.assert_array_equal(default[name], square[name])
+    assert not np.allclose(np.nan_to_num(default['edge_density']), np.nan_to_num(circle['edge_density']))
+    assert np.isnan(default['edge_density'][classes == NODATA]).all()
+
+
+def test_run_surfaces_crops_to_the_aoi(source, band):
+    metrics = [parse_metric('proportion_of_landscape:3'), parse_metric('shannon_diversity_index')]
+
+    result, transform = run_surfaces(source.image.select(band), band, BBOX, 300, metrics)
+
+    shapes = {surface.shape for surface in result.values()}
+    assert len(shapes) == 1
+    proportion = result['proportion_of_landscape_3']
+    assert np.nanmin(proportion) >= 0 and np.nanmax(proportion) <= 100
+    assert transform[0] > 0 and transform[4] < 0
+
+
+def test_cli_unions_polygons(tmp_path):
+    pytest.importorskip('rasterio')
+    import rasterio
+
+    xmin, ymin, xmax, ymax = BBOX
+    middle = (xmin + xmax) / 2
+    features = [
+        {'type': 'Feature', 'properties': {},
+         'geometry': {'type': 'Polygon', 'coordinates': [[(x0, ymin), (x1, ymin), (x1, ymax), (x0, ymax), (x0, ymin)]]}}
+        for x0, x1 in [(xmin, middle), (middle, xmax)]
+    ]
+    aoi = tmp_path / 'aoi.geojson'
+    aoi.write_text(json.dumps({'type': 'FeatureCollection', 'features': features}))
+    output = tmp_path / 'superficies.tif'
+
+    assert surfaces.main([str(aoi), '--radius', '300', '--metric', 'edge_density', '-o', str(output), '--offline']) == 0
+
+    with rasterio.open(output) as dataset:
+        assert dataset.count == 1
+        assert dataset.descriptions == ('edge_density',)
+        assert np.isfinite(dataset.read(1)).any()
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from landscapemetrics import fake_ee, transfer
+from landscapemetrics.tiling import (
+    buffer_window,
+    extract_buffer,
+    extract_window,
+    split_window,
+    window_shape,
+    window_transform,
+)
+from landscapemetrics.transfer import fetch_pixels
+
+LON, LAT = -49.3, -27.1
+
+
+def expected_pixels(source, band, window):
+    row0, row1, col0, col1 = window
+    return source.image.band_array(band, row0, row1, col0, col1)
+
+
+def round_trips():
+    return fake_ee.stats["round_trips"]
+
+
+def test_fetch_pixels_returns_uint8_window(source, band):
+    window = buffer_window(LON, LAT, 1000)
+    image = source.image.select(band)
+    before = round_trips()
+
+    array = fetch_pixels(image, band, window_transform(window), window_shape(window))
+
+    assert array.dtype == np.uint8
+    assert array.shape == window_shape(window)
+    np.testing.assert_array_equal(array, expected_pixels(source, band, window))
+    assert round_trips() - before == 1
+
+
+def test_fetch_pixels_rejects_unexpected_shape(source, band, monkeypatch):
+    window = buffer_window(LON, LAT, 1000)
+    decode_npy = transfer.decode_npy
+    monkeypatch.setattr(transfer, "decode_npy", lambda payload, band: decode_npy(payload, band)[1:])
+
+    with pytest.raises(ValueError, match="forma inesperada"):
+        fetch_pixels(source.image.select(band), band, window_transform(window), window_shape(window))
+
+
+def test_extract_window_single_tile(source, band):
+    window = buffer_window(LON, LAT, 2000)
+    image = source.image.select(band)
+    before = round_trips()
+
+    raster = extract_window(image, band, window)
+
+    assert raster.transform == window_transform(window)
+    np.testing.assert_array_equal(raster.array, expected_pixels(source, band, window))
+    assert round_trips() - before == 1
+
+
+def test_extract_window_assembles_tiles(source, band):
+    window = buffer_window(LON, LAT, 3000)
+    tiles = split_window(window, tile_size=64)
+    image = source.image.select(band)
+    before = round_trips()
+
+    raster = extract_window(image, band, window, tile_size=64)
+
+    assert len(tiles) > 1
+    np.testing.assert_array_equal(raster.array, expected_pixels(source, band, window))
+    assert round_trips() - before == len(tiles)
+
+
+def test_extract_window_json_transport_matches_npy(source, band):
+    window = buffer_window(LON, LAT, 1500)
+    image = source.image.select(band)
+
+    npy = extract_window(image, band, window).array
+    json = extract_window(image, band, window, transport='json').array
+
+    np.testing.assert_array_equal(json, npy)
+
+
+def test_extract_buffer_uses_buffer_window(source, band):
+    raster = extract_buffer(source.image.select(band), band, LON, LAT, 1000)
+
+    assert raster.array.shape == window_shape(buffer_window(LON, LAT, 1000))